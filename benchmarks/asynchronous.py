@@ -0,0 +1,118 @@
+"""Compare async (ASGI) and sync (WSGI) generic resources on I/O-bound work.
+
+Every request handler waits ``--delay`` seconds to simulate a database or
+network call. WSGI resources are served by a pool of ``--threads`` worker
+threads (like a threaded WSGI server) while ASGI resources handle all
+requests concurrently in a single event loop.
+
+Usage::
+
+    python benchmarks/asynchronous.py --requests 500 --threads 16
+
+This script requires ``falcon>=3.0``.
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import falcon
+import falcon.asgi
+from falcon import testing
+
+from graceful.fields import IntField, StringField
+from graceful.serializers import BaseSerializer
+from graceful.resources.generic import ListAPI
+from graceful.asynchronous.generic import AsyncListAPI
+
+
+class ItemSerializer(BaseSerializer):
+    id = IntField("item identifier")
+    name = StringField("item name")
+
+
+def make_items(count):
+    return [{'id': i, 'name': 'item {}'.format(i)} for i in range(count)]
+
+
+def wsgi_client(delay, items):
+    class ItemListAPI(ListAPI):
+        serializer = ItemSerializer()
+
+        def list(self, params, meta, **kwargs):
+            time.sleep(delay)
+            return items
+
+    app = falcon.App()
+    app.add_route('/items', ItemListAPI())
+    return testing.TestClient(app)
+
+
+def asgi_app(delay, items):
+    class ItemListAPI(AsyncListAPI):
+        serializer = ItemSerializer()
+
+        async def list(self, params, meta, **kwargs):
+            await asyncio.sleep(delay)
+            return items
+
+    app = falcon.asgi.App()
+    app.add_route('/items', ItemListAPI())
+    return app
+
+
+def bench_wsgi(requests, threads, delay, items):
+    client = wsgi_client(delay, items)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(
+            lambda _: client.simulate_get('/items').status_code,
+            range(requests)
+        ))
+    elapsed = time.perf_counter() - start
+
+    assert all(status == 200 for status in results)
+    return elapsed
+
+
+def bench_asgi(requests, delay, items):
+    app = asgi_app(delay, items)
+
+    async def run():
+        async with testing.ASGIConductor(app) as conductor:
+            return await asyncio.gather(*[
+                conductor.simulate_get('/items') for _ in range(requests)
+            ])
+
+    start = time.perf_counter()
+    results = asyncio.get_event_loop().run_until_complete(run())
+    elapsed = time.perf_counter() - start
+
+    assert all(result.status_code == 200 for result in results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--delay', type=float, default=0.01)
+    parser.add_argument('--items', type=int, default=10)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+
+    for name, elapsed in (
+        ('wsgi ({} threads)'.format(args.threads), bench_wsgi(
+            args.requests, args.threads, args.delay, items
+        )),
+        ('asgi', bench_asgi(args.requests, args.delay, items)),
+    ):
+        print('{:<20} {:>8.3f}s {:>10.1f} req/s'.format(
+            name, elapsed, args.requests / elapsed
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Compare CIDRIndex lookups with linear scan over list of networks.
+
+The linear scan mimics the ``in`` check of list-based IP range
+containers (e.g. ``iptools.IpRangeList``) that test every range one by
+one. CIDRIndex lookup is a single binary search.
+
+Usage::
+
+    python benchmarks/ip_whitelist.py --sizes 10 100 1000 10000
+"""
+import argparse
+import ipaddress
+from random import Random
+import timeit
+
+from graceful.authentication import CIDRIndex
+
+
+class NetworkList:
+    """List-based whitelist with linear ``in`` check."""
+
+    def __init__(self, networks):
+        self.networks = [ipaddress.ip_network(net) for net in networks]
+
+    def __contains__(self, address):
+        address = ipaddress.ip_address(address)
+        return any(address in network for network in self.networks)
+
+
+def random_networks(random, count):
+    networks = set()
+
+    while len(networks) < count:
+        prefix = random.randint(16, 28)
+        address = random.getrandbits(32) & (0xFFFFFFFF << (32 - prefix))
+        networks.add(str(ipaddress.ip_network((address, prefix))))
+
+    return sorted(networks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000]
+    )
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+
+    random = Random(0)
+    addresses = [
+        str(ipaddress.ip_address(random.getrandbits(32)))
+        for _ in range(args.lookups)
+    ]
+
+    print('{:>8} {:>17} {:>17} {:>9}'.format(
+        'networks', 'list [us/lookup]', 'index [us/lookup]', 'speedup'
+    ))
+
+    for size in args.sizes:
+        networks = random_networks(random, size)
+        results = []
+
+        for whitelist in (NetworkList(networks), CIDRIndex(networks)):
+            # note: warm up (CIDRIndex builds its tables on first lookup)
+            '0.0.0.0' in whitelist
+
+            elapsed = min(timeit.repeat(
+                lambda: [address in whitelist for address in addresses],
+                number=1, repeat=3,
+            ))
+            results.append(elapsed / args.lookups * 1e6)
+
+        print('{:>8} {:>17.2f} {:>17.2f} {:>8.1f}x'.format(
+            size, results[0], results[1], results[0] / results[1]
+        ))
+
+
+if __name__ == '__main__':
+    main()
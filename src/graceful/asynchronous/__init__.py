@@ -0,0 +1,5 @@
+"""Subpackage with asyncio-native resources and authentication middleware.
+
+These classes are intended to be used with falcon's ASGI application
+(``falcon.asgi.App``) and require Python 3.5+ and ``falcon>=3.0``.
+"""
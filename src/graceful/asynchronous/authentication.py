@@ -0,0 +1,176 @@
+from falcon import HTTPMissingHeader
+
+from graceful import authentication
+from graceful.asynchronous.mixins import resolve
+from graceful.timing import phase
+
+
+class AsyncAuthenticationMixin:
+    """Add ``async`` resource processing to authentication middleware.
+
+    Falcon's ASGI application uses the ``process_resource_async()`` method
+    if middleware provides one. The user storage ``get_user()`` method can
+    be either a plain function or a coroutine function.
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def process_resource_async(
+        self, req, resp, resource, uri_kwargs=None
+    ):
+        """Process resource after routing to it.
+
+        This is an ``async`` counterpart of the
+        :meth:`BaseAuthenticationMiddleware.process_resource()` method.
+        """
+        if 'user' in req.context:
+            return
+
+        with phase('authentication'):
+            identifier = self.identify(req, resp, resource, uri_kwargs)
+            user = await resolve(
+                self.try_storage(identifier, req, resp, resource, uri_kwargs)
+            )
+            self._update_context(req, user)
+
+
+class Basic(AsyncAuthenticationMixin, authentication.Basic):
+    """Async counterpart of :class:`graceful.authentication.Basic`.
+
+    .. versionadded:: 0.7.0
+    """
+
+
+class XAPIKey(AsyncAuthenticationMixin, authentication.XAPIKey):
+    """Async counterpart of :class:`graceful.authentication.XAPIKey`.
+
+    .. versionadded:: 0.7.0
+    """
+
+
+class Token(AsyncAuthenticationMixin, authentication.Token):
+    """Async counterpart of :class:`graceful.authentication.Token`.
+
+    .. versionadded:: 0.7.0
+    """
+
+
+class SignedToken(AsyncAuthenticationMixin, authentication.SignedToken):
+    """Async counterpart of :class:`graceful.authentication.SignedToken`.
+
+    .. versionadded:: 0.7.0
+    """
+
+
+class XForwardedFor(AsyncAuthenticationMixin, authentication.XForwardedFor):
+    """Async counterpart of :class:`graceful.authentication.XForwardedFor`.
+
+    ASGI requests have no WSGI environment so remote address fallback uses
+    the ``req.remote_addr`` attribute instead of ``REMOTE_ADDR`` variable.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def _get_client_address(self, req):
+        """Get address from ``X-Forwarded-For`` header or use remote address.
+
+        Args:
+            req (falcon.asgi.Request): falcon.asgi.Request object.
+
+        Returns:
+            str: client address.
+        """
+        try:
+            forwarded_for = req.get_header('X-Forwarded-For', True)
+            return forwarded_for.split(',')[0].strip()
+        except (KeyError, HTTPMissingHeader):
+            return req.remote_addr if self.remote_address_fallback else None
+
+
+class Anonymous(AsyncAuthenticationMixin, authentication.Anonymous):
+    """Async counterpart of :class:`graceful.authentication.Anonymous`.
+
+    .. versionadded:: 0.7.0
+    """
+
+
+class AsyncKeyValueUserStorage(authentication.KeyValueUserStorage):
+    """Key-value user storage for asyncio-native key-value store clients.
+
+    It works exactly like :class:`graceful.authentication.KeyValueUserStorage`
+    but awaits results of ``kv_store.get(key)`` and ``kv_store.set(key,
+    value)`` calls (e.g. when used with asyncio Redis client).
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def get_user(
+        self, identified_with, identifier, req, resp, resource, uri_kwargs
+    ):
+        """Get user object for given identifier.
+
+        Args:
+            identified_with (object): authentication middleware used
+                to identify the user.
+            identifier: middleware specifix user identifier (string or tuple
+                in case of all built in authentication middleware classes).
+
+        Returns:
+            dict: user object stored in the store if it exists, otherwise
+            ``None``
+        """
+        stored_value = await resolve(self.kv_store.get(
+            self._get_storage_key(identified_with, identifier)
+        ))
+        if stored_value is not None:
+            user = self.serialization.loads(stored_value.decode())
+        else:
+            user = None
+
+        return user
+
+    async def register(self, identified_with, identifier, user):
+        """Register new key for given client identifier.
+
+        Args:
+            identified_with (object): authentication middleware used
+                to identify the user.
+            identifier (str): user identifier.
+            user (str): user object to be stored in the backend.
+        """
+        await resolve(self.kv_store.set(
+            self._get_storage_key(identified_with, identifier),
+            self.serialization.dumps(user).encode(),
+        ))
+
+
+class CompositeAuthentication(authentication.CompositeAuthentication):
+    """Async :class:`graceful.authentication.CompositeAuthentication`.
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def process_resource_async(
+        self, req, resp, resource, uri_kwargs=None
+    ):
+        """Process resource after routing to it.
+
+        This is an ``async`` counterpart of the
+        :meth:`CompositeAuthentication.process_resource()` method.
+        """
+        if 'user' in req.context:
+            return
+
+        with phase('authentication'):
+            for index, middleware in self._candidates(req):
+                identifier = middleware.identify(
+                    req, resp, resource, uri_kwargs
+                )
+                user = await resolve(middleware.try_storage(
+                    identifier, req, resp, resource, uri_kwargs
+                ))
+
+                if user is not None:
+                    return self._update_context(req, index, user)
+
+            self._update_context(req, len(self.middlewares), None)
@@ -0,0 +1,31 @@
+from graceful import authorization
+from graceful.authorization import _before, _require_user
+
+
+@_before
+async def authentication_required(req, resp, resource, uri_kwargs):
+    """Async :any:`graceful.authorization.authentication_required` hook.
+
+    Falcon's ASGI application requires hooks of coroutine responders to be
+    coroutine functions too so this hook must be used with async resources.
+
+    Args:
+        req (falcon.asgi.Request): the request object.
+        resp (falcon.asgi.Response): the response object.
+        resource (object): the resource object.
+        uri_kwargs (dict): keyword arguments from the URI template.
+
+    .. versionadded:: 0.7.0
+    """
+    _require_user(req)
+
+
+class PermissionPolicy(authorization.PermissionPolicy):
+    """Async counterpart of :any:`graceful.authorization.PermissionPolicy`.
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def check(self, req, resp, resource, uri_kwargs):
+        """Ensure that user is allowed to call the requested method."""
+        super().check(req, resp, resource, uri_kwargs)
@@ -0,0 +1,229 @@
+from graceful.asynchronous.mixins import (
+    resolve,
+    AsyncRetrieveMixin,
+    AsyncListMixin,
+    AsyncUpdateMixin,
+    AsyncCreateMixin,
+    AsyncDeleteMixin,
+    AsyncCreateBulkMixin,
+)
+from graceful.resources.base import BaseResource
+from graceful.resources.mixins import PaginatedMixin
+from graceful.resources.generic import (
+    _to_representation,
+    _to_representations,
+    RetrieveAPI,
+    ListAPI,
+)
+
+
+def _size(objects):
+    """Return number of objects or zero if it cannot be determined."""
+    try:
+        return len(objects)
+    except TypeError:
+        return 0
+
+
+class AsyncResource(AsyncRetrieveMixin, BaseResource):
+    """Async counterpart of :class:`graceful.resources.generic.Resource`.
+
+    Example usage:
+
+    .. code-block:: python
+
+        from graceful.asynchronous.generic import AsyncResource
+
+        class SampleResource(AsyncResource, with_context=True):
+            async def retrieve(self, params, meta, context, **kwargs):
+                return await fetch_sample()
+
+    .. versionadded:: 0.7.0
+    """
+
+
+class AsyncListResource(AsyncListMixin, BaseResource):
+    """Async counterpart of :class:`graceful.resources.generic.ListResource`.
+
+    .. versionadded:: 0.7.0
+    """
+
+
+class AsyncRetrieveAPI(AsyncRetrieveMixin, RetrieveAPI):
+    """Async counterpart of :class:`graceful.resources.generic.RetrieveAPI`.
+
+    Allowed methods:
+
+    * GET: retrieve resource representation (handled with ``.retrieve()``
+      method handler)
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def _retrieve(self, params, meta, **kwargs):
+        obj = await resolve(self.retrieve(params, meta, **kwargs))
+        return _to_representation(self.serializer, obj)
+
+    async def on_get(self, req, resp, **kwargs):
+        """Respond on GET requests using ``self.retrieve()`` handler."""
+        return await super().on_get(
+            req, resp, handler=self._retrieve, **kwargs
+        )
+
+
+class AsyncRetrieveUpdateAPI(AsyncUpdateMixin, AsyncRetrieveAPI):
+    """Async counterpart of :class:`RetrieveUpdateAPI`.
+
+    Allowed methods:
+
+    * GET: retrieve resource representation handled with ``.retrieve()``
+      method handler
+    * PUT: update resource with representation provided in request body
+      (handled with ``.update()`` method handler)
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def _update(self, params, meta, **kwargs):
+        obj = await resolve(self.update(params, meta, **kwargs))
+        return _to_representation(self.serializer, obj)
+
+    async def on_put(self, req, resp, **kwargs):
+        """Respond on PUT requests using ``self.update()`` handler."""
+        validated = self.require_validated(await self.require_body(req))
+        return await super().on_put(
+            req, resp,
+            handler=self._update, validated=validated,
+            **kwargs
+        )
+
+
+class AsyncRetrieveUpdateDeleteAPI(AsyncDeleteMixin, AsyncRetrieveUpdateAPI):
+    """Async counterpart of :class:`RetrieveUpdateDeleteAPI`.
+
+    Allowed methods:
+
+    * GET: retrieve resource representation (handled with ``.retrieve()``
+      method handler)
+    * PUT: update resource with representation provided in request body
+      (handled with ``.update()`` method handler)
+    * DELETE: delete resource (handled with ``.delete()`` method handler)
+
+    .. versionadded:: 0.7.0
+    """
+
+
+class AsyncListAPI(AsyncListMixin, ListAPI):
+    """Async counterpart of :class:`graceful.resources.generic.ListAPI`.
+
+    Allowed methods:
+
+    * GET: list multiple resource instances representations (handled
+      with ``.list()`` method handler)
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def _list(self, params, meta, **kwargs):
+        objects = await resolve(self.list(params, meta, **kwargs))
+        return await self.offload(
+            _size(objects), _to_representations, self.serializer, objects
+        )
+
+    async def on_get(self, req, resp, **kwargs):
+        """Respond on GET requests using ``self.list()`` handler."""
+        return await super().on_get(req, resp, handler=self._list, **kwargs)
+
+
+class AsyncListCreateAPI(
+    AsyncCreateMixin, AsyncCreateBulkMixin, AsyncListAPI
+):
+    """Async counterpart of :class:`ListCreateAPI`.
+
+    Allowed methods:
+
+    * GET: list multiple resource instances representations (handled
+      with ``.list()`` method handler)
+    * POST: create new resource from representation provided in request body
+      (handled with ``.create()`` method handler)
+    * PATCH: create multiple resources from list of representations provided
+      in request body (handled with ``.create_bulk()`` method handler.
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def _create(self, params, meta, **kwargs):
+        obj = await resolve(self.create(params, meta, **kwargs))
+        return _to_representation(self.serializer, obj)
+
+    async def _create_bulk(self, params, meta, **kwargs):
+        objects = await resolve(self.create_bulk(params, meta, **kwargs))
+        return await self.offload(
+            _size(objects), _to_representations, self.serializer, objects
+        )
+
+    async def create_bulk(self, params, meta, **kwargs):
+        """Create items in bulk by reusing existing ``.create()`` handler.
+
+        .. note::
+            This is default create_bulk implementation that may not be safe
+            to use in production environment depending on your implementation
+            of ``.create()`` method handler.
+        """
+        validated = kwargs.pop('validated')
+        created = []
+
+        for item in validated:
+            created.append(
+                await resolve(
+                    self.create(params, meta, validated=item, **kwargs)
+                )
+            )
+
+        return created
+
+    async def on_post(self, req, resp, **kwargs):
+        """Respond on POST requests using ``self.create()`` handler."""
+        validated = self.require_validated(await self.require_body(req))
+        return await super().on_post(
+            req, resp,
+            handler=self._create, validated=validated,
+            **kwargs
+        )
+
+    async def on_patch(self, req, resp, **kwargs):
+        """Respond on PATCH requests using ``self.create_bulk()`` handler."""
+        validated = self.require_validated(
+            await self.require_body(req), bulk=True
+        )
+        return await super().on_patch(
+            req, resp,
+            handler=self._create_bulk, validated=validated,
+            **kwargs
+        )
+
+
+class AsyncPaginatedListAPI(PaginatedMixin, AsyncListAPI):
+    """Async counterpart of :class:`PaginatedListAPI`.
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def _list(self, params, meta, **kwargs):
+        objects = await super()._list(params, meta, **kwargs)
+        # note: we need to populate meta after objects are retrieved
+        self.add_pagination_meta(params, meta)
+        return objects
+
+
+class AsyncPaginatedListCreateAPI(PaginatedMixin, AsyncListCreateAPI):
+    """Async counterpart of :class:`PaginatedListCreateAPI`.
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def _list(self, params, meta, **kwargs):
+        objects = await super()._list(params, meta, **kwargs)
+        # note: we need to populate meta after objects are retrieved
+        self.add_pagination_meta(params, meta)
+        return objects
@@ -0,0 +1,257 @@
+import asyncio
+from functools import partial
+from inspect import isawaitable
+
+import falcon
+
+from graceful.media.encoding import HTTPRequestEntityTooLarge
+from graceful.resources.mixins import (
+    BaseMixin,
+    RetrieveMixin,
+    ListMixin,
+    DeleteMixin,
+    UpdateMixin,
+    CreateMixin,
+    CreateBulkMixin,
+)
+from graceful.timing import phase
+
+
+async def resolve(value):
+    """Await given value if it is awaitable or simply return it otherwise.
+
+    This allows async resources to accept both plain and ``async``
+    implementations of resource manipulation methods and user storages.
+    """
+    if isawaitable(value):
+        return await value
+    return value
+
+
+class _BufferedRequest:
+    """Request proxy that replaces request stream with in-memory body.
+
+    It allows to reuse all synchronous media handling code
+    (``require_representation()``, ``require_validated()``) with requests
+    whose body was already read asynchronously.
+    """
+
+    def __init__(self, req, body):
+        self._req = req
+        self.stream = _BytesStream(body)
+        self.content_length = len(body)
+
+    def __getattr__(self, name):
+        return getattr(self._req, name)
+
+
+class _BytesStream:
+    """Minimal file-like object over bytes with ``read(size)`` method."""
+
+    def __init__(self, data):
+        self._data = memoryview(data)
+        self._position = 0
+
+    def read(self, size=-1):
+        start = self._position
+        end = len(self._data) if size is None or size < 0 else start + size
+        self._position = min(end, len(self._data))
+        return self._data[start:self._position].tobytes()
+
+
+class AsyncBaseMixin(BaseMixin):
+    """Base mixin class for asyncio-native resources.
+
+    It provides ``async`` versions of the ``handle()`` method and the
+    ``on_options()`` responder. Resource manipulation methods
+    (list/retrieve/create etc.) can be either plain functions or
+    coroutine functions.
+
+    Serialization of large payloads can be offloaded to an executor so
+    the event loop stays responsive:
+
+    .. code-block:: python
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        class CatListResource(AsyncListAPI, with_context=True):
+            serializer = CatSerializer()
+            serialization_executor = ThreadPoolExecutor(4)
+
+            async def list(self, params, meta, context, **kwargs):
+                return await db.fetch_cats()
+
+    .. versionadded:: 0.7.0
+    """
+
+    #: Executor (e.g. ``ThreadPoolExecutor``) used to offload serialization
+    #: of large payloads. If set to ``None`` then serialization always
+    #: happens in the event loop.
+    serialization_executor = None
+
+    #: Minimal number of serialized items for which serialization is
+    #: offloaded to the ``serialization_executor``.
+    serialization_offload_threshold = 100
+
+    async def offload(self, size, func, *args):
+        """Call function in ``serialization_executor`` if payload is large.
+
+        Args:
+            size (int): size of the payload (e.g. number of objects).
+            func (callable): function to call.
+            *args: positional arguments of function call.
+
+        Returns:
+            value returned by ``func``.
+        """
+        if (
+            self.serialization_executor is None or
+            size < self.serialization_offload_threshold
+        ):
+            return func(*args)
+
+        return await asyncio.get_event_loop().run_in_executor(
+            self.serialization_executor, partial(func, *args)
+        )
+
+    async def handle(self, handler, req, resp, **kwargs):
+        """Handle given resource manipulation flow in consistent manner.
+
+        This is an ``async`` counterpart of :meth:`BaseMixin.handle()`.
+        The ``handler`` can be a plain function or a coroutine function.
+
+        Args:
+             handler (method): resource manipulation method handler.
+             req (falcon.Request): request object instance.
+             resp (falcon.Response): response object instance to be modified.
+             **kwargs: additional keyword arguments retrieved from url
+                 template.
+
+        Returns:
+             Content dictionary (preferably resource representation).
+        """
+        with phase('params'):
+            params = self.require_params(req)
+
+        # future: remove in 1.x
+        if self._handler_context:
+            kwargs['context'] = req.context
+
+        meta = {'params': params}
+        with phase('handler'):
+            content = await resolve(handler(params, meta, **kwargs))
+        meta['params'] = params
+
+        await self.offload(
+            len(content) if isinstance(content, list) else 1,
+            self.make_body, resp, params, meta, content
+        )
+        return content
+
+    async def require_body(self, req):
+        """Read the whole request body without blocking the event loop.
+
+        Body length limit (the ``max_content_length`` attribute) is checked
+        before anything is read from the stream.
+
+        Args:
+            req (falcon.Request): request object
+
+        Returns:
+            request proxy object with buffered body that can be passed to
+            ``require_representation()`` and ``require_validated()``.
+
+        Raises:
+            falcon.HTTPRequestEntityTooLarge: If request body is too large
+        """
+        limit = self.max_content_length
+
+        if (
+            limit is not None and
+            req.content_length is not None and
+            req.content_length > limit
+        ):
+            raise HTTPRequestEntityTooLarge(
+                'Request body is too large',
+                'Request body exceeds the limit of {} bytes'.format(limit)
+            )
+
+        body = await resolve(
+            req.stream.read(limit + 1 if limit is not None else -1)
+        )
+        return _BufferedRequest(req, body)
+
+    async def on_options(self, req, resp, **kwargs):
+        """Respond with media formatted resource description."""
+        super().on_options(req, resp, **kwargs)
+
+
+class AsyncRetrieveMixin(AsyncBaseMixin, RetrieveMixin):
+    """Add default "retrieve flow on GET" to any async resource class."""
+
+    async def on_get(self, req, resp, handler=None, **kwargs):
+        """Respond on GET HTTP request assuming resource retrieval flow."""
+        await self.handle(
+            handler or self.retrieve, req, resp, **kwargs
+        )
+
+
+class AsyncListMixin(AsyncBaseMixin, ListMixin):
+    """Add default "list flow on GET" to any async resource class."""
+
+    async def on_get(self, req, resp, handler=None, **kwargs):
+        """Respond on GET HTTP request assuming resource list flow."""
+        await self.handle(
+            handler or self.list, req, resp, **kwargs
+        )
+
+
+class AsyncDeleteMixin(AsyncBaseMixin, DeleteMixin):
+    """Add default "delete flow on DELETE" to any async resource class."""
+
+    async def on_delete(self, req, resp, handler=None, **kwargs):
+        """Respond on DELETE HTTP request assuming resource deletion flow."""
+        await self.handle(
+            handler or self.delete, req, resp, **kwargs
+        )
+
+        resp.status = falcon.HTTP_ACCEPTED
+
+
+class AsyncUpdateMixin(AsyncBaseMixin, UpdateMixin):
+    """Add default "update flow on PUT" to any async resource class."""
+
+    async def on_put(self, req, resp, handler=None, **kwargs):
+        """Respond on PUT HTTP request assuming resource update flow."""
+        await self.handle(
+            handler or self.update, req, resp, **kwargs
+        )
+        resp.status = falcon.HTTP_ACCEPTED
+
+
+class AsyncCreateMixin(AsyncBaseMixin, CreateMixin):
+    """Add default "creation flow on POST" to any async resource class."""
+
+    async def on_post(self, req, resp, handler=None, **kwargs):
+        """Respond on POST HTTP request assuming resource creation flow."""
+        obj = await self.handle(
+            handler or self.create, req, resp, **kwargs
+        )
+        try:
+            resp.location = self.get_object_location(obj)
+        except NotImplementedError:
+            pass
+
+        resp.status = falcon.HTTP_CREATED
+
+
+class AsyncCreateBulkMixin(AsyncBaseMixin, CreateBulkMixin):
+    """Add default "bulk creation flow on PATCH" to any async resource."""
+
+    async def on_patch(self, req, resp, handler=None, **kwargs):
+        """Respond on PATCH HTTP request assuming bulk creation flow."""
+        await self.handle(
+            handler or self.create_bulk, req, resp, **kwargs
+        )
+
+        resp.status = falcon.HTTP_CREATED
@@ -0,0 +1,21 @@
+from graceful import timing
+
+
+class ServerTiming(timing.ServerTiming):
+    """Async counterpart of :class:`graceful.timing.ServerTiming`.
+
+    Every request of ASGI application is processed in its own asyncio task
+    so timings of concurrent requests are kept apart by context variables.
+
+    .. versionadded:: 0.7.0
+    """
+
+    async def process_request_async(self, req, resp):
+        """Start measuring request processing."""
+        self.process_request(req, resp)
+
+    async def process_response_async(
+        self, req, resp, resource=None, req_succeeded=True
+    ):
+        """Finish measuring and publish timings of the request."""
+        self.process_response(req, resp, resource, req_succeeded)
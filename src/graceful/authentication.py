@@ -2,8 +2,17 @@
 import json
 import base64
 import binascii
+import bisect
+import copy
+import hashlib
+import hmac
+import ipaddress
+import os
 import re
 import abc
+import threading
+import time
+from collections import OrderedDict
 
 try:
     from functools import singledispatch
@@ -14,6 +23,9 @@ except ImportError:  # pragma: nocover
 
 from falcon import HTTPMissingHeader, HTTPBadRequest
 
+from graceful.coalescing import Batcher, SingleFlight
+from graceful.timing import phase
+
 
 class BaseUserStorage(metaclass=abc.ABCMeta):
     """Base user storage class that defines required API for user storages.
@@ -81,6 +93,172 @@ class DummyUserStorage(BaseUserStorage):
         return self.user
 
 
+_MISSING = object()
+
+
+class CIDRIndex:
+    """Compact index of IPv4/IPv6 networks for fast address lookups.
+
+    Networks are flattened into sorted, non-overlapping integer intervals
+    so every lookup is a single binary search (``O(log n)``) regardless
+    of the number of indexed networks. If networks overlap then the most
+    specific (the smallest) network matching the address wins.
+
+    The index can be used as the ``ip_range`` argument of
+    :any:`IPRangeWhitelistStorage`. Every network can be mapped to a
+    different user object:
+
+    .. code-block:: python
+
+        from graceful.authentication import (
+            CIDRIndex, IPRangeWhitelistStorage, XForwardedFor
+        )
+
+        auth_middleware = XForwardedFor(
+            user_storage=IPRangeWhitelistStorage(
+                CIDRIndex({
+                    '10.0.0.0/8': {'username': 'internal'},
+                    '10.1.0.0/16': {'username': 'staging'},
+                    '2001:db8::/32': {'username': 'internal-v6'},
+                    # note: None means "use default user of the storage"
+                    '192.168.0.0/16': None,
+                }),
+                user={'username': 'office'},
+            )
+        )
+
+    Args:
+        networks: mapping of network strings (CIDR notation) to values or
+            iterable of network strings (all mapped to ``None``).
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, networks=()):
+        """Initialize index with given networks."""
+        self._networks = {}
+        self._tables = None
+        self._lock = threading.Lock()
+
+        if hasattr(networks, 'items'):
+            networks = networks.items()
+        else:
+            networks = ((network, None) for network in networks)
+
+        for network, value in networks:
+            self.add(network, value)
+
+    def add(self, network, value=None):
+        """Add network to the index.
+
+        Args:
+            network (str): network in CIDR notation (e.g. ``10.0.0.0/8``).
+                Single address is treated as network of one address.
+            value: value returned on lookups of addresses in this network.
+
+        Raises:
+            ValueError: If network is not a valid IPv4/IPv6 network.
+        """
+        network = ipaddress.ip_network(network, strict=False)
+
+        with self._lock:
+            self._networks[network] = value
+            self._tables = None
+
+    def __len__(self):
+        """Return number of indexed networks."""
+        return len(self._networks)
+
+    def __contains__(self, address):
+        """Check if address belongs to any of indexed networks."""
+        return self.get(address, _MISSING) is not _MISSING
+
+    def get(self, address, default=None):
+        """Get value of the most specific network that contains address.
+
+        Args:
+            address (str): IPv4/IPv6 address.
+            default: value returned if address is invalid or it does not
+                belong to any of indexed networks.
+
+        Returns:
+            value of the matching network or ``default``.
+        """
+        try:
+            address = ipaddress.ip_address(address)
+        except ValueError:
+            return default
+
+        tables = self._tables
+        if tables is None:
+            tables = self._build()
+
+        starts, ends, values = tables[address.version]
+        number = int(address)
+        index = bisect.bisect_right(starts, number) - 1
+
+        if index >= 0 and number <= ends[index]:
+            return values[index]
+
+        return default
+
+    def _build(self):
+        """Flatten networks into sorted disjoint intervals per IP version."""
+        with self._lock:
+            if self._tables is not None:
+                return self._tables
+
+            tables = {4: ([], [], []), 6: ([], [], [])}
+
+            # note: CIDR networks are either disjoint or nested so with this
+            #       ordering every network follows all networks containing it
+            networks = sorted(
+                self._networks.items(),
+                key=lambda item: (
+                    item[0].version,
+                    int(item[0].network_address),
+                    -item[0].num_addresses,
+                )
+            )
+            stack = []
+            cursor = None
+
+            def emit(version, start, end, value):
+                if start <= end:
+                    starts, ends, values = tables[version]
+                    starts.append(start)
+                    ends.append(end)
+                    values.append(value)
+
+            def close(until):
+                # note: finish all networks that end before ``until``
+                nonlocal cursor
+                while stack and stack[-1][1] < until:
+                    version, end, value = stack.pop()
+                    emit(version, cursor, end, value)
+                    cursor = end + 1
+
+            for network, value in networks:
+                start = int(network.network_address)
+                end = int(network.broadcast_address)
+
+                if stack and stack[-1][0] != network.version:
+                    close(float('inf'))
+
+                close(start)
+
+                if stack:
+                    emit(stack[-1][0], cursor, start - 1, stack[-1][2])
+
+                stack.append((network.version, end, value))
+                cursor = start
+
+            close(float('inf'))
+
+            self._tables = tables
+            return tables
+
+
 class IPRangeWhitelistStorage(BaseUserStorage):
     """Simple storage dedicated for :any:`XForwardedFor` authentication.
 
@@ -88,16 +266,20 @@ class IPRangeWhitelistStorage(BaseUserStorage):
     from its ``identify()`` method. For example usage see :any:`XForwardedFor`.
     Because it is IP range whitelist this storage it cannot distinguish
     different users' IP and always returns default user object. If you want to
-    identify different users by their IP see :any:`KeyValueUserStorage`.
+    identify different users by their IP see :any:`KeyValueUserStorage` or
+    use :any:`CIDRIndex` that maps networks to different user objects.
 
     Args:
         ip_range: Any object that supports ``in`` operator (i.e. implements the
             ``__cointains__`` method). The ``__contains__`` method should
             return ``True`` if identifier falls into specified whitelist.
-            Tip: use ``iptools``.
+            Tip: use :any:`CIDRIndex` for large whitelists.
         user: Default user object to return on successful authentication.
 
     .. versionadded:: 0.4.0
+
+    .. versionchanged:: 0.7.0
+        Values of :any:`CIDRIndex` networks are returned as user objects.
     """
 
     def __init__(self, ip_range, user):
@@ -113,7 +295,14 @@ class IPRangeWhitelistStorage(BaseUserStorage):
         .. note::
             This implementation expects that ``identifier`` is an user address.
         """
-        if identifier in self.ip_range:
+        if isinstance(self.ip_range, CIDRIndex):
+            # note: single lookup for both membership and mapped user
+            user = self.ip_range.get(identifier, _MISSING)
+
+            if user is not _MISSING:
+                return self.user if user is None else user
+
+        elif identifier in self.ip_range:
             return self.user
 
 
@@ -248,6 +437,337 @@ class KeyValueUserStorage(BaseUserStorage):
         )
 
 
+class CoalescingKeyValueUserStorage(KeyValueUserStorage):
+    """Key-value user storage that coalesces concurrent lookups.
+
+    Under concurrent load many requests usually look up the same or
+    different identifiers at roughly the same time. This storage reduces
+    number of round-trips to the key-value store in two ways:
+
+    * Concurrent lookups of the same key share single round-trip to
+      the store.
+    * Lookups of different keys that arrive within ``batch_window`` seconds
+      are grouped into a single ``kv_store.mget(keys)`` call.
+
+    Number of requests sent to the store grows then with the number of
+    distinct users instead of the raw request rate. The cost is up to
+    ``batch_window`` of additional latency for the first request of every
+    batch.
+
+    Args:
+        kv_store: Key-value store client instance (e.g. Redis client object).
+            In addition to methods required by :any:`KeyValueUserStorage` it
+            should provide the ``mget(keys)`` method that returns list of
+            values for given list of keys (``None`` for missing keys). If
+            the store has no ``mget()`` method then keys of every batch are
+            retrieved one by one using ``get(key)``.
+        key_prefix: key prefix used to store client identities.
+        serialization: serialization object/module that uses the
+            ``dumps()``/``loads()`` protocol. Defaults to ``json``.
+        batch_window (float): time (in seconds) for which lookups are
+            collected before batch is sent to the store.
+        max_batch_size (int): maximum number of keys in single batch. Batch
+            is sent immediately once it reaches this size.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, kv_store, key_prefix='users', serialization=None,
+        batch_window=0.002, max_batch_size=100,
+    ):
+        """Initialize coalescing kv_store user storage."""
+        super().__init__(kv_store, key_prefix, serialization)
+        self._singleflight = SingleFlight()
+        self._batcher = Batcher(self._fetch, batch_window, max_batch_size)
+
+    @property
+    def batch_window(self):
+        """Time (in seconds) for which lookups are collected."""
+        return self._batcher.window
+
+    @batch_window.setter
+    def batch_window(self, value):
+        self._batcher.window = value
+
+    @property
+    def max_batch_size(self):
+        """Maximum number of keys in single batch."""
+        return self._batcher.max_size
+
+    @max_batch_size.setter
+    def max_batch_size(self, value):
+        self._batcher.max_size = value
+
+    def get_user(
+        self, identified_with, identifier, req, resp, resource, uri_kwargs
+    ):
+        """Get user object for given identifier.
+
+        Args:
+            identified_with (object): authentication middleware used
+                to identify the user.
+            identifier: middleware specifix user identifier (string or tuple
+                in case of all built in authentication middleware classes).
+
+        Returns:
+            dict: user object stored in the store if it exists, otherwise
+            ``None``
+        """
+        stored_value = self._lookup(
+            self._get_storage_key(identified_with, identifier)
+        )
+        if stored_value is not None:
+            user = self.serialization.loads(stored_value.decode())
+        else:
+            user = None
+
+        return user
+
+    def _lookup(self, key):
+        """Get raw value for given key sharing round-trips when possible."""
+        # note: identical lookups share single call so every key is
+        #       included in a batch only once
+        value, _ = self._singleflight.do(key, self._batcher.call, key)
+        return value
+
+    def _fetch(self, keys):
+        """Retrieve values of given keys from the store."""
+        mget = getattr(self.kv_store, 'mget', None)
+
+        if mget is not None:
+            return mget(keys)
+
+        return [self.kv_store.get(key) for key in keys]
+
+
+class CachedUserStorage(BaseUserStorage):
+    """Caching wrapper for any user storage.
+
+    It keeps a bounded LRU cache of user objects returned by the wrapped
+    storage so repeated requests of the same client do not have to reach
+    the storage backend (e.g. a network round-trip to the key-value store
+    and deserialization of stored value) every time. Identifiers that
+    did not match any user are cached too but for a shorter time so
+    repeated invalid credentials do not hammer the backend either.
+
+    Example usage:
+
+    .. code-block:: python
+
+        from graceful.authentication import (
+            CachedUserStorage, KeyValueUserStorage, Token
+        )
+
+        auth_middleware = Token(
+            user_storage=CachedUserStorage(
+                KeyValueUserStorage(redis), ttl=60, negative_ttl=5,
+            )
+        )
+
+    Cached user objects are shared between requests so they should
+    not be modified in place by the application.
+
+    Args:
+        user_storage (BaseUserStorage): the wrapped user storage.
+        max_size (int): maximum number of cached identifiers. Least recently
+            used entries are evicted first.
+        ttl (float): time (in seconds) for which users are cached.
+        negative_ttl (float): time (in seconds) for which identifiers that
+            did not match any user are cached. Set to ``0`` to disable
+            caching of misses.
+        timer (callable): function returning current time in seconds.
+            Defaults to ``time.monotonic``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, user_storage, max_size=1024, ttl=60, negative_ttl=5,
+        timer=time.monotonic,
+    ):
+        """Initialize caching user storage."""
+        self.user_storage = user_storage
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timer = timer
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_cache_key(self, identified_with, identifier):
+        """Get cache key for given user identifier."""
+        return identified_with.name, identifier
+
+    def get_user(
+        self, identified_with, identifier, req, resp, resource, uri_kwargs
+    ):
+        """Get user object from the cache or from the wrapped storage.
+
+        Args:
+            identified_with (object): authentication middleware used
+                to identify the user.
+            identifier: middleware specific user identifier.
+
+        Returns:
+            user object or ``None`` if identifier does not match any user.
+        """
+        key = self._get_cache_key(identified_with, identifier)
+
+        try:
+            with self._lock:
+                expires, user = self._cache[key]
+
+                if expires > self.timer():
+                    self._cache.move_to_end(key)
+                    return user
+
+                del self._cache[key]
+
+        except KeyError:
+            pass
+
+        except TypeError:
+            # note: unhashable identifiers cannot be cached
+            return self.user_storage.get_user(
+                identified_with, identifier, req, resp, resource, uri_kwargs
+            )
+
+        user = self.user_storage.get_user(
+            identified_with, identifier, req, resp, resource, uri_kwargs
+        )
+        ttl = self.ttl if user is not None else self.negative_ttl
+
+        if ttl > 0:
+            with self._lock:
+                self._cache[key] = (self.timer() + ttl, user)
+                self._cache.move_to_end(key)
+
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+
+        return user
+
+    def register(self, identified_with, identifier, user):
+        """Register user in the wrapped storage and invalidate cached entry.
+
+        Args:
+            identified_with (object): authentication middleware used
+                to identify the user.
+            identifier: user identifier.
+            user: user object to be stored in the backend.
+        """
+        self.user_storage.register(identified_with, identifier, user)
+        self.invalidate(identified_with, identifier)
+
+    def invalidate(self, identified_with, identifier):
+        """Remove cached entry for given user identifier.
+
+        Args:
+            identified_with (object): authentication middleware used
+                to identify the user.
+            identifier: user identifier.
+        """
+        key = self._get_cache_key(identified_with, identifier)
+
+        with self._lock:
+            try:
+                self._cache.pop(key, None)
+            except TypeError:
+                # note: unhashable identifiers are never cached
+                pass
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._cache.clear()
+
+
+class VerifiedCredentialsCache(CachedUserStorage):
+    """Cache of successful credential verifications for any user storage.
+
+    User storages that verify passwords (e.g. for :any:`Basic`
+    authentication) usually have to run deliberately slow password hashing
+    function (bcrypt, scrypt, PBKDF2) on every request. This wrapper
+    remembers successful verifications for a short time so repeated
+    requests with the same credentials skip the expensive hashing.
+
+    Credentials are never stored in plain text. Cache keys are computed
+    with HMAC-SHA256 of the whole identifier (e.g. both username and
+    password) using a random secret key generated for every cache
+    instance. Wrong credentials always produce different cache key than
+    the valid ones so they are always verified by the wrapped storage.
+
+    Example usage:
+
+    .. code-block:: python
+
+        from graceful.authentication import Basic, VerifiedCredentialsCache
+
+        auth_middleware = Basic(
+            user_storage=VerifiedCredentialsCache(
+                PasswordHashingUserStorage(), ttl=30
+            )
+        )
+
+    Note that password changes are not visible until cached verifications
+    expire so keep ``ttl`` short.
+
+    Args:
+        user_storage (BaseUserStorage): the wrapped user storage.
+        max_size (int): maximum number of cached verifications.
+        ttl (float): time (in seconds) for which verifications are cached.
+        negative_ttl (float): time (in seconds) for which failed
+            verifications are cached. Defaults to ``0`` (failed verifications
+            are not cached).
+        secret (bytes): secret key of the keyed hash. Defaults to 32 random
+            bytes.
+        timer (callable): function returning current time in seconds.
+            Defaults to ``time.monotonic``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, user_storage, max_size=1024, ttl=30, negative_ttl=0,
+        secret=None, timer=time.monotonic,
+    ):
+        """Initialize verified credentials cache."""
+        super().__init__(user_storage, max_size, ttl, negative_ttl, timer)
+        self._secret = secret or os.urandom(32)
+
+    def _get_cache_key(self, identified_with, identifier):
+        """Get keyed hash of given credentials to be used as cache key."""
+        return identified_with.name, hmac.new(
+            self._secret, repr(identifier).encode(), hashlib.sha256
+        ).digest()
+
+
+def user_identity(user):
+    """Get string that identifies given user object.
+
+    Users identified by middlewares without user storage (see
+    :any:`BaseAuthenticationMiddleware.try_storage`) are identified with
+    the name of the middleware and their identifier. Other user objects are
+    identified with their JSON representation.
+
+    Args:
+        user: user object (usually ``req.context['user']``).
+
+    Returns:
+        str: user identity string.
+
+    .. versionadded:: 0.7.0
+    """
+    if isinstance(user, dict) and 'identified_with' in user:
+        return '{}:{}'.format(
+            user['identified_with'].name, user['identifier']
+        )
+
+    return json.dumps(user, sort_keys=True, default=str)
+
+
 class BaseAuthenticationMiddleware:
     """Base class for all authentication middleware classes.
 
@@ -269,6 +789,11 @@ class BaseAuthenticationMiddleware:
     #: object to identify users
     only_with_storage = False
 
+    #: lowercase scheme of the ``Authorization`` header handled by the
+    #: middleware or ``None`` if middleware does not use this header.
+    #: Used by :any:`CompositeAuthentication` to dispatch requests.
+    authorization_scheme = None
+
     def __init__(self, user_storage=None, name=None):
         """Initialize authentication middleware."""
         self.user_storage = user_storage
@@ -300,15 +825,25 @@ class BaseAuthenticationMiddleware:
         if 'user' in req.context:
             return
 
-        identifier = self.identify(req, resp, resource, uri_kwargs)
-        user = self.try_storage(identifier, req, resp, resource, uri_kwargs)
+        with phase('authentication'):
+            identifier = self.identify(req, resp, resource, uri_kwargs)
+            user = self.try_storage(
+                identifier, req, resp, resource, uri_kwargs
+            )
+            self._update_context(req, user)
 
+    def _update_context(self, req, user):
+        """Store identified user or challenge in the request context."""
         if user is not None:
             req.context['user'] = user
+            req.context['identified_with'] = self
+            return
+
+        req.context.setdefault('authentication_misses', list()).append(self)
 
         # if did not succeed then we need to add this to list of available
         # challenges.
-        elif self.challenge is not None:
+        if self.challenge is not None:
             req.context.setdefault(
                 'challenges', list()
             ).append(self.challenge)
@@ -408,6 +943,7 @@ class Basic(BaseAuthenticationMiddleware):
     """
 
     only_with_storage = True
+    authorization_scheme = 'basic'
 
     #: regular expression used to validate configured realm
     REALM_RE = re.compile(r"^[\w ]+$")
@@ -520,6 +1056,7 @@ class Token(BaseAuthenticationMiddleware):
 
     challenge = 'Token'
     only_with_storage = True
+    authorization_scheme = 'token'
 
     def identify(self, req, resp, resource, uri_kwargs):
         """Identify user using Authenticate header with Token auth."""
@@ -539,6 +1076,234 @@ class Token(BaseAuthenticationMiddleware):
         return auth[1]
 
 
+class SignedToken(BaseAuthenticationMiddleware):
+    """Authenticate user with stateless HMAC-signed expiring tokens.
+
+    Signed token authentication takes form of ``Authorization`` header::
+
+        Authorization: Bearer <token_value>
+
+    Where ``<token_value>`` carries user claims and is signed with one of
+    the secret keys known only to the server. The token consists of three
+    dot-separated parts::
+
+        <key_id>.<base64url encoded JSON claims>.<base64url encoded HMAC>
+
+    The HMAC-SHA256 signature covers both the key identifier and encoded
+    claims. Claims must contain the ``exp`` value with token expiration
+    time as a Unix timestamp.
+
+    Users are identified without any user storage round-trip. Verified
+    claims are used directly as the ``req.context['user']`` value. Recently
+    verified tokens are kept in a small LRU cache so repeated requests with
+    the same token do not have to verify the signature again. Cached tokens
+    are accepted only while the key they were signed with is still present
+    in ``keys``.
+
+    Multiple keys can be active at the same time to allow for key rotation.
+    New tokens can be issued with the new key while tokens signed with
+    the old key are still accepted until the old key is removed:
+
+    .. code-block:: python
+
+        from graceful.authentication import SignedToken
+
+        auth_middleware = SignedToken(keys={
+            '2017-02': b'new secret key',
+            '2017-01': b'old secret key',
+        })
+
+        token = auth_middleware.sign(
+            {'username': 'internal'}, expires_in=3600, key_id='2017-02'
+        )
+
+    If client fails to authenticate on protected endpoint the response will
+    include following challenge::
+
+        WWW-Authenticate: Bearer
+
+    Args:
+        keys (dict): mapping of key identifiers to secret keys (bytes) used
+            to sign and verify tokens.
+        name (str): custom name of the authentication middleware. Defaults
+            to middleware class name.
+        cache_size (int): maximum number of cached verified tokens. Set to
+            ``0`` to disable the cache.
+        leeway (float): time (in seconds) for which expired tokens are still
+            accepted to account for clock skew.
+        timer (callable): function returning current Unix timestamp.
+            Defaults to ``time.time``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    challenge = 'Bearer'
+    only_with_storage = False
+    authorization_scheme = 'bearer'
+
+    def __init__(
+        self, keys, name=None, cache_size=1024, leeway=0, timer=time.time
+    ):
+        """Initialize signed token authentication middleware."""
+        if not keys:
+            raise ValueError("SignedToken requires at least one key.")
+
+        super().__init__(name=name)
+        self.keys = keys
+        self.cache_size = cache_size
+        self.leeway = leeway
+        self.timer = timer
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(data):
+        """Encode bytes with unpadded base64url encoding."""
+        return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+    @staticmethod
+    def _decode(data):
+        """Decode string with unpadded base64url encoding."""
+        return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+    def _signature(self, key, key_id, encoded_claims):
+        """Compute signature of encoded claims with given key."""
+        return hmac.new(
+            key, '.'.join((key_id, encoded_claims)).encode(), hashlib.sha256
+        ).digest()
+
+    def sign(self, claims, expires_in, key_id=None):
+        """Create signed token carrying given user claims.
+
+        Args:
+            claims (dict): JSON-serializable user claims.
+            expires_in (float): time (in seconds) after which token expires.
+            key_id (str): identifier of the key used to sign the token. Can
+                be omitted if middleware has only one key.
+
+        Returns:
+            str: signed token value.
+        """
+        if key_id is None:
+            if len(self.keys) != 1:
+                raise ValueError(
+                    "key_id is required if there is more than one key."
+                )
+            key_id, = self.keys
+
+        claims = dict(claims, exp=self.timer() + expires_in)
+        encoded_claims = self._encode(
+            json.dumps(claims, separators=(',', ':')).encode()
+        )
+        signature = self._signature(
+            self.keys[key_id], key_id, encoded_claims
+        )
+
+        return '.'.join((key_id, encoded_claims, self._encode(signature)))
+
+    def verify(self, token):
+        """Verify token and return its claims.
+
+        Args:
+            token (str): signed token value.
+
+        Returns:
+            dict: verified claims if token is valid and did not expire,
+            otherwise ``None``.
+        """
+        with self._lock:
+            cached = self._cache.get(token)
+            if cached is not None:
+                # note: keys could be rotated since the token was cached
+                if self.keys.get(cached[0]) != cached[1]:
+                    del self._cache[token]
+                    cached = None
+                else:
+                    self._cache.move_to_end(token)
+
+        if cached is None:
+            cached = self._verify_signature(token)
+
+            if cached is None:
+                return None
+
+            if self.cache_size > 0:
+                with self._lock:
+                    self._cache[token] = cached
+
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        _, _, expires, claims = cached
+
+        if expires + self.leeway < self.timer():
+            return None
+
+        # note: claims are shared between requests so every request
+        #       gets its own copy
+        return copy.deepcopy(claims)
+
+    def _verify_signature(self, token):
+        """Verify token signature and decode its claims.
+
+        Returns:
+            tuple: (key_id, key, expires, claims) four-tuple or ``None`` if
+            token is malformed or has invalid signature.
+        """
+        try:
+            key_id, encoded_claims, encoded_signature = token.split('.')
+            key = self.keys[key_id]
+            signature = self._decode(encoded_signature)
+        except (ValueError, KeyError, binascii.Error):
+            return None
+
+        if not hmac.compare_digest(
+            signature, self._signature(key, key_id, encoded_claims)
+        ):
+            return None
+
+        try:
+            claims = json.loads(self._decode(encoded_claims).decode())
+            return key_id, key, float(claims['exp']), claims
+        except (
+            ValueError, KeyError, TypeError,
+            UnicodeDecodeError, binascii.Error,
+        ):
+            return None
+
+    def identify(self, req, resp, resource, uri_kwargs):
+        """Identify user using Authenticate header with Bearer token."""
+        header = req.get_header('Authorization', False)
+        auth = header.split(' ') if header else None
+
+        if auth is None or auth[0].lower() != 'bearer':
+            return None
+
+        if len(auth) != 2:
+            raise HTTPBadRequest(
+                "Invalid Authorization header",
+                "The Authorization header for signed token auth should be "
+                "in form:\nAuthorization: Bearer <token_value>"
+            )
+
+        return auth[1]
+
+    def try_storage(self, identifier, req, resp, resource, uri_kwargs):
+        """Get user claims from the signed token without any storage.
+
+        Args:
+            identifier (str): signed token value.
+
+        Returns:
+            dict: verified user claims or ``None``.
+        """
+        if identifier is None:
+            return None
+
+        return self.verify(identifier)
+
+
 class XForwardedFor(BaseAuthenticationMiddleware):
     """Authenticate user with ``X-Forwarded-For`` header or remote address.
 
@@ -655,3 +1420,127 @@ class Anonymous(BaseAuthenticationMiddleware):
         # note: this is just a sentinel value to trigger successful
         #       lookup in the dummy user storage
         return ...
+
+
+class CompositeAuthentication:
+    """Authenticate user with any of given authentication middlewares.
+
+    It behaves exactly like the same middlewares installed one after another
+    in the falcon application but does less work on every request:
+
+    * ``Authorization`` header is parsed only once and request is dispatched
+      directly to middlewares that handle its scheme. Middlewares that do
+      not use this header (e.g. :any:`XAPIKey`, :any:`XForwardedFor`) are
+      always tried in their original order.
+    * The list of ``WWW-Authenticate`` challenges is precomputed and
+      included in the request context only when needed.
+
+    Example usage:
+
+    .. code-block:: python
+
+        import falcon
+        from graceful import authentication
+
+        auth_middleware = authentication.CompositeAuthentication([
+            authentication.Basic(user_storage),
+            authentication.Token(user_storage),
+            authentication.XAPIKey(user_storage),
+        ])
+
+        api = application = falcon.API(middleware=[auth_middleware])
+
+    Note that composite middleware calls ``identify()`` and
+    ``try_storage()`` methods of given middlewares directly so any custom
+    ``process_resource()`` implementations are not used.
+
+    Args:
+        middlewares (list): list of authentication middleware instances.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, middlewares):
+        """Initialize composite middleware and precompute dispatch table."""
+        self.middlewares = list(middlewares)
+
+        # note: challenges that chained middlewares would have added to the
+        #       context before the middleware at given index succeeded
+        self._challenges = [[]]
+        for middleware in self.middlewares:
+            self._challenges.append(
+                self._challenges[-1] + [middleware.challenge]
+                if middleware.challenge is not None
+                else self._challenges[-1]
+            )
+
+        indexed = list(enumerate(self.middlewares))
+        self._generic = tuple(
+            (index, middleware) for index, middleware in indexed
+            if middleware.authorization_scheme is None
+        )
+        self._dispatch = {
+            scheme: tuple(
+                (index, middleware) for index, middleware in indexed
+                if middleware.authorization_scheme in (None, scheme)
+            )
+            for scheme in set(
+                middleware.authorization_scheme
+                for middleware in self.middlewares
+            ) if scheme is not None
+        }
+
+    def _candidates(self, req):
+        """Get middlewares that may identify user of given request."""
+        header = req.get_header('Authorization', False)
+
+        if header:
+            return self._dispatch.get(
+                header.split(' ', 1)[0].lower(), self._generic
+            )
+
+        return self._generic
+
+    def _update_context(self, req, index, user):
+        """Store identified user and challenges in the request context."""
+        challenges = self._challenges[index]
+
+        if challenges:
+            req.context.setdefault('challenges', list()).extend(challenges)
+
+        # note: middlewares skipped due to different authorization scheme
+        #       would not identify the user anyway
+        if index:
+            req.context.setdefault('authentication_misses', list()).extend(
+                self.middlewares[:index]
+            )
+
+        if user is not None:
+            req.context['user'] = user
+            req.context['identified_with'] = self.middlewares[index]
+
+    def process_resource(self, req, resp, resource, uri_kwargs=None):
+        """Process resource after routing to it.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+            resource (object): resource object matched by falcon router
+            uri_kwargs (dict): additional keyword argument from uri template.
+        """
+        if 'user' in req.context:
+            return
+
+        with phase('authentication'):
+            for index, middleware in self._candidates(req):
+                identifier = middleware.identify(
+                    req, resp, resource, uri_kwargs
+                )
+                user = middleware.try_storage(
+                    identifier, req, resp, resource, uri_kwargs
+                )
+
+                if user is not None:
+                    return self._update_context(req, index, user)
+
+            self._update_context(req, len(self.middlewares), None)
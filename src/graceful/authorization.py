@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
-from falcon import hooks, HTTPUnauthorized
+from falcon import hooks, HTTPUnauthorized, HTTPForbidden
 import falcon.version
 
+from graceful.authentication import user_identity
+
 # todo: consider moving to `compat` module if we have to use more compat code
 FALCON_VERSION = tuple(map(int, falcon.version.__version__.split('.')))
 
@@ -33,6 +38,11 @@ def authentication_required(req, resp, resource, uri_kwargs):
 
     .. versionadded:: 0.4.0
     """
+    _require_user(req)
+
+
+def _require_user(req):
+    """Raise ``401 Unauthorized`` if there is no user in request context."""
     if 'user' not in req.context:
         args = ["Unauthorized", "This resource requires authentication"]
 
@@ -41,3 +51,191 @@ def authentication_required(req, resp, resource, uri_kwargs):
             args.append(req.context.get('challenges', []))
 
         raise HTTPUnauthorized(*args)
+
+
+class PermissionPolicy:
+    """Declarative authorization policy with cached decisions.
+
+    Resources protected with the policy declare permissions required
+    for every HTTP method with the ``required_permissions`` class
+    attribute. The ``'*'`` key defines permissions required for methods
+    that are not listed explicitly. Methods without any required
+    permissions are available to any authenticated user:
+
+    .. code-block:: python
+
+        from graceful.authorization import PermissionPolicy
+
+        def get_permissions(user):
+            # note: this usually requires a database query
+            return db.query_permissions(user['id'])
+
+        policy = PermissionPolicy(get_permissions, ttl=60)
+
+        @policy.protect
+        class CatListResource(ListCreateAPI):
+            required_permissions = {
+                'GET': 'cats:read',
+                'POST': ('cats:read', 'cats:write'),
+            }
+
+    Required permissions are compiled into a decision table once for every
+    protected resource class. Decisions are cached per user identity (see
+    :any:`authentication.user_identity`), resource class and method for
+    ``ttl`` seconds so ``get_permissions()`` is called only when there is
+    no cached decision. Use ``invalidate()`` when user permissions change.
+
+    Requests without authenticated user are rejected with
+    ``401 Unauthorized`` response and requests of users without required
+    permissions are rejected with ``403 Forbidden`` response.
+
+    Args:
+        get_permissions (callable): function that accepts user object and
+            returns collection of permissions granted to the user.
+        ttl (float): time (in seconds) for which decisions are cached.
+        max_size (int): maximum number of cached decisions. Least recently
+            used decisions are evicted first.
+        timer (callable): function returning current time in seconds.
+            Defaults to ``time.monotonic``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, get_permissions, ttl=60, max_size=10000, timer=time.monotonic
+    ):
+        """Initialize permission policy."""
+        self.get_permissions = get_permissions
+        self.ttl = ttl
+        self.max_size = max_size
+        self.timer = timer
+
+        self._tables = {}
+        self._decisions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, resource_class):
+        """Compile decision table of given resource class.
+
+        Args:
+            resource_class (type): resource class with the
+                ``required_permissions`` attribute.
+
+        Returns:
+            dict: mapping of HTTP methods to frozensets of required
+            permissions.
+        """
+        table = {}
+
+        for method, permissions in getattr(
+            resource_class, 'required_permissions', {}
+        ).items():
+            if isinstance(permissions, str):
+                permissions = (permissions,)
+
+            table[method.upper()] = frozenset(permissions)
+
+        self._tables[resource_class] = table
+        return table
+
+    def protect(self, resource_class):
+        """Protect resource class with this policy.
+
+        This is a class decorator that compiles the decision table of
+        the resource class and adds authorization hook to its responders.
+        """
+        self.compile(resource_class)
+        return _before(self.check)(resource_class)
+
+    def required(self, resource_class, method):
+        """Get permissions required to call given method of resource class.
+
+        Args:
+            resource_class (type): protected resource class.
+            method (str): HTTP method.
+
+        Returns:
+            frozenset: required permissions.
+        """
+        try:
+            table = self._tables[resource_class]
+        except KeyError:
+            table = self.compile(resource_class)
+
+        try:
+            return table[method]
+        except KeyError:
+            return table.get('*', frozenset())
+
+    def authorize(self, user, resource_class, method):
+        """Decide if user is allowed to call method of given resource class.
+
+        Args:
+            user: authenticated user object.
+            resource_class (type): protected resource class.
+            method (str): HTTP method.
+
+        Returns:
+            bool: ``True`` if user has all required permissions.
+        """
+        required = self.required(resource_class, method)
+
+        if not required:
+            return True
+
+        key = (user_identity(user), resource_class, method)
+
+        with self._lock:
+            cached = self._decisions.get(key)
+
+            if cached is not None and cached[0] > self.timer():
+                self._decisions.move_to_end(key)
+                return cached[1]
+
+        allowed = required.issubset(self.get_permissions(user))
+
+        with self._lock:
+            self._decisions[key] = (self.timer() + self.ttl, allowed)
+            self._decisions.move_to_end(key)
+
+            while len(self._decisions) > self.max_size:
+                self._decisions.popitem(last=False)
+
+        return allowed
+
+    def invalidate(self, user=None):
+        """Remove cached decisions.
+
+        Args:
+            user: user object whose decisions should be removed. If not set
+                then all cached decisions are removed.
+        """
+        with self._lock:
+            if user is None:
+                self._decisions.clear()
+                return
+
+            identity = user_identity(user)
+            for key in [
+                key for key in self._decisions if key[0] == identity
+            ]:
+                del self._decisions[key]
+
+    def check(self, req, resp, resource, uri_kwargs):
+        """Ensure that user is allowed to call the requested method.
+
+        This is a falcon hook added to responders of protected resources.
+
+        Args:
+            req (falcon.Request): the request object.
+            resp (falcon.Response): the response object.
+            resource (object): the resource object.
+            uri_kwargs (dict): keyword arguments from the URI template.
+        """
+        _require_user(req)
+
+        if not self.authorize(req.context['user'], type(resource), req.method):
+            raise HTTPForbidden(
+                "Forbidden",
+                "You are not allowed to perform this action"
+            )
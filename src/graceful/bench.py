@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*-
+"""In-process load generator for WSGI applications.
+
+Replays weighted mix of requests described in a JSON spec file directly
+through the WSGI callable of the application, without any server or
+network involved, and reports throughput, latency percentiles and memory
+allocations of every route.
+
+Usage::
+
+    python -m graceful.bench demo.app:api spec.json --threads 4
+
+Spec file example:
+
+.. code-block:: json
+
+    {
+        "requests": [
+            {"name": "list", "path": "/v1/cats/", "weight": 10,
+             "query_string": "page_size=5"},
+            {"name": "retrieve", "path": "/v1/cats/1", "weight": 5},
+            {"name": "create", "method": "POST", "path": "/v1/cats/",
+             "body": {"name": "kitty", "breed": "sphynx"}}
+        ]
+    }
+
+.. versionadded:: 0.7.0
+"""
+import argparse
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+
+from falcon.testing import create_environ
+
+
+class RequestTemplate:
+    """Single kind of request replayed by the load generator.
+
+    Args:
+        path (str): request path.
+        method (str): HTTP method.
+        query_string (str): query string without leading ``?``.
+        headers (dict): request headers.
+        body: request body. Non-string values are encoded as JSON and
+            sent with ``application/json`` content type (unless specified
+            otherwise in headers).
+        weight (float): relative frequency of this request in the mix.
+        name (str): name used in reports. Defaults to method and path.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, path, method='GET', query_string='', headers=None, body=None,
+        weight=1, name=None,
+    ):
+        """Initialize request template and its WSGI environment."""
+        headers = dict(headers or {})
+
+        if body is None:
+            body = b''
+        elif isinstance(body, str):
+            body = body.encode()
+        elif not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+            headers.setdefault('Content-Type', 'application/json')
+
+        self.method = method.upper()
+        self.path = path
+        self.weight = weight
+        self.name = name or '{} {}'.format(self.method, path)
+        self.body = body
+        self._environ = create_environ(
+            path=path, query_string=query_string, method=self.method,
+            headers=headers, body=body,
+        )
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Create request templates from spec dictionary.
+
+        Args:
+            spec (dict): dictionary with list of keyword arguments of
+                request templates under ``requests`` key.
+
+        Returns:
+            list: list of request templates.
+        """
+        templates = [cls(**request) for request in spec['requests']]
+
+        if not templates:
+            raise ValueError("Spec does not contain any requests.")
+
+        return templates
+
+    def environ(self):
+        """Return new WSGI environment of this request."""
+        environ = self._environ.copy()
+        environ['wsgi.input'] = io.BytesIO(self.body)
+        return environ
+
+
+def load_app(path):
+    """Import WSGI application from ``module:attribute`` path.
+
+    Args:
+        path (str): application path (e.g. ``demo.app:api``). Attribute
+            defaults to ``application``.
+
+    Returns:
+        WSGI callable.
+
+    .. versionadded:: 0.7.0
+    """
+    module_name, _, attribute = path.partition(':')
+
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    return getattr(
+        importlib.import_module(module_name), attribute or 'application'
+    )
+
+
+def call(app, environ):
+    """Call WSGI application and consume its response.
+
+    Returns:
+        str: response status code.
+    """
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    result = app(environ, start_response)
+
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+    return statuses[0][:3]
+
+
+def percentile(values, percent):
+    """Return percentile of sorted values using nearest-rank method.
+
+    .. versionadded:: 0.7.0
+    """
+    if not values:
+        return None
+
+    rank = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class RouteStats:
+    """Statistics of requests made to a single route.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.latencies = []
+        self.statuses = Counter()
+        self.peak_bytes = []
+        self.retained_bytes = []
+
+    def merge(self, other):
+        """Add statistics of other worker to this one."""
+        self.latencies.extend(other.latencies)
+        self.statuses.update(other.statuses)
+        self.peak_bytes.extend(other.peak_bytes)
+        self.retained_bytes.extend(other.retained_bytes)
+
+    def summary(self, elapsed):
+        """Return summary dictionary of statistics.
+
+        Args:
+            elapsed (float): wall time (in seconds) of the whole run.
+        """
+        latencies = sorted(self.latencies)
+        summary = OrderedDict([
+            ('requests', len(latencies)),
+            ('throughput', len(latencies) / elapsed if elapsed else 0),
+            ('statuses', dict(self.statuses)),
+        ])
+
+        for percent in (50, 90, 99):
+            value = percentile(latencies, percent)
+            summary['p{}_ms'.format(percent)] = (
+                value * 1000 if value is not None else None
+            )
+
+        if self.peak_bytes:
+            summary['peak_bytes'] = (
+                sum(self.peak_bytes) / len(self.peak_bytes)
+            )
+            summary['retained_bytes'] = (
+                sum(self.retained_bytes) / len(self.retained_bytes)
+            )
+
+        return summary
+
+
+def _choices(templates, count, seed):
+    """Return weighted random sequence of request templates."""
+    generator = random.Random(seed)
+    cumulative = []
+    total = 0
+
+    for template in templates:
+        total += template.weight
+        cumulative.append(total)
+
+    return [
+        templates[bisect_right(cumulative, generator.random() * total)]
+        for _ in range(count)
+    ]
+
+
+def run_threads(app, templates, requests, threads=1, seed=0):
+    """Replay requests through WSGI application in multiple threads.
+
+    Args:
+        app: WSGI callable.
+        templates (list): list of request templates.
+        requests (int): total number of requests.
+        threads (int): number of threads.
+        seed (int): seed of random request mix.
+
+    Returns:
+        tuple: ``(stats, elapsed)`` two-tuple with dictionary of route
+        statistics keyed by route name and wall time of the run.
+
+    .. versionadded:: 0.7.0
+    """
+    counts = [
+        requests // threads + (1 if index < requests % threads else 0)
+        for index in range(threads)
+    ]
+    results = [None] * threads
+
+    def worker(index):
+        stats = {}
+        timer = time.perf_counter
+
+        for template in _choices(templates, counts[index], seed + index):
+            environ = template.environ()
+            started = timer()
+            status = call(app, environ)
+            latency = timer() - started
+
+            route = stats.get(template.name)
+            if route is None:
+                route = stats[template.name] = RouteStats()
+
+            route.latencies.append(latency)
+            route.statuses[status] += 1
+
+        results[index] = stats
+
+    workers = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(threads)
+    ]
+    started = time.perf_counter()
+
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    return _merge(results), time.perf_counter() - started
+
+
+def measure_allocations(app, templates, samples):
+    """Measure memory allocated by requests of every route.
+
+    Requests are made sequentially with ``tracemalloc`` enabled. For every
+    request the peak of memory allocated during the request and memory
+    still retained after the request are recorded.
+
+    Args:
+        app: WSGI callable.
+        templates (list): list of request templates.
+        samples (int): number of measured requests per route.
+
+    Returns:
+        dict: route statistics keyed by route name.
+
+    .. versionadded:: 0.7.0
+    """
+    stats = {}
+    started = tracemalloc.is_tracing()
+
+    if not started:
+        tracemalloc.start()
+
+    try:
+        for template in templates:
+            route = stats.setdefault(template.name, RouteStats())
+            # note: warm up caches so they are not attributed to requests
+            call(app, template.environ())
+
+            for _ in range(samples):
+                environ = template.environ()
+                # note: clearing traces also resets traced memory peak
+                tracemalloc.clear_traces()
+                call(app, environ)
+                retained, peak = tracemalloc.get_traced_memory()
+
+                route.peak_bytes.append(peak)
+                route.retained_bytes.append(retained)
+    finally:
+        if not started:
+            tracemalloc.stop()
+
+    return stats
+
+
+def _merge(results):
+    merged = {}
+
+    for stats in results:
+        for name, route in stats.items():
+            merged.setdefault(name, RouteStats()).merge(route)
+
+    return merged
+
+
+def _run_process(args):
+    app_path, spec, requests, threads, seed = args
+    stats, _ = run_threads(
+        load_app(app_path), RequestTemplate.from_spec(spec),
+        requests, threads, seed,
+    )
+    return stats
+
+
+def run(
+    app_path, spec, requests, threads=1, processes=1, allocations=0, seed=0,
+):
+    """Run load test of application and return its report.
+
+    Args:
+        app_path (str): application path (e.g. ``demo.app:api``).
+        spec (dict): request spec dictionary.
+        requests (int): total number of requests.
+        threads (int): number of threads (in every process).
+        processes (int): number of processes.
+        allocations (int): number of requests per route measured for
+            memory allocations after the load test. Set to ``0`` to skip
+            allocation measurement.
+        seed (int): seed of random request mix.
+
+    Returns:
+        dict: report with ``total`` and ``routes`` summaries.
+
+    .. versionadded:: 0.7.0
+    """
+    app = load_app(app_path)
+    templates = RequestTemplate.from_spec(spec)
+
+    if processes > 1:
+        arguments = [
+            (
+                app_path, spec,
+                requests // processes + (
+                    1 if index < requests % processes else 0
+                ),
+                threads, seed + index * threads,
+            )
+            for index in range(processes)
+        ]
+        pool = multiprocessing.Pool(processes)
+        try:
+            started = time.perf_counter()
+            stats = _merge(pool.map(_run_process, arguments))
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        stats, elapsed = run_threads(app, templates, requests, threads, seed)
+
+    if allocations:
+        for name, route in measure_allocations(
+            app, templates, allocations
+        ).items():
+            stats.setdefault(name, RouteStats()).merge(route)
+
+    total = RouteStats()
+    for route in stats.values():
+        total.latencies.extend(route.latencies)
+        total.statuses.update(route.statuses)
+
+    return OrderedDict([
+        ('total', total.summary(elapsed)),
+        ('routes', OrderedDict(
+            (template.name, stats[template.name].summary(elapsed))
+            for template in templates if template.name in stats
+        )),
+    ])
+
+
+def format_report(report):
+    """Format report as human readable table.
+
+    .. versionadded:: 0.7.0
+    """
+    header = '{:<30} {:>8} {:>10} {:>9} {:>9} {:>9} {:>11} {:>11}'
+    row = (
+        '{:<30} {:>8} {:>10.1f} {:>9.3f} {:>9.3f} {:>9.3f} {:>11} {:>11}'
+    )
+    lines = [header.format(
+        'route', 'requests', 'req/s', 'p50 [ms]', 'p90 [ms]', 'p99 [ms]',
+        'peak [B]', 'retained [B]',
+    )]
+
+    routes = list(report['routes'].items()) + [('TOTAL', report['total'])]
+
+    for name, summary in routes:
+        if not summary['requests']:
+            continue
+
+        lines.append(row.format(
+            name[:30], summary['requests'], summary['throughput'],
+            summary['p50_ms'], summary['p90_ms'], summary['p99_ms'],
+            int(summary['peak_bytes']) if 'peak_bytes' in summary else '-',
+            int(summary['retained_bytes'])
+            if 'retained_bytes' in summary else '-',
+        ))
+
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Run load generator command line interface.
+
+    .. versionadded:: 0.7.0
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m graceful.bench',
+        description='In-process load generator for WSGI applications.',
+    )
+    parser.add_argument('app', help='application path (e.g. demo.app:api)')
+    parser.add_argument('spec', help='path of JSON file with request spec')
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument(
+        '--allocations', type=int, default=20, metavar='SAMPLES',
+        help='requests per route measured with tracemalloc (0 disables)',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='save report to this JSON file')
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as file:
+        spec = json.load(file)
+
+    report = run(
+        args.app, spec, args.requests, args.threads, args.processes,
+        args.allocations, args.seed,
+    )
+    print(format_report(report))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':  # pragma: nocover
+    main()
@@ -0,0 +1,578 @@
+# -*- coding: utf-8 -*-
+"""Caching of serialized responses with stale-while-revalidate semantics."""
+import hashlib
+import logging
+import math
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # pragma: nocover
+    # compat: file locks are available only on POSIX systems
+    fcntl = None
+
+from graceful.coalescing import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+#: Name of the counter metric of cache events
+CACHE_METRIC = 'graceful_cache_events_total'
+
+
+class MemoryBackend:
+    """In-process cache backend with least recently used eviction.
+
+    Every backend stores entries under string keys. Entry is a four-tuple
+    ``(content_type, data, stored, delta)`` with content type (``str``),
+    serialized response body (``bytes``), time when entry was stored and
+    time (in seconds) it took to compute the entry.
+
+    Args:
+        max_entries (int): maximal number of entries.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, max_entries=1024):
+        """Initialize empty backend."""
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return entry stored under given key or ``None`` if missing."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def set(self, key, entry):
+        """Store entry under given key."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove entry stored under given key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedMemoryBackend:
+    """Cache backend shared by processes through memory mapped file.
+
+    All processes (e.g. pre-forked workers of the WSGI server) that use the
+    same ``path`` share single cache. The file holds fixed-size hash table
+    of ``slots`` slots of ``slot_size`` bytes. Entry is stored in one of
+    ``ways`` slots that follow the slot selected by the hash of its key.
+    If all of them are taken, the least recently read or written one is
+    evicted (approximate LRU). Entries whose key, content type and body do
+    not fit in single slot are not stored.
+
+    Reads do not take any lock. Every slot has a sequence number that is
+    odd while the slot is being written, so readers detect concurrent
+    writes and treat such slots as missing. Writers are serialized with an
+    exclusive file lock.
+
+    .. code-block:: python
+
+        from graceful.caching import ResponseCache, SharedMemoryBackend
+
+        class CatListResource(ListAPI, with_context=True):
+            serializer = CatSerializer()
+            response_cache = ResponseCache(
+                SharedMemoryBackend('/dev/shm/cats.cache', slots=4096),
+                soft_ttl=10, hard_ttl=300,
+            )
+
+    The file is created with given size if it does not exist. Use a path
+    on the memory-backed file system (e.g. ``/dev/shm``) to avoid disk
+    writes. The file is opened again in every process so the backend can
+    be created before the server forks its workers. This backend is
+    available only on POSIX systems.
+
+    Args:
+        path (str): path of the cache file.
+        slots (int): number of slots in the hash table.
+        slot_size (int): size (in bytes) of single slot.
+        ways (int): number of slots a single entry can be stored in.
+        timer (callable): function returning current time used as access
+            time of entries.
+
+    Raises:
+        ValueError: If existing file was created with different ``slots``
+            or ``slot_size``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    _header = struct.Struct('<8sQQ')
+    _slot = struct.Struct('<QQdddIII4x')
+    _sequence = struct.Struct('<Q')
+    _access = struct.Struct('<d')
+
+    _magic = b'graceful'
+    _read_attempts = 3
+
+    def __init__(
+        self, path, slots=1024, slot_size=64 * 1024, ways=8, timer=time.time,
+    ):
+        """Initialize backend and create its file if needed."""
+        if fcntl is None:  # pragma: nocover
+            raise RuntimeError("Shared memory cache requires POSIX system.")
+
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ways = min(ways, slots)
+        self.timer = timer
+
+        self._pid = None
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        """Open memory mapped file in the current process."""
+        if self._pid == os.getpid():
+            return self._map
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return self._map
+
+            # note: file locks are owned by open file description that
+            #       is inherited by forked processes, so every process
+            #       opens the file on its own
+            self._file = os.fdopen(
+                os.open(self.path, os.O_RDWR | os.O_CREAT), 'r+b'
+            )
+            size = self._header.size + self.slots * self.slot_size
+
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._file.fileno()).st_size == 0:
+                    self._file.truncate(size)
+                    self._file.write(self._header.pack(
+                        self._magic, self.slots, self.slot_size
+                    ))
+                    self._file.flush()
+
+                self._file.seek(0)
+                header = self._file.read(self._header.size)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+            if header != self._header.pack(
+                self._magic, self.slots, self.slot_size
+            ):
+                self._file.close()
+                raise ValueError(
+                    "Cache file {} has different layout.".format(self.path)
+                )
+
+            self._map = mmap.mmap(self._file.fileno(), size)
+            self._pid = os.getpid()
+            return self._map
+
+    def _hash(self, encoded):
+        # note: hash() of strings differs between processes
+        value = int.from_bytes(hashlib.sha1(encoded).digest()[:8], 'little')
+        return value or 1
+
+    def _offsets(self, key_hash):
+        first = key_hash % self.slots
+
+        for way in range(self.ways):
+            yield (
+                self._header.size +
+                (first + way) % self.slots * self.slot_size
+            )
+
+    def _read(self, data, offset, key_hash, encoded):
+        """Read entry stored in slot or return ``None`` if it is missing."""
+        for _ in range(self._read_attempts):
+            (
+                sequence, slot_hash, _, stored, delta,
+                key_length, type_length, data_length,
+            ) = self._slot.unpack_from(data, offset)
+
+            if sequence & 1:
+                continue
+
+            if slot_hash != key_hash:
+                return None
+
+            start = offset + self._slot.size
+            end = start + key_length + type_length + data_length
+            payload = data[start:end]
+
+            if self._sequence.unpack_from(data, offset)[0] != sequence:
+                continue
+
+            if payload[:key_length] != encoded:
+                return None
+
+            return (
+                payload[key_length:key_length + type_length].decode(),
+                payload[key_length + type_length:],
+                stored, delta,
+            )
+
+        return None
+
+    def get(self, key):
+        """Return entry stored under given key or ``None`` if missing."""
+        data = self._open()
+        encoded = key.encode()
+        key_hash = self._hash(encoded)
+
+        for offset in self._offsets(key_hash):
+            entry = self._read(data, offset, key_hash, encoded)
+
+            if entry is not None:
+                # note: racy update of access time is good enough for
+                #       approximate LRU eviction
+                self._access.pack_into(data, offset + 16, self.timer())
+                return entry
+
+        return None
+
+    def _write(self, data, offset, key_hash, payload, header):
+        sequence = self._sequence.unpack_from(data, offset)[0]
+        # note: odd sequence marks slot as being written
+        self._sequence.pack_into(data, offset, sequence + 1)
+
+        start = offset + self._slot.size
+        data[start:start + len(payload)] = payload
+        self._slot.pack_into(
+            data, offset, sequence + 1, key_hash, self.timer(), *header
+        )
+        self._sequence.pack_into(data, offset, sequence + 2)
+
+    def _locked(self):
+        return _FileLock(self._lock, self._file)
+
+    def _find(self, data, key_hash, encoded):
+        """Return offset of slot of given key or ``None`` if missing."""
+        length = len(encoded)
+
+        for offset in self._offsets(key_hash):
+            _, slot_hash, _, _, _, key_length, _, _ = self._slot.unpack_from(
+                data, offset
+            )
+            start = offset + self._slot.size
+
+            if (
+                slot_hash == key_hash and key_length == length and
+                data[start:start + length] == encoded
+            ):
+                return offset
+
+        return None
+
+    def set(self, key, entry):
+        """Store entry under given key."""
+        content_type, body, stored, delta = entry
+        encoded = key.encode()
+        encoded_type = content_type.encode()
+        payload = encoded + encoded_type + body
+
+        if len(payload) > self.slot_size - self._slot.size:
+            self.delete(key)
+            return
+
+        data = self._open()
+        key_hash = self._hash(encoded)
+
+        with self._locked():
+            offset = self._find(data, key_hash, encoded)
+
+            if offset is None:
+                # note: empty slots have zero access time
+                offset = min(
+                    self._offsets(key_hash),
+                    key=lambda offset: self._access.unpack_from(
+                        data, offset + 16
+                    )[0],
+                )
+
+            self._write(data, offset, key_hash, payload, (
+                stored, delta, len(encoded), len(encoded_type), len(body),
+            ))
+
+    def delete(self, key):
+        """Remove entry stored under given key."""
+        data = self._open()
+        encoded = key.encode()
+        key_hash = self._hash(encoded)
+
+        with self._locked():
+            offset = self._find(data, key_hash, encoded)
+
+            if offset is not None:
+                self._write(data, offset, 0, b'', (0, 0, 0, 0, 0))
+                self._access.pack_into(data, offset + 16, 0)
+
+    def clear(self):
+        """Remove all entries."""
+        data = self._open()
+
+        with self._locked():
+            for index in range(self.slots):
+                offset = self._header.size + index * self.slot_size
+
+                if self._slot.unpack_from(data, offset)[1]:
+                    self._write(data, offset, 0, b'', (0, 0, 0, 0, 0))
+                    self._access.pack_into(data, offset + 16, 0)
+
+    def __len__(self):
+        """Return number of stored entries."""
+        data = self._open()
+
+        return sum(
+            1 for index in range(self.slots)
+            if self._slot.unpack_from(
+                data, self._header.size + index * self.slot_size
+            )[1]
+        )
+
+    def close(self):
+        """Close the cache file in the current process."""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._map.close()
+                self._file.close()
+                self._pid = None
+
+
+class _FileLock:
+    """Exclusive lock of threads and processes that write to a file."""
+
+    __slots__ = ('lock', 'file')
+
+    def __init__(self, lock, file):
+        self.lock = lock
+        self.file = file
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        finally:
+            self.lock.release()
+
+
+class ResponseCache:
+    """Cache of serialized responses with soft and hard expiration.
+
+    Fresh entries (younger than ``soft_ttl``) are served as cache hits.
+    Stale entries (older than ``soft_ttl`` but younger than ``hard_ttl``)
+    are still served immediately but single background refresh of the
+    entry is started. Missing and expired entries are computed while the
+    request waits and concurrent requests for the same key share single
+    computation.
+
+    To prevent synchronized refreshes of entries computed at the same time,
+    every entry may be refreshed earlier than after ``soft_ttl`` with
+    probability that grows as the entry gets closer to its expiration and
+    with the time it took to compute it (probabilistic early expiration).
+
+    .. code-block:: python
+
+        from graceful.caching import ResponseCache
+
+        class CatListResource(ListAPI, with_context=True):
+            serializer = CatSerializer()
+            response_cache = ResponseCache(soft_ttl=10, hard_ttl=300)
+
+    Args:
+        backend: cache backend (e.g. :class:`MemoryBackend`). Defaults to
+            new :class:`MemoryBackend` instance.
+        soft_ttl (float): time (in seconds) after which entries are
+            refreshed in background.
+        hard_ttl (float): time (in seconds) after which entries are never
+            served.
+        beta (float): scale of probabilistic early expiration. Use values
+            greater than ``1`` to refresh earlier and ``0`` to disable early
+            expiration.
+        executor (concurrent.futures.Executor): executor of background
+            refreshes. Defaults to thread pool with single thread.
+        name (str): name of cache used in metrics.
+        registry (graceful.metrics.MetricsRegistry): optional registry of
+            the ``graceful_cache_events_total`` counter metric.
+        timer (callable): function returning current time in seconds.
+        random (callable): function returning random float in ``[0, 1)``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    #: Names of counted cache events.
+    events = ('hit', 'stale', 'miss', 'refresh', 'refresh_error')
+
+    def __init__(
+        self, backend=None, soft_ttl=60, hard_ttl=300, beta=1.0,
+        executor=None, name='default', registry=None, timer=time.time,
+        random=random.random,
+    ):
+        """Initialize response cache."""
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.beta = beta
+        self.executor = executor or ThreadPoolExecutor(1)
+        self.name = name
+        self.timer = timer
+        self.random = random
+
+        self.counter = None if registry is None else _cache_counter(registry)
+        self._counts = dict.fromkeys(self.events, 0)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._singleflight = SingleFlight()
+
+    def stats(self):
+        """Return number of cache events.
+
+        Returns:
+            dict: number of ``hit``, ``stale`` (stale hits), ``miss``,
+            ``refresh`` (background refreshes) and ``refresh_error``
+            (failed background refreshes) events.
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def _count(self, event):
+        with self._lock:
+            self._counts[event] += 1
+
+        if self.counter is not None:
+            self.counter.inc((self.name, event))
+
+    def _expires_early(self, stored, delta, now):
+        if not self.beta:
+            return False
+
+        # note: 1 - random() is in (0, 1] so logarithm is always defined
+        return (
+            now - delta * self.beta * math.log(1 - self.random()) >=
+            stored + self.soft_ttl
+        )
+
+    def get(self, key, compute):
+        """Return cached response or compute it.
+
+        Args:
+            key (str): cache key.
+            compute (callable): function without arguments that returns
+                ``(content_type, data)`` two-tuple of serialized response.
+
+        Returns:
+            tuple: ``(content_type, data, event)`` three-tuple with
+            response and cache event (``hit``, ``stale`` or ``miss``).
+        """
+        entry = self.backend.get(key)
+        now = self.timer()
+
+        if entry is not None:
+            content_type, data, stored, delta = entry
+
+            if now < stored + self.hard_ttl:
+                if (
+                    now < stored + self.soft_ttl and
+                    not self._expires_early(stored, delta, now)
+                ):
+                    self._count('hit')
+                    return content_type, data, 'hit'
+
+                self._count('stale')
+                self.refresh(key, compute)
+                return content_type, data, 'stale'
+
+        self._count('miss')
+        (content_type, data), _ = self._singleflight.do(
+            key, self._compute, key, compute
+        )
+        return content_type, data, 'miss'
+
+    def refresh(self, key, compute):
+        """Start background refresh of entry unless it is already running.
+
+        Args:
+            key (str): cache key.
+            compute (callable): function without arguments that returns
+                ``(content_type, data)`` two-tuple of serialized response.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return
+
+            self._refreshing.add(key)
+
+        try:
+            self.executor.submit(self._refresh, key, compute)
+        except Exception:
+            with self._lock:
+                self._refreshing.discard(key)
+            raise
+
+    def _refresh(self, key, compute):
+        try:
+            self._compute(key, compute)
+            self._count('refresh')
+
+        except Exception:
+            self._count('refresh_error')
+            logger.exception("Refresh of cache entry %s failed", key)
+
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _compute(self, key, compute):
+        started = self.timer()
+        content_type, data = compute()
+        now = self.timer()
+
+        self.backend.set(key, (content_type, data, now, now - started))
+        return content_type, data
+
+    def invalidate(self, key):
+        """Remove entry stored under given key."""
+        self.backend.delete(key)
+
+
+def _cache_counter(registry):
+    """Return cache counter metric of registry (register it if needed)."""
+    for metric in registry.metrics:
+        if metric.name == CACHE_METRIC:
+            return metric
+
+    return registry.counter(
+        CACHE_METRIC, 'Number of response cache events',
+        labels=['cache', 'event'],
+    )
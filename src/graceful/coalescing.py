@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Coalescing of concurrent calls into shared executions."""
+import copy
+import threading
+import time
+
+
+class _Batch:
+    """Items gathered for single batch call and their results."""
+
+    __slots__ = ('items', 'full', 'done', 'results', 'error')
+
+    def __init__(self):
+        self.items = []
+        self.full = False
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class Batcher:
+    """Gather concurrent calls into batches processed with single call.
+
+    The first caller that finds no open batch becomes the leader of new
+    batch. It waits up to ``window`` seconds (or until the batch has
+    ``max_size`` items) for other concurrent callers, then calls ``func``
+    with the list of all gathered items in its own thread and hands every
+    caller its own result. No background threads are used.
+
+    .. code-block:: python
+
+        from graceful.coalescing import Batcher
+
+        batcher = Batcher(db.insert_many, window=0.005, max_size=100)
+
+        # in many concurrent threads
+        cat_id = batcher.call({'name': 'kitty'})
+
+    Args:
+        func (callable): function that accepts list of items and returns
+            list of results in the same order. If any result is an
+            exception instance then it is raised in the caller of the
+            corresponding item. Exceptions raised by ``func`` are raised in
+            all callers of the batch. Callers other than the leader get
+            copies of the exception chained to the original so every
+            caller has its own traceback.
+        window (float): maximal time (in seconds) the leader waits for
+            other items.
+        max_size (int): maximal number of items in single batch.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, func, window=0.005, max_size=100):
+        """Initialize batcher."""
+        self.func = func
+        self.window = window
+        self.max_size = max_size
+
+        self._batch = None
+        self._condition = threading.Condition()
+
+    def call(self, item):
+        """Add item to the current batch and wait for its result.
+
+        Args:
+            item: single item passed to ``func`` in the list of items.
+
+        Returns:
+            result of the item.
+        """
+        with self._condition:
+            batch = self._batch
+            leader = batch is None
+
+            if leader:
+                batch = self._batch = _Batch()
+
+            index = len(batch.items)
+            batch.items.append(item)
+
+            if len(batch.items) >= self.max_size:
+                batch.full = True
+                self._batch = None
+                self._condition.notify_all()
+
+            if leader:
+                deadline = time.monotonic() + self.window
+
+                while not batch.full:
+                    remaining = deadline - time.monotonic()
+
+                    if remaining <= 0:
+                        break
+
+                    self._condition.wait(remaining)
+
+                if self._batch is batch:
+                    self._batch = None
+
+        if leader:
+            self._process(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            if leader:
+                raise batch.error
+
+            raise _copy_error(batch.error) from batch.error
+
+        result = batch.results[index]
+
+        if isinstance(result, BaseException):
+            raise result
+
+        return result
+
+    def _process(self, batch):
+        try:
+            results = list(self.func(batch.items))
+
+            if len(results) != len(batch.items):
+                raise ValueError(
+                    "Batch function returned {} results for {} items".format(
+                        len(results), len(batch.items)
+                    )
+                )
+
+            batch.results = results
+
+        except Exception as err:
+            batch.error = err
+
+        finally:
+            if batch.results is None and batch.error is None:
+                # note: waiting callers must be released even if batch was
+                #       interrupted in unexpected way
+                batch.error = RuntimeError("Batch call interrupted")
+
+            batch.done.set()
+
+
+class _Call:
+    """Single execution shared by concurrent callers."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Share single execution of function between concurrent callers.
+
+    Callers that call :meth:`do` with the same key while the function is
+    already being executed for that key do not call it again. They wait
+    for the result of the running execution instead. Results are not
+    cached: the next call after the execution finished calls the function
+    again.
+
+    .. code-block:: python
+
+        from graceful.coalescing import SingleFlight
+
+        group = SingleFlight()
+
+        # in many concurrent threads
+        cats, shared = group.do(('cats', breed), db.fetch_cats, breed)
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self):
+        """Initialize empty group of executions."""
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """Call function unless it is already executed for the same key.
+
+        Args:
+            key: hashable key of the execution.
+            func (callable): function to call.
+            *args: positional arguments of the call.
+            **kwargs: keyword arguments of the call.
+
+        Returns:
+            tuple: ``(result, shared)`` two-tuple with value returned by
+            the function and flag that is ``True`` if the value comes from
+            execution started by other caller. Exceptions raised by the
+            function are raised in all callers of the execution. Other
+            callers get copies of the exception chained to the original
+            so every caller has its own traceback.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise _copy_error(call.error) from call.error
+
+            return call.result, True
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+        return call.result, False
+
+    def __len__(self):
+        """Return number of running executions."""
+        return len(self._calls)
+
+
+def _copy_error(error):
+    """Return copy of exception that can be raised in other thread."""
+    try:
+        return copy.copy(error)
+    except Exception:
+        # note: exceptions with custom constructors may be impossible to
+        #       copy so the shared instance is the only option
+        return error
+
+
+def freeze(value):
+    """Convert value to hashable equivalent usable as part of a key.
+
+    Dictionaries are converted to frozen sets of their items, sets to frozen
+    sets and lists to tuples (recursively).
+
+    .. versionadded:: 0.7.0
+    """
+    if isinstance(value, dict):
+        return frozenset(
+            (key, freeze(item)) for key, item in value.items()
+        )
+
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+
+    return value
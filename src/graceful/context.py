@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Variables holding state of the request being processed."""
+import threading
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # pragma: nocover
+    # compat: contextvars are available since Python 3.7. Thread-local
+    #         storage is good enough for thread-based WSGI servers.
+    ContextVar = None
+
+
+class ThreadLocalVar(threading.local):
+    """Minimal thread-local substitute of ``contextvars.ContextVar``.
+
+    Args:
+        name (str): name of the variable.
+        default: value returned by :meth:`get` until the variable is set
+            in the current thread.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, name, default=None):
+        """Initialize variable of the current thread."""
+        self.name = name
+        self.value = default
+
+    def get(self, default=None):
+        """Return value of the variable in the current thread."""
+        return self.value if self.value is not None else default
+
+    def set(self, value):
+        """Set value of the variable in the current thread."""
+        self.value = value
+
+
+def context_var(name, default=None):
+    """Create variable holding separate value for every request.
+
+    Values are stored in context variables so concurrent requests of
+    asyncio applications are kept apart. On Python versions older than 3.7
+    thread-local storage is used instead.
+
+    Args:
+        name (str): name of the variable.
+        default: value returned by ``get()`` until the variable is set.
+
+    Returns:
+        ``contextvars.ContextVar`` or :class:`ThreadLocalVar` instance.
+
+    .. versionadded:: 0.7.0
+    """
+    if ContextVar is None:  # pragma: nocover
+        return ThreadLocalVar(name, default)
+
+    return ContextVar(name, default=default)
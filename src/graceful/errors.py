@@ -1,4 +1,4 @@
-from falcon import HTTPBadRequest, HTTPInvalidParam
+from falcon import HTTPBadRequest, HTTPInvalidParam, HTTPServiceUnavailable
 
 
 class DeserializationError(ValueError):
@@ -75,3 +75,28 @@ class ValidationError(ValueError):
         return HTTPInvalidParam(
             str(self), param_name
         )
+
+
+class JobQueueFull(Exception):
+    """Raised when job queue cannot accept more jobs.
+
+    Args:
+        retry_after (int): number of seconds after which client may retry.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, retry_after):
+        """Initialize exception instance."""
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+    def as_service_unavailable(self):
+        """Translate this error to falcon's HTTP specific error exception."""
+        return HTTPServiceUnavailable(
+            'Service Unavailable',
+            'Job queue is full, retry in {} seconds'.format(
+                self.retry_after
+            ),
+            retry_after=self.retry_after,
+        )
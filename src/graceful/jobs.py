@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Background jobs for write-behind resource manipulation.
+
+Resources that mix in :class:`graceful.resources.mixins.UpdateMixin` or
+:class:`graceful.resources.mixins.DeleteMixin` can perform their updates
+and deletions in a bounded :class:`JobQueue` instead of the request worker.
+Such requests are answered with ``202 Accepted`` immediately after the job
+is enqueued and the job status can be polled with :class:`JobResource`.
+"""
+import logging
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import falcon
+
+from graceful.errors import JobQueueFull
+from graceful.resources.generic import Resource
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """Single job enqueued in the job queue.
+
+    Args:
+        job_id (str): unique job identifier.
+        future (concurrent.futures.Future): future of the job call.
+
+    .. versionadded:: 0.7.0
+    """
+
+    __slots__ = ('id', 'future')
+
+    def __init__(self, job_id, future):
+        """Initialize job."""
+        self.id = job_id
+        self.future = future
+
+    @property
+    def status(self):
+        """Return job status.
+
+        Returns:
+            str: ``pending``, ``running``, ``succeeded`` or ``failed``.
+        """
+        if not self.future.done():
+            return 'running' if self.future.running() else 'pending'
+
+        if self.future.cancelled() or self.future.exception() is not None:
+            return 'failed'
+
+        return 'succeeded'
+
+    def as_dict(self):
+        """Return job representation.
+
+        Representation contains job ``id`` and ``status``. Succeeded jobs
+        include value returned by the job call under ``result`` key and
+        failed jobs include error description under ``error`` key.
+        """
+        status = self.status
+        representation = OrderedDict([('id', self.id), ('status', status)])
+
+        if status == 'succeeded':
+            representation['result'] = self.future.result()
+
+        elif status == 'failed':
+            error = (
+                self.future.exception() if not self.future.cancelled()
+                else None
+            )
+
+            if isinstance(error, falcon.HTTPError):
+                representation['error'] = {
+                    'title': error.title,
+                    'description': error.description,
+                }
+            else:
+                representation['error'] = {
+                    'title': error.__class__.__name__ if error else
+                    'Cancelled',
+                    'description': str(error) if error else None,
+                }
+
+        return representation
+
+
+class JobQueue:
+    """Bounded queue of jobs executed by a pool of workers.
+
+    .. code-block:: python
+
+        from graceful.jobs import JobQueue, JobResource
+
+        jobs = JobQueue(max_workers=4, max_pending=100)
+
+        class CatResource(RetrieveUpdateDeleteAPI, with_context=True):
+            serializer = CatSerializer()
+            job_queue = jobs
+            job_location = '/v1/jobs/{job_id}'
+
+        api.add_route('/v1/cats/{cat_id}', CatResource())
+        api.add_route('/v1/jobs/{job_id}', JobResource(jobs))
+
+    Jobs are executed with a thread pool by default. Other thread-based
+    ``concurrent.futures`` executors can be used instead. Process pools are
+    not supported because jobs of resources carry the resource instance and
+    request context (e.g. authentication middleware with its locks) that
+    cannot be passed to other processes.
+
+    Jobs that cannot be submitted to the executor are recorded as failed
+    jobs. Errors of failed jobs are logged.
+
+    Statuses of finished jobs are kept in memory so they can be polled by
+    clients. Only ``max_finished`` most recently finished jobs are kept.
+
+    Args:
+        max_workers (int): number of workers of the default thread pool.
+        max_pending (int): maximal number of jobs that are enqueued or
+            running at the same time.
+        executor (concurrent.futures.Executor): optional thread-based
+            executor used instead of the default thread pool.
+        max_finished (int): number of finished jobs kept in memory.
+        retry_after (int): number of seconds clients are asked to wait
+            before retry if the queue is full.
+
+    Raises:
+        ValueError: If ``executor`` is a process pool.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, max_workers=4, max_pending=100, executor=None,
+        max_finished=1000, retry_after=1,
+    ):
+        """Initialize job queue."""
+        if isinstance(executor, ProcessPoolExecutor):
+            raise ValueError(
+                "Job queue requires thread-based executor. Jobs carry "
+                "objects that cannot be passed to other processes."
+            )
+
+        self.executor = executor or ThreadPoolExecutor(max_workers)
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.retry_after = retry_after
+
+        self._jobs = {}
+        self._finished = deque()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """Return number of jobs that are enqueued or running."""
+        return self._pending
+
+    def submit(self, func, *args, **kwargs):
+        """Enqueue call of given function.
+
+        Args:
+            func (callable): function to call.
+            *args: positional arguments of the call.
+            **kwargs: keyword arguments of the call.
+
+        Returns:
+            Job: enqueued job. If the call cannot be submitted to the
+            executor then the job is already failed.
+
+        Raises:
+            graceful.errors.JobQueueFull: If there are already
+                ``max_pending`` jobs in the queue.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(self.retry_after)
+
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except Exception as err:
+            future = Future()
+            future.set_exception(err)
+
+        job = Job(job_id, future)
+
+        with self._lock:
+            self._jobs[job_id] = job
+
+        future.add_done_callback(lambda future: self._finish(job_id, future))
+        return job
+
+    def _finish(self, job_id, future):
+        error = None if future.cancelled() else future.exception()
+
+        if isinstance(error, falcon.HTTPError):
+            logger.info("Job %s failed: %s", job_id, error.title)
+        elif error is not None:
+            logger.error(
+                "Job %s failed", job_id,
+                exc_info=(type(error), error, error.__traceback__),
+            )
+
+        with self._lock:
+            self._pending -= 1
+            self._finished.append(job_id)
+
+            while len(self._finished) > self.max_finished:
+                self._jobs.pop(self._finished.popleft(), None)
+
+    def get(self, job_id):
+        """Return job with given identifier.
+
+        Returns:
+            Job: job instance or ``None`` if job does not exist or its
+            status is no longer kept.
+        """
+        return self._jobs.get(job_id)
+
+    def shutdown(self, wait=True):
+        """Shut down the executor of this queue.
+
+        Args:
+            wait (bool): wait until all enqueued jobs are finished.
+        """
+        self.executor.shutdown(wait)
+
+
+class JobResource(Resource, with_context=True):
+    """Status of single job identified by the ``job_id`` URI parameter.
+
+    Args:
+        queue (JobQueue): job queue of the job.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, queue):
+        """Initialize job status resource."""
+        self.queue = queue
+
+    def retrieve(self, params, meta, context, job_id, **kwargs):
+        """Return representation of the job."""
+        job = self.queue.get(job_id)
+
+        if job is None:
+            raise falcon.HTTPNotFound()
+
+        return job.as_dict()
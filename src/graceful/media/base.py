@@ -2,6 +2,19 @@ from abc import ABCMeta, abstractmethod
 
 import falcon
 
+from graceful.errors import ValidationError
+from graceful.media.encoding import (
+    DecompressingStream,
+    LimitedStream,
+    HTTPRequestEntityTooLarge,
+)
+
+
+def _min_limit(*limits):
+    """Return the most restrictive of limits where ``None`` means no limit."""
+    limits = [limit for limit in limits if limit is not None]
+    return min(limits) if limits else None
+
 
 class BaseMediaHandler(metaclass=ABCMeta):
     """An abstract base class for an internet media type handler.
@@ -16,6 +29,21 @@ class BaseMediaHandler(metaclass=ABCMeta):
 
     """
 
+    #: Maximum length (in bytes) of decompressed request body for requests
+    #: with ``Content-Encoding`` header. Set to ``None`` to disable the limit.
+    max_decompressed_length = 10 * 1024 * 1024
+
+    #: Maximum ratio of decompressed to compressed request body length.
+    #: If the compressed body length is limited (see ``decode_stream()``)
+    #: then decompressed body cannot exceed this multiple of that limit
+    #: (nor ``max_decompressed_length``). Set to ``None`` to use only the
+    #: ``max_decompressed_length`` limit.
+    max_decompression_ratio = 100
+
+    #: Maximum length (in bytes) of request body accepted by this media
+    #: handler. Set to ``None`` to disable the limit.
+    max_content_length = None
+
     def __init__(self, extra_media_types=None):
         """The __init__ method documented in the class level."""
         extra_media_types = extra_media_types or []
@@ -40,6 +68,39 @@ class BaseMediaHandler(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def deserialize_many(self, stream, content_type, content_length, **kwargs):
+        """Deserialize the body stream that represents a list of objects.
+
+        This default implementation deserializes the whole body at once.
+        Media handlers that are able to parse their format incrementally
+        should override it in order to yield items without holding the whole
+        body in memory.
+
+        Args:
+            stream (io.BytesIO): Input data to deserialize
+            content_type (str): Type of request content
+            content_length (int): Length of request content
+
+        Returns:
+            iterable: An iterable of deserialized objects.
+
+        Raises:
+            falcon.HTTPBadRequest: An error occurred on attempt to
+                deserialization an invalid stream or deserialized object is
+                not a list.
+
+        .. versionadded:: 0.7.0
+        """
+        media = self.deserialize(
+            stream, content_type, content_length, **kwargs)
+
+        if not isinstance(media, list):
+            raise ValidationError(
+                "Request payload should represent a list of resources."
+            ).as_bad_request()
+
+        return media
+
     @abstractmethod
     def serialize(self, media, content_type, **kwargs):
         """Serialize the media object for a :class:`falcon.Response`.
@@ -75,12 +136,123 @@ class BaseMediaHandler(metaclass=ABCMeta):
             resp.body = data
         return data
 
-    def handle_request(self, req, *, content_type=None, **kwargs):
+    def decode_stream(self, req, max_content_length=None):
+        """Get request body stream with respect to its length and encoding.
+
+        Bodies with ``Content-Length`` exceeding the limit are rejected
+        before anything is read from the stream. Bodies of unknown length
+        (chunked transfer encoding) are passed unchanged with ``None``
+        content length if body length is not limited. Otherwise they are
+        allowed only if the WSGI server declares that it terminates the
+        input stream (``wsgi.input_terminated``) and their length is
+        enforced while the stream is read.
+
+        Compressed bodies are wrapped with :class:`DecompressingStream` that
+        decompresses them incrementally. Because length of decompressed
+        content is not known up front, the returned content length is the
+        upper bound of allowed body length. It is always safe to
+        ``read()`` that many bytes from the returned stream. Decompressed
+        length is limited by ``max_decompressed_length`` and (if body
+        length is limited) by ``max_decompression_ratio`` times the body
+        length limit.
+
+        Args:
+            req (falcon.Request): The request object to process
+            max_content_length (int): Additional limit of the request body
+                length (e.g. defined on resource level). The most restrictive
+                of this value and ``self.max_content_length`` is used.
+
+        Returns:
+            tuple (stream, content_length): two-tuple with file-like object
+                and number of bytes that can be read from it.
+
+        Raises:
+            falcon.HTTPUnsupportedMediaType: If content encoding is not
+                supported
+            falcon.HTTPRequestEntityTooLarge: If request body is too large
+            falcon.HTTPLengthRequired: If request body length is unknown
+                and cannot be safely limited
+
+        .. versionadded:: 0.7.0
+        """
+        limit = _min_limit(self.max_content_length, max_content_length)
+        stream, content_length = req.stream, req.content_length
+
+        if content_length is None:
+            if req.env.get('wsgi.input_terminated'):
+                stream = LimitedStream(stream, limit)
+                content_length = limit + 1 if limit is not None else -1
+
+            elif limit is not None:
+                # note: body of unknown length cannot be safely limited
+                #       unless server terminates input
+                raise falcon.HTTPLengthRequired(
+                    'Length required',
+                    'Request body of unknown length is not supported'
+                )
+
+        elif limit is not None and content_length > limit:
+            raise HTTPRequestEntityTooLarge(
+                'Request body is too large',
+                'Request body exceeds the limit of {} bytes'.format(limit)
+            )
+
+        encoding = req.get_header('Content-Encoding')
+
+        if not encoding or encoding.strip().lower() == 'identity':
+            return stream, content_length
+
+        decompressed_limit = self.max_decompressed_length
+
+        if limit is not None and self.max_decompression_ratio is not None:
+            decompressed_limit = _min_limit(
+                decompressed_limit, self.max_decompression_ratio * limit
+            )
+
+        stream = DecompressingStream(
+            stream, encoding,
+            content_length
+            if content_length is not None and content_length >= 0 else None,
+            decompressed_limit,
+        )
+        # note: reading one byte more than allowed ensures that handlers
+        #       will never silently receive truncated body
+        return stream, (
+            stream.max_length + 1 if stream.max_length is not None else -1
+        )
+
+    def max_content_lengths(self, max_content_length=None):
+        """Describe body length limits of all supported media types.
+
+        Args:
+            max_content_length (int): Additional limit of the request body
+                length (e.g. defined on resource level).
+
+        Returns:
+            dict: dictionary of limits for every allowed media type where
+                ``None`` means that there is no limit.
+
+        .. versionadded:: 0.7.0
+        """
+        limit = _min_limit(self.max_content_length, max_content_length)
+        return {
+            media_type: limit for media_type in self.allowed_media_types
+        }
+
+    def handle_request(
+        self, req, *, content_type=None, many=False, max_content_length=None,
+        **kwargs
+    ):
         """Process a single :class:`falcon.Request` object.
 
         Args:
             req (falcon.Request): The request object to process
             content_type (str): Type of request content
+            many (bool): set to True if request body represents a list of
+                objects that should be deserialized with
+                ``deserialize_many()``
+            max_content_length (int): Additional limit of the request body
+                length (e.g. defined on resource level)
 
         Returns:
             object: A deserialized object from a :class:`falcon.Request` body.
@@ -88,11 +260,17 @@ class BaseMediaHandler(metaclass=ABCMeta):
         Raises:
             falcon.HTTPUnsupportedMediaType: If `content_type` is not supported
 
+        .. versionchanged:: 0.7.0
+            Bodies with ``Content-Encoding`` header are decompressed, body
+            length limits are enforced and the ``many`` and
+            ``max_content_length`` keyword arguments were added.
         """
         content_type = content_type or req.content_type
         if content_type in self.allowed_media_types:
-            return self.deserialize(
-                req.stream, content_type, req.content_length, **kwargs)
+            stream, content_length = self.decode_stream(
+                req, max_content_length)
+            deserialize = self.deserialize_many if many else self.deserialize
+            return deserialize(stream, content_type, content_length, **kwargs)
         else:
             allowed = ', '.join("'{}'".format(media_type)
                                 for media_type in self.allowed_media_types)
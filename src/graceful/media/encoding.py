@@ -0,0 +1,215 @@
+import zlib
+
+import falcon
+
+# compat: falcon>=3.0 provides this error only as HTTPPayloadTooLarge
+HTTPRequestEntityTooLarge = getattr(
+    falcon, 'HTTPRequestEntityTooLarge', None
+) or falcon.HTTPPayloadTooLarge
+
+
+class DecompressingStream:
+    """File-like wrapper that incrementally decompresses a request stream.
+
+    Compressed data is read from the wrapped stream in small chunks and
+    decompressed with ``zlib.decompressobj`` so the whole decoded body never
+    has to be held in memory at once. Every decompression step is bounded so
+    highly compressed payloads (zip bombs) are rejected as soon as decoded
+    data exceeds ``max_length``.
+
+    Args:
+        stream: A file-like object with compressed request body
+            (usually ``req.stream``).
+        encoding (str): The value of request ``Content-Encoding`` header.
+            Must be one of the ``DecompressingStream.WBITS`` keys.
+        content_length (int): Length of compressed content. If not set then
+            the wrapped stream is read until it is exhausted.
+        max_length (int): Maximum allowed length of decompressed content.
+            Set to ``None`` to disable the limit.
+        chunk_size (int): Size of compressed data chunks read from
+            the wrapped stream.
+
+    Raises:
+        falcon.HTTPUnsupportedMediaType: If ``encoding`` is not supported.
+
+    .. versionadded:: 0.7.0
+    """
+
+    #: ``wbits`` arguments of ``zlib.decompressobj`` for supported encodings.
+    #: Note that ``32`` enables automatic zlib/gzip header detection so
+    #: ``deflate`` bodies sent with a gzip header are accepted too.
+    WBITS = {
+        'gzip': 32 + zlib.MAX_WBITS,
+        'x-gzip': 32 + zlib.MAX_WBITS,
+        'deflate': 32 + zlib.MAX_WBITS,
+    }
+
+    def __init__(
+        self, stream, encoding, content_length=None,
+        max_length=None, chunk_size=64 * 1024
+    ):
+        """Initialize decompressing stream and validate encoding."""
+        encoding = encoding.strip().lower()
+
+        if encoding not in self.WBITS:
+            allowed = ', '.join(
+                "'{}'".format(name) for name in sorted(self.WBITS)
+            )
+            raise falcon.HTTPUnsupportedMediaType(
+                description="'{}' is an unsupported content encoding, "
+                            "supported encodings: {}".format(encoding, allowed)
+            )
+
+        self.stream = stream
+        self.encoding = encoding
+        self.max_length = max_length
+        self.chunk_size = chunk_size
+
+        self._remaining = content_length
+        self._decompressor = zlib.decompressobj(self.WBITS[encoding])
+        self._decoded_length = 0
+        self._exhausted = False
+
+    def _read_compressed(self):
+        """Read next chunk of compressed data from the wrapped stream."""
+        if self._remaining is None:
+            data = self.stream.read(self.chunk_size)
+        elif self._remaining > 0:
+            data = self.stream.read(min(self.chunk_size, self._remaining))
+            self._remaining -= len(data)
+        else:
+            data = b''
+
+        if not data:
+            self._exhausted = True
+
+        return data
+
+    def _decompress(self, size):
+        """Decompress at most ``size`` bytes of data.
+
+        Returns:
+            bytes: decompressed data. Empty bytes means end of the stream.
+        """
+        while not self._decompressor.eof:
+            data = self._decompressor.unconsumed_tail
+
+            if not data and not self._exhausted:
+                data = self._read_compressed()
+
+            if not data:
+                raise falcon.HTTPBadRequest(
+                    title='Invalid request body',
+                    description='Compressed request body is truncated'
+                )
+
+            try:
+                decoded = self._decompressor.decompress(data, size)
+            except zlib.error as err:
+                raise falcon.HTTPBadRequest(
+                    title='Invalid request body',
+                    description='Could not decompress {} request body '
+                                '- {}'.format(self.encoding, err)
+                )
+
+            if decoded:
+                self._decoded_length += len(decoded)
+
+                if (
+                    self.max_length is not None and
+                    self._decoded_length > self.max_length
+                ):
+                    raise HTTPRequestEntityTooLarge(
+                        'Request body is too large',
+                        'Decompressed request body exceeds the limit '
+                        'of {} bytes'.format(self.max_length)
+                    )
+
+                return decoded
+
+        return b''
+
+    def read(self, size=-1):
+        """Read and decompress at most ``size`` bytes of request body.
+
+        Args:
+            size (int): Maximum number of decompressed bytes to return. If
+                negative or omitted the stream is read until it ends.
+
+        Returns:
+            bytes: decompressed data.
+        """
+        chunks = []
+
+        while size is None or size < 0 or size > 0:
+            chunk = self._decompress(
+                self.chunk_size if size is None or size < 0
+                else min(size, self.chunk_size)
+            )
+            if not chunk:
+                break
+
+            chunks.append(chunk)
+
+            if size is not None and size > 0:
+                size -= len(chunk)
+
+        return b''.join(chunks)
+
+
+class LimitedStream:
+    """File-like wrapper that limits number of bytes read from a stream.
+
+    It is used for request bodies of unknown length (e.g. chunked transfer
+    encoding) that cannot be rejected up front using the ``Content-Length``
+    header. The request is rejected as soon as more than ``max_length``
+    bytes was read.
+
+    Args:
+        stream: A file-like object with request body (usually ``req.stream``).
+        max_length (int): Maximum allowed length of the body. Set to ``None``
+            to disable the limit.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, stream, max_length=None):
+        """Initialize limited stream."""
+        self.stream = stream
+        self.max_length = max_length
+        self._read_length = 0
+
+    def read(self, size=-1):
+        """Read at most ``size`` bytes from the wrapped stream.
+
+        Args:
+            size (int): Maximum number of bytes to return. If negative or
+                omitted the stream is read until it ends.
+
+        Returns:
+            bytes: data read from the wrapped stream.
+
+        Raises:
+            falcon.HTTPRequestEntityTooLarge: If body exceeds the limit.
+        """
+        if self.max_length is not None:
+            # note: never read more than one byte over the limit so the
+            #       oversized body is never held in memory
+            allowed = self.max_length - self._read_length + 1
+            size = allowed if size is None or size < 0 else min(size, allowed)
+
+        data = self.stream.read(size)
+        self._read_length += len(data)
+
+        if (
+            self.max_length is not None and
+            self._read_length > self.max_length
+        ):
+            raise HTTPRequestEntityTooLarge(
+                'Request body is too large',
+                'Request body exceeds the limit of {} bytes'.format(
+                    self.max_length
+                )
+            )
+
+        return data
@@ -1,7 +1,7 @@
 import falcon
 import mimeparse
 
-from graceful.media.base import BaseMediaHandler
+from graceful.media.base import BaseMediaHandler, _min_limit
 from graceful.media.json import JSONHandler
 
 
@@ -62,6 +62,29 @@ class MediaHandlers(BaseMediaHandler):
         handler = handler or self.lookup_handler(content_type)
         return handler.deserialize(stream, content_type, content_length)
 
+    def deserialize_many(
+        self, stream, content_type, content_length, handler=None
+    ):
+        """Deserialize the body stream that represents a list of objects.
+
+        Args:
+            stream (io.BytesIO): Input data to deserialize
+            content_type (str): Type of request content
+            content_length (int): Length of request content
+            handler (BaseMediaHandler): A media handler for deserialization
+
+        Returns:
+            iterable: An iterable of deserialized objects.
+
+        Raises:
+            falcon.HTTPBadRequest: An error occurred on attempt to
+                deserialization an invalid stream.
+
+        .. versionadded:: 0.7.0
+        """
+        handler = handler or self.lookup_handler(content_type)
+        return handler.deserialize_many(stream, content_type, content_length)
+
     def serialize(self, media, content_type, handler=None):
         """Serialize the media object for a :class:`falcon.Response`.
 
@@ -100,12 +123,16 @@ class MediaHandlers(BaseMediaHandler):
         finally:
             resp.content_type = handler.media_type
 
-    def handle_request(self, req, *, content_type=None, **kwargs):
+    def handle_request(
+        self, req, *, content_type=None, max_content_length=None, **kwargs
+    ):
         """Process a single :class:`falcon.Request` object.
 
         Args:
             req (falcon.Request): The request object to process
             content_type (str): Type of request content
+            max_content_length (int): Additional limit of the request body
+                length (e.g. defined on resource level)
 
         Returns:
             object: A deserialized object from a :class:`falcon.Request` body.
@@ -120,8 +147,33 @@ class MediaHandlers(BaseMediaHandler):
         except AttributeError:
             default_media_type = self.media_type
         handler = self.lookup_handler(content_type, default_media_type)
+        # note: limit of the handler for given media type is applied
+        #       on top of the limit of media handlers manager
+        max_content_length = _min_limit(
+            handler.max_content_length, max_content_length
+        )
         return super().handle_request(
-            req, content_type=content_type, handler=handler)
+            req, content_type=content_type, handler=handler,
+            max_content_length=max_content_length, **kwargs)
+
+    def max_content_lengths(self, max_content_length=None):
+        """Describe body length limits of all supported media types.
+
+        Args:
+            max_content_length (int): Additional limit of the request body
+                length (e.g. defined on resource level).
+
+        Returns:
+            dict: dictionary of limits for every allowed media type where
+                ``None`` means that there is no limit.
+
+        .. versionadded:: 0.7.0
+        """
+        limit = _min_limit(self.max_content_length, max_content_length)
+        return {
+            media_type: _min_limit(handler.max_content_length, limit)
+            for media_type, handler in self.handlers.items()
+        }
 
     def lookup_handler(self, media_type, default_media_type=None):
         """Lookup media handler by media type.
@@ -1,11 +1,56 @@
+import binascii
+import codecs
 import json
+import os
+
 import falcon
 
+from graceful.errors import ValidationError
 from graceful.media.base import BaseMediaHandler
 
 
+class RawJSON:
+    """Pre-encoded JSON document fragment.
+
+    Instances of this class can be used anywhere in the response ``content``
+    or ``meta`` (also as a value returned by serializer fields). The
+    :class:`JSONHandler` splices the fragment into the output verbatim
+    without decoding or re-encoding it. This is useful when representation
+    is already available as JSON (e.g. from cache or other service):
+
+    .. code-block:: python
+
+        class CatResource(RetrieveAPI, with_context=True):
+            def retrieve(self, params, meta, context, *, cat_id, **kwargs):
+                return RawJSON(cache.get('cats:' + cat_id))
+
+    Note:
+        Fragment is not validated in any way so it must be a valid JSON
+        document. It is also never re-indented.
+
+    Args:
+        data (bytes or str): JSON encoded document.
+
+    .. versionadded:: 0.7.0
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        """Initialize fragment and normalize its data to bytes."""
+        self.data = data.encode('utf-8') if isinstance(data, str) else data
+
+    def __repr__(self):
+        """Return readable representation of the fragment."""
+        return '<{} {!r}>'.format(self.__class__.__name__, self.data)
+
+
 class JSONHandler(BaseMediaHandler):
-    """JSON media handler."""
+    """JSON media handler.
+
+    .. versionchanged:: 0.7.0
+        Serialization supports pre-encoded :class:`RawJSON` fragments.
+    """
 
     @classmethod
     def dumps(cls, obj, *args, indent=0, **kwargs):
@@ -61,6 +106,84 @@ class JSONHandler(BaseMediaHandler):
                 title='Invalid JSON',
                 description='Could not parse JSON body - {}'.format(err))
 
+    def deserialize_many(self, stream, content_type, content_length, **kwargs):
+        """Incrementally deserialize the body stream with a JSON array.
+
+        Items of the top-level JSON array are parsed and yielded one by one
+        so the whole request body is never held in memory. This allows
+        to process large (e.g. compressed) bulk payloads with constant memory
+        overhead.
+
+        Note:
+            Incremental parsing is performed with the standard ``json``
+            module. Subclasses that override ``loads()`` deserialize the
+            whole body at once with their own ``loads()`` instead.
+
+        Args:
+            stream (io.BytesIO): Input data to deserialize
+            content_type (str): Type of request content
+            content_length (int): Length of request content
+
+        Returns:
+            iterator: An iterator of deserialized array items.
+
+        Raises:
+            falcon.HTTPBadRequest: An error occurred on attempt to
+                deserialization an invalid stream or the body is not a JSON
+                array.
+
+        .. versionadded:: 0.7.0
+        """
+        loads = getattr(type(self).loads, '__func__', None)
+
+        if loads is not JSONHandler.loads.__func__:
+            # note: custom loads() may decode values differently (e.g. floats
+            #       as decimals) so it must be used for bulk payloads too
+            return super().deserialize_many(
+                stream, content_type, content_length, **kwargs
+            )
+
+        return self._deserialize_items(stream, content_length, **kwargs)
+
+    def _deserialize_items(self, stream, content_length, **kwargs):
+        """Yield items of the top-level JSON array parsed from stream."""
+        reader = _ChunkedTextReader(stream, content_length or 0)
+        decoder = json.JSONDecoder(**kwargs)
+
+        try:
+            if reader.next_char() != '[':
+                raise ValidationError(
+                    "Request payload should represent a list of resources."
+                ).as_bad_request()
+            reader.advance()
+
+            if reader.next_char() == ']':
+                reader.advance()
+            else:
+                while True:
+                    yield reader.decode(decoder)
+
+                    separator = reader.next_char()
+                    reader.advance()
+
+                    if separator == ']':
+                        break
+                    elif separator != ',':
+                        raise ValueError(
+                            "Expecting ',' delimiter or ']' at position "
+                            "{}".format(reader.position - 1)
+                        )
+
+            if reader.next_char() is not None:
+                raise ValueError(
+                    "Extra data at position {}".format(reader.position)
+                )
+
+        except ValueError as err:
+            raise falcon.HTTPBadRequest(
+                title='Invalid JSON',
+                description='Could not parse JSON body - {}'.format(err))
+
     def serialize(self, media, content_type, indent=0, **kwargs):
         """Serialize the media object for a :class:`falcon.Response`.
 
@@ -71,11 +194,140 @@ class JSONHandler(BaseMediaHandler):
 
         Returns:
             A serialized (``str`` or  ``bytes``) representation of ``media``.
+            If ``media`` contains :class:`RawJSON` fragments then the result
+            is always ``bytes``.
+
+        """
+        try:
+            return self.dumps(media, indent=indent, **kwargs)
+        except TypeError:
+            # note: RawJSON fragments are rare enough so it is cheaper to
+            #       fail fast on the first one than to always encode with
+            #       the Python-level default() hook
+            return self._serialize_with_fragments(media, indent, **kwargs)
+
+    def _serialize_with_fragments(self, media, indent, **kwargs):
+        """Serialize media object with :class:`RawJSON` fragments spliced in.
 
+        Returns:
+            bytes: A serialized representation of ``media``.
         """
-        return self.dumps(media, indent=indent, **kwargs)
+        fragments = []
+        placeholder = None
+
+        def default(obj):
+            nonlocal placeholder
+
+            if not isinstance(obj, RawJSON):
+                raise TypeError(
+                    "Object of type '{}' is not JSON serializable".format(
+                        obj.__class__.__name__
+                    )
+                )
+
+            if placeholder is None:
+                placeholder = binascii.hexlify(os.urandom(16)).decode()
+
+            # note: encoder calls default() in the same order in which
+            #       values appear in the output so simple list of fragments
+            #       is enough to splice them back in place of placeholders.
+            fragments.append(obj.data)
+            return placeholder
+
+        data = self.dumps(media, indent=indent, default=default, **kwargs)
+        parts = data.split('"{}"'.format(placeholder))
+        chunks = [parts[0].encode('utf-8')]
+
+        for fragment, part in zip(fragments, parts[1:]):
+            chunks.append(fragment)
+            chunks.append(part.encode('utf-8'))
+
+        return b''.join(chunks)
 
     @property
     def media_type(self):
         """The media type to use when deserializing a response."""
         return 'application/json'
+
+
+class _ChunkedTextReader:
+    """Helper that reads and decodes JSON text from stream in chunks.
+
+    Only the part of the document that was not yet parsed is buffered.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, stream, content_length):
+        self.stream = stream
+        self.remaining = content_length
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.offset = 0
+        self.position = 0
+        self.exhausted = False
+
+    def _fill(self):
+        """Read next chunk of the stream into buffer."""
+        size = (
+            self.chunk_size if self.remaining < 0
+            else min(self.chunk_size, self.remaining)
+        )
+        data = self.stream.read(size) if size else b''
+
+        if self.remaining > 0:
+            self.remaining -= len(data)
+
+        if not data:
+            self.exhausted = True
+
+        self.buffer = self.buffer[self.offset:] + self.decoder.decode(
+            data, final=self.exhausted
+        )
+        self.offset = 0
+
+    def next_char(self):
+        """Skip whitespace and return next character or None on the end."""
+        while True:
+            while (
+                self.offset < len(self.buffer) and
+                self.buffer[self.offset] in ' \t\n\r'
+            ):
+                self.offset += 1
+                self.position += 1
+
+            if self.offset < len(self.buffer):
+                return self.buffer[self.offset]
+            if self.exhausted:
+                return None
+
+            self._fill()
+
+    def advance(self):
+        """Consume single character."""
+        self.offset += 1
+        self.position += 1
+
+    def decode(self, decoder):
+        """Decode single JSON value starting at the current position."""
+        self.next_char()
+
+        while True:
+            try:
+                obj, end = decoder.raw_decode(self.buffer, self.offset)
+            except ValueError:
+                if self.exhausted:
+                    raise
+            else:
+                # note: numbers can be split between chunks so value is
+                #       complete only if it is followed by something that
+                #       cannot be a part of the number
+                if self.exhausted or (
+                    end < len(self.buffer) and
+                    self.buffer[end] not in '0123456789.eE+-'
+                ):
+                    self.position += end - self.offset
+                    self.offset = end
+                    return obj
+
+            self._fill()
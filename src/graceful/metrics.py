@@ -0,0 +1,653 @@
+# -*- coding: utf-8 -*-
+"""In-process metrics registry with Prometheus text exposition."""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from glob import glob
+
+from graceful.resources.base import BaseResource
+
+#: Content type of Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def log_buckets(start, factor, count):
+    """Return fixed logarithmic histogram buckets.
+
+    Args:
+        start (float): upper bound of the first bucket.
+        factor (float): ratio of two consecutive bucket bounds.
+        count (int): number of buckets.
+
+    Returns:
+        tuple: sorted bucket upper bounds.
+
+    .. versionadded:: 0.7.0
+    """
+    return tuple(start * factor ** index for index in range(count))
+
+
+#: Default buckets of request durations (from 0.5ms to ~16s)
+DURATION_BUCKETS = log_buckets(0.0005, 2, 16)
+
+#: Default buckets of response body sizes (from 64B to 16MB)
+SIZE_BUCKETS = log_buckets(64, 4, 10)
+
+
+class _ThreadShards:
+    """Per-thread dictionaries of metric values.
+
+    Every thread updates its own dictionary so metric updates do not need
+    any locking. Dictionaries of all threads are merged only on collection.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def copies(self):
+        with self._lock:
+            shards = list(self._shards)
+        # note: copying dict is atomic so it is safe even if other thread
+        #       is updating it at the same time
+        return [shard.copy() for shard in shards]
+
+
+class Metric:
+    """Base class of metrics with optional labels.
+
+    Args:
+        name (str): metric name.
+        documentation (str): metric description.
+        labels (iterable): names of metric labels.
+
+    .. versionadded:: 0.7.0
+    """
+
+    #: Prometheus metric type
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        """Initialize metric with empty values."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._shards = _ThreadShards()
+
+    def collect(self):
+        """Return values of metric merged from all threads.
+
+        Returns:
+            dict: lists of metric slot values keyed by label value tuples.
+        """
+        values = {}
+
+        for shard in self._shards.copies():
+            for labels, slots in shard.items():
+                slots = self._slots(slots)
+                try:
+                    merged = values[labels]
+                except KeyError:
+                    values[labels] = slots
+                else:
+                    values[labels] = [a + b for a, b in zip(merged, slots)]
+
+        return values
+
+    def _slots(self, value):
+        """Return list of slot values of a single stored metric value."""
+        return list(value)
+
+    def samples(self, labels, slots):
+        """Generate Prometheus samples of single labeled metric value.
+
+        Args:
+            labels (tuple): label values.
+            slots (list): metric slot values.
+
+        Yields:
+            tuple: ``(name, labels, value)`` three-tuples where labels
+            are list of ``(name, value)`` pairs.
+        """
+        raise NotImplementedError  # pragma: nocover
+
+
+class Counter(Metric):
+    """Monotonically increasing counter.
+
+    .. versionadded:: 0.7.0
+    """
+
+    type = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        """Increment counter.
+
+        Args:
+            labels (tuple): label values.
+            amount (float): value to add.
+        """
+        shard = self._shards.get()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _slots(self, value):
+        return [value]
+
+    def samples(self, labels, slots):
+        """Generate single counter sample."""
+        yield self.name, list(zip(self.labels, labels)), slots[0]
+
+
+class Histogram(Metric):
+    """Histogram of observed values with fixed buckets.
+
+    Args:
+        buckets (iterable): sorted upper bounds of buckets. Defaults
+            to :any:`DURATION_BUCKETS`.
+
+    .. versionadded:: 0.7.0
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=None):
+        """Initialize histogram with empty values."""
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets or DURATION_BUCKETS)
+
+    def observe(self, labels, value):
+        """Observe single value.
+
+        Args:
+            labels (tuple): label values.
+            value (float): observed value.
+        """
+        shard = self._shards.get()
+
+        try:
+            slots = shard[labels]
+        except KeyError:
+            # note: one slot per bucket, one for overflow and one for sum
+            slots = shard[labels] = [0] * (len(self.buckets) + 2)
+
+        slots[bisect_left(self.buckets, value)] += 1
+        slots[-1] += value
+
+    def samples(self, labels, slots):
+        """Generate cumulative bucket, sum and count samples."""
+        names = list(zip(self.labels, labels))
+        cumulative = 0
+
+        for bound, count in zip(
+            self.buckets + (float('inf'),), slots[:-1]
+        ):
+            cumulative += count
+            yield (
+                self.name + '_bucket',
+                names + [('le', _format_value(bound))],
+                cumulative,
+            )
+
+        yield self.name + '_sum', names, slots[-1]
+        yield self.name + '_count', names, cumulative
+
+
+class _MmapValues:
+    """Append-only memory mapped file of float values keyed by strings.
+
+    Every entry consists of 4-byte key length, key padded to 8 bytes
+    alignment and 8-byte float value. First 8 bytes of the file hold
+    the number of used bytes.
+    """
+
+    _used = struct.Struct('q')
+    _value = struct.Struct('d')
+
+    def __init__(self, path, initial_size=1 << 16):
+        self._file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT), 'r+b')
+
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(initial_size)
+
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._positions = {}
+        self._size = self._used.unpack_from(self._map, 0)[0]
+
+        if not self._size:
+            self._size = self._used.size
+            self._used.pack_into(self._map, 0, self._size)
+
+        for key, _, position in self._entries(self._map, self._size):
+            self._positions[key] = position
+
+    @classmethod
+    def _entries(cls, data, size):
+        position = cls._used.size
+
+        while position < size:
+            length = struct.unpack_from('i', data, position)[0]
+            start = position + 4
+            key = bytes(data[start:start + length]).decode()
+            position = start + length + (-(length + 4) % 8)
+
+            yield key, cls._value.unpack_from(data, position)[0], position
+            position += cls._value.size
+
+    @classmethod
+    def read(cls, path):
+        """Generate ``(key, value)`` pairs stored in given file."""
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        if len(data) < cls._used.size:
+            return
+
+        size = cls._used.unpack_from(data, 0)[0]
+
+        for key, value, _ in cls._entries(data, size):
+            yield key, value
+
+    def write(self, key, value):
+        try:
+            position = self._positions[key]
+        except KeyError:
+            position = self._positions[key] = self._append(key)
+
+        self._value.pack_into(self._map, position, value)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padding = -(len(encoded) + 4) % 8
+        entry = struct.pack(
+            'i{}sd'.format(len(encoded) + padding), len(encoded), encoded, 0
+        )
+
+        while self._size + len(entry) > len(self._map):
+            size = len(self._map) * 2
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+
+        self._map[self._size:self._size + len(entry)] = entry
+        self._size += len(entry)
+        # note: new entry is visible to readers only after it is complete
+        self._used.pack_into(self._map, 0, self._size)
+
+        return self._size - self._value.size
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class MetricsRegistry:
+    """Registry of metrics that can be exposed in Prometheus text format.
+
+    .. code-block:: python
+
+        from graceful import metrics
+
+        registry = metrics.MetricsRegistry()
+        cache_hits = registry.counter(
+            'cache_hits_total', 'Number of cache hits', labels=['cache']
+        )
+
+        cache_hits.inc(('users',))
+
+    Metric updates are lock-free because every thread updates its own copy
+    of metric values. Copies are merged only when metrics are collected.
+
+    Every process of multi-process servers (e.g. gunicorn with multiple
+    workers) has its own metric values. They can be aggregated with the
+    ``multiprocess_dir`` argument. In this mode every process periodically
+    writes its values to its own memory mapped file in given directory
+    and exposition sums values read from all files of the directory. This
+    directory should be emptied before server is started.
+
+    Args:
+        multiprocess_dir (str): optional path of directory for files with
+            values of every process.
+        flush_interval (float): minimal time (in seconds) between two
+            writes of process values to its file.
+        timer (callable): function returning current time in seconds.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, multiprocess_dir=None, flush_interval=1, timer=time.monotonic
+    ):
+        """Initialize empty registry."""
+        self.metrics = []
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self.timer = timer
+
+        self._flushed = timer()
+        self._flush_lock = threading.Lock()
+        self._values_file = None
+        self._pid = None
+
+    def register(self, metric):
+        """Register metric in the registry.
+
+        Args:
+            metric (Metric): metric instance.
+
+        Returns:
+            Metric: registered metric.
+        """
+        if any(known.name == metric.name for known in self.metrics):
+            raise ValueError(
+                "Metric {} already registered".format(metric.name)
+            )
+
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        """Create and register new :class:`Counter` metric."""
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=None):
+        """Create and register new :class:`Histogram` metric."""
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def maybe_flush(self):
+        """Write process values to its file if flush interval elapsed.
+
+        This is a no-op if registry does not work in multi-process mode or
+        if other thread is currently writing values.
+        """
+        if (
+            self.multiprocess_dir is None or
+            self.timer() - self._flushed < self.flush_interval or
+            not self._flush_lock.acquire(False)
+        ):
+            return
+
+        try:
+            self._flush()
+        finally:
+            self._flush_lock.release()
+
+    def flush(self):
+        """Write process values to its file in multi-process mode."""
+        if self.multiprocess_dir is None:
+            return
+
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        # note: forked worker processes must not write to the file
+        #       of their parent process
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._values_file = _MmapValues(os.path.join(
+                self.multiprocess_dir, 'metrics-{}.db'.format(self._pid)
+            ))
+
+        for metric in self.metrics:
+            for labels, slots in metric.collect().items():
+                for index, value in enumerate(slots):
+                    self._values_file.write(
+                        json.dumps([metric.name, labels, index]), value
+                    )
+
+        self._flushed = self.timer()
+
+    def collect(self):
+        """Collect values of all registered metrics.
+
+        In multi-process mode values are collected from files of all
+        processes.
+
+        Returns:
+            list: list of ``(metric, values)`` two-tuples where values
+            are lists of metric slot values keyed by label value tuples.
+        """
+        if self.multiprocess_dir is None:
+            return [(metric, metric.collect()) for metric in self.metrics]
+
+        self.flush()
+        collected = {metric.name: {} for metric in self.metrics}
+
+        for path in sorted(glob(
+            os.path.join(self.multiprocess_dir, 'metrics-*.db')
+        )):
+            for key, value in _MmapValues.read(path):
+                name, labels, index = json.loads(key)
+                values = collected.get(name)
+
+                if values is None:
+                    continue
+
+                slots = values.setdefault(tuple(labels), [])
+                slots.extend([0] * (index + 1 - len(slots)))
+                slots[index] += value
+
+        return [(metric, collected[metric.name]) for metric in self.metrics]
+
+    def expose(self):
+        """Return all metrics in Prometheus text exposition format.
+
+        Returns:
+            str: metrics exposition.
+        """
+        lines = []
+
+        for metric, values in self.collect():
+            lines.append('# HELP {} {}'.format(
+                metric.name, _escape(metric.documentation, help=True)
+            ))
+            lines.append('# TYPE {} {}'.format(metric.name, metric.type))
+
+            for labels in sorted(values):
+                for name, names, value in metric.samples(
+                    labels, values[labels]
+                ):
+                    lines.append('{}{} {}'.format(
+                        name, _format_labels(names), _format_value(value)
+                    ))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value, help=False):
+    """Escape label value or help text of Prometheus exposition format."""
+    value = str(value).replace('\\', '\\\\').replace('\n', '\\n')
+    return value if help else value.replace('"', '\\"')
+
+
+def _format_labels(names):
+    """Format list of ``(name, value)`` label pairs."""
+    if not names:
+        return ''
+
+    return '{' + ','.join(
+        '{}="{}"'.format(name, _escape(value)) for name, value in names
+    ) + '}'
+
+
+def _format_value(value):
+    """Format sample value or bucket bound."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _body_size(resp):
+    """Return size of response body or ``None`` if it is unknown."""
+    if resp.data is not None:
+        return len(resp.data)
+
+    # compat: falcon>=3.0 renamed Response.body to Response.text
+    text = resp.text if hasattr(resp, 'text') else resp.body
+
+    if text is not None:
+        return len(text)
+
+    return None if resp.stream is not None else 0
+
+
+class Metrics:
+    """Middleware that records metrics of all requests and responses.
+
+    Following metrics are recorded:
+
+    * ``graceful_requests_total``: number of requests per resource class,
+      method and response status code,
+    * ``graceful_request_duration_seconds``: histogram of request processing
+      durations per resource class and method,
+    * ``graceful_response_size_bytes``: histogram of response body sizes per
+      resource class and method,
+    * ``graceful_validation_failures_total``: number of requests rejected
+      due to ``DeserializationError`` or ``ValidationError`` per resource
+      class, method and error class,
+    * ``graceful_authentication_total``: number of authentication hits and
+      misses per authentication middleware class.
+
+    .. code-block:: python
+
+        import falcon
+        from graceful import authentication, metrics
+
+        registry = metrics.MetricsRegistry()
+
+        api = application = falcon.API(middleware=[
+            metrics.Metrics(registry),
+            authentication.Token(user_storage),
+        ])
+        api.add_route('/metrics', metrics.MetricsResource(registry))
+
+    Args:
+        registry (MetricsRegistry): registry of metrics. New registry is
+            created if not specified.
+        timer (callable): function returning current time in seconds.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, registry=None, timer=time.perf_counter):
+        """Initialize metrics middleware and register its metrics."""
+        self.registry = registry if registry is not None else (
+            MetricsRegistry()
+        )
+        self.timer = timer
+
+        labels = ('resource', 'method')
+
+        self.requests = self.registry.counter(
+            'graceful_requests_total',
+            'Number of processed requests.',
+            labels + ('status',),
+        )
+        self.durations = self.registry.histogram(
+            'graceful_request_duration_seconds',
+            'Request processing duration in seconds.',
+            labels, DURATION_BUCKETS,
+        )
+        self.sizes = self.registry.histogram(
+            'graceful_response_size_bytes',
+            'Response body size in bytes.',
+            labels, SIZE_BUCKETS,
+        )
+        self.validation_failures = self.registry.counter(
+            'graceful_validation_failures_total',
+            'Number of requests with invalid parameters or representations.',
+            labels + ('error',),
+        )
+        self.authentication = self.registry.counter(
+            'graceful_authentication_total',
+            'Number of authentication attempts.',
+            ('middleware', 'result'),
+        )
+
+    def process_request(self, req, resp):
+        """Start measuring request processing duration.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+        """
+        req.context['metrics_started'] = self.timer()
+
+    def process_response(self, req, resp, resource=None, req_succeeded=True):
+        """Record metrics of processed request.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+            resource (object): resource object matched by falcon router
+            req_succeeded (bool): ``True`` if no exceptions were raised.
+        """
+        context = req.context
+        labels = (
+            resource.__class__.__name__ if resource is not None else '',
+            req.method,
+        )
+
+        started = context.get('metrics_started')
+        if started is not None:
+            self.durations.observe(labels, self.timer() - started)
+
+        self.requests.inc(labels + (resp.status[:3],))
+
+        size = _body_size(resp)
+        if size is not None:
+            self.sizes.observe(labels, size)
+
+        error = context.get('validation_error')
+        if error is not None:
+            self.validation_failures.inc(
+                labels + (error.__class__.__name__,)
+            )
+
+        identified_with = context.get('identified_with')
+        if identified_with is not None:
+            self.authentication.inc(
+                (identified_with.__class__.__name__, 'hit')
+            )
+
+        for middleware in context.get('authentication_misses', ()):
+            self.authentication.inc((middleware.__class__.__name__, 'miss'))
+
+        self.registry.maybe_flush()
+
+
+class MetricsResource(BaseResource, with_context=True):
+    """Resource that exposes metrics in Prometheus text format.
+
+    This resource is not protected in any way. Use authorization hooks
+    (e.g. :any:`authentication_required`) or separate route that is not
+    publicly available if metrics should not be public.
+
+    Args:
+        registry (MetricsRegistry): registry of exposed metrics.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, registry):
+        """Initialize metrics resource."""
+        self.registry = registry
+
+    def on_get(self, req, resp, **kwargs):
+        """Respond with Prometheus text exposition of all metrics."""
+        resp.content_type = CONTENT_TYPE
+        resp.data = self.registry.expose().encode()
@@ -0,0 +1,630 @@
+# -*- coding: utf-8 -*-
+"""Sampled per-request profiling with per-resource aggregation.
+
+The :class:`Profiler` middleware profiles time of sampled requests with
+``cProfile`` and the :class:`AllocationTracker` middleware tracks their
+memory allocations with ``tracemalloc``.
+"""
+import cProfile
+import os
+import pstats
+import random
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+import falcon
+
+from graceful import serializers, timing
+from graceful.authorization import authentication_required
+from graceful.parameters import IntParam, StringParam
+from graceful.resources.generic import Resource
+from graceful.validators import choices_validator, min_validator
+
+
+class _SampledMiddleware:
+    """Base class of middlewares that diagnose only sampled requests."""
+
+    def __init__(self, sample_rate, header, authorize, random):
+        self.sample_rate = sample_rate
+        self.header = header
+        self.authorize = authorize
+        self.random = random
+
+    def should_profile(self, req):
+        """Decide if request should be profiled.
+
+        Args:
+            req (falcon.Request): request object.
+
+        Returns:
+            bool: ``True`` if request should be profiled.
+        """
+        if (
+            self.authorize is not None and
+            req.get_header(self.header) and
+            self.authorize(req)
+        ):
+            return True
+
+        return self.random() < self.sample_rate
+
+
+class Profiler(_SampledMiddleware):
+    """Middleware that profiles sampled requests with ``cProfile``.
+
+    Profiles of sampled requests are aggregated per resource class and
+    HTTP method. Top functions of aggregated profiles can be exposed with
+    :class:`ProfilesResource` and every single profile can be also dumped
+    to a file readable with ``pstats`` (or tools like ``snakeviz``).
+
+    .. code-block:: python
+
+        import falcon
+        from graceful import authentication, profiling
+
+        profiler = profiling.Profiler(
+            sample_rate=0.001,
+            authorize=lambda req: req.context['user'].get('is_admin'),
+        )
+
+        api = application = falcon.API(middleware=[
+            authentication.Token(user_storage),
+            profiler,
+        ])
+        api.add_route('/_profiles', profiling.ProfilesResource(profiler))
+
+    Requests are sampled in the ``process_resource()`` step so the
+    profiler should be installed after authentication middlewares. Every
+    request is profiled with probability of ``sample_rate``. Requests can
+    be also profiled on demand with the debug header (``X-Profile: 1``) but
+    only if ``authorize`` function is provided and accepts the request.
+
+    In profiled requests serializers represent objects with functions named
+    after serializer fields so profiles show time spent in
+    ``to_representation()`` of every field separately (e.g.
+    ``CatSerializer.name``). Other requests processed at the same time are
+    not affected.
+
+    Args:
+        sample_rate (float): fraction of randomly profiled requests
+            (``0-1``).
+        header (str): name of the debug header that requests profiling.
+        authorize (callable): function that accepts request object and
+            returns ``True`` if its user is allowed to request profiling
+            with the debug header. If not set then debug header is ignored.
+        dump_dir (str): optional directory where profile of every sampled
+            request is dumped.
+        field_attribution (bool): set to ``False`` to disable field-level
+            time attribution in serializers.
+        random (callable): function returning random float in ``[0, 1)``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, sample_rate=0.01, header='X-Profile', authorize=None,
+        dump_dir=None, field_attribution=True, random=random.random,
+    ):
+        """Initialize profiler middleware."""
+        super().__init__(sample_rate, header, authorize, random)
+        self.dump_dir = dump_dir
+        self.field_attribution = field_attribution
+
+        self._stats = {}
+        self._requests = {}
+        self._lock = threading.Lock()
+
+    def process_resource(self, req, resp, resource, uri_kwargs=None):
+        """Start profiling of sampled request.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+            resource (object): resource object matched by falcon router
+            uri_kwargs (dict): additional keyword argument from uri template.
+        """
+        if resource is None or not self.should_profile(req):
+            return
+
+        profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError:
+            # note: other profiler is already active in this thread
+            return
+
+        req.context['profile'] = profile
+
+        if self.field_attribution:
+            serializers._field_attribution.set(True)
+
+    def process_response(self, req, resp, resource=None, req_succeeded=True):
+        """Stop profiling and aggregate the profile of request.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+            resource (object): resource object matched by falcon router
+            req_succeeded (bool): ``True`` if no exceptions were raised.
+        """
+        profile = req.context.get('profile')
+
+        if profile is None:
+            return
+
+        profile.disable()
+
+        if self.field_attribution:
+            serializers._field_attribution.set(False)
+
+        key = '{} {}'.format(resource.__class__.__name__, req.method)
+
+        with self._lock:
+            if key in self._stats:
+                self._stats[key].add(profile)
+            else:
+                self._stats[key] = pstats.Stats(profile)
+
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+        if self.dump_dir is not None:
+            profile.dump_stats(os.path.join(
+                self.dump_dir, '{}.{}.{}.{}.prof'.format(
+                    resource.__class__.__name__, req.method,
+                    int(time.time() * 1e6), os.getpid(),
+                )
+            ))
+
+    def top(self, limit=20, sort='cumulative'):
+        """Return top functions of aggregated profiles.
+
+        Args:
+            limit (int): maximal number of functions per profile.
+            sort (str): sort order of functions: ``cumulative`` (time
+                spent in function and functions it called), ``tottime``
+                (time spent in function itself) or ``calls``.
+
+        Returns:
+            dict: profile summaries keyed by resource class name and HTTP
+            method (e.g. ``CatList GET``). Every summary contains number
+            of profiled ``requests`` and list of top ``functions``.
+        """
+        index = {'calls': 1, 'tottime': 2, 'cumulative': 3}[sort]
+        summaries = {}
+
+        with self._lock:
+            for key, stats in self._stats.items():
+                functions = sorted(
+                    stats.stats.items(),
+                    key=lambda item: item[1][index],
+                    reverse=True,
+                )[:limit]
+
+                summaries[key] = {
+                    'requests': self._requests[key],
+                    'functions': [
+                        {
+                            'function': pstats.func_std_string(function),
+                            'calls': calls,
+                            'primitive_calls': primitive_calls,
+                            'tottime': tottime,
+                            'cumulative': cumulative,
+                        }
+                        for function, (
+                            primitive_calls, calls, tottime, cumulative, _
+                        ) in functions
+                    ],
+                }
+
+        return summaries
+
+    def clear(self):
+        """Remove all aggregated profiles."""
+        with self._lock:
+            self._stats.clear()
+            self._requests.clear()
+
+
+_GRACEFUL_PATH = os.path.dirname(os.path.abspath(__file__))
+_FALCON_PATH = os.path.dirname(os.path.abspath(falcon.__file__))
+_LIBRARY_PATHS = tuple(set(
+    sysconfig.get_paths()[name]
+    for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+))
+_TRACKER_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+]
+
+
+def allocation_origin(traceback):
+    """Return name of the code that made allocation with given traceback.
+
+    The most recent frame of graceful, falcon or user code decides about
+    the origin. Frames of the standard library and other installed
+    packages are skipped so e.g. allocations of ``json`` module are
+    attributed to the code that called it.
+
+    Args:
+        traceback (tracemalloc.Traceback): allocation traceback.
+
+    Returns:
+        str: ``graceful``, ``falcon``, ``user`` or ``other`` (if the
+        traceback does not contain any frame of known origin).
+
+    .. versionadded:: 0.7.0
+    """
+    frames = list(traceback)
+
+    # compat: frames are sorted from the oldest to the most recent
+    #         since Python 3.7
+    if sys.version_info >= (3, 7):
+        frames.reverse()
+
+    for frame in frames:
+        filename = frame.filename
+
+        if filename.startswith(_GRACEFUL_PATH):
+            return 'graceful'
+        if filename.startswith(_FALCON_PATH):
+            return 'falcon'
+        if not filename.startswith(_LIBRARY_PATHS + ('<',)):
+            return 'user'
+
+    return 'other'
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_TRACKER_FILTERS)
+
+
+class AllocationRecorder:
+    """Recorder of memory allocated in processing phases of single request.
+
+    Recorder is used by the :func:`graceful.timing.phase` instrumentation
+    in place of the :class:`graceful.timing.Timings` recorder. Memory is
+    measured with ``tracemalloc`` snapshots taken at the start and the end
+    of every phase. Like durations, allocations of nested phases are not
+    included in the outer phase. Phases of top level are additionally
+    split by the origin of allocations (see :func:`allocation_origin`).
+
+    Allocations are net: only memory blocks still allocated at the end of
+    phase are counted.
+
+    Args:
+        timings (graceful.timing.Timings): optional timings recorder that
+            also receives all phases (e.g. of the
+            :class:`graceful.timing.ServerTiming` middleware).
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, timings=None):
+        """Initialize empty allocation recorder."""
+        self.timings = timings
+        self.meta = timings is not None and timings.meta
+        self.phases = OrderedDict()
+        self.origins = OrderedDict()
+        self._stack = []
+
+    def start(self, name):
+        """Start measuring phase with given name.
+
+        Args:
+            name (str): phase name.
+        """
+        if self.timings is not None:
+            self.timings.start(name)
+
+        self._stack.append([name, _snapshot(), 0, 0])
+
+    def stop(self):
+        """Stop measuring most recently started phase."""
+        name, snapshot, nested_size, nested_count = self._stack.pop()
+        size = count = 0
+
+        for diff in _snapshot().compare_to(snapshot, 'traceback'):
+            size += diff.size_diff
+            count += diff.count_diff
+
+            if not self._stack and diff.count_diff:
+                _add(self.origins, allocation_origin(diff.traceback), (
+                    diff.size_diff, diff.count_diff
+                ))
+
+        _add(self.phases, name, (size - nested_size, count - nested_count))
+
+        if self._stack:
+            self._stack[-1][2] += size
+            self._stack[-1][3] += count
+
+        if self.timings is not None:
+            self.timings.stop()
+
+    def phase(self, name):
+        """Return context manager that measures phase with given name.
+
+        Args:
+            name (str): phase name.
+        """
+        return timing._Phase(self, name)
+
+    def as_dict(self, total=False):
+        """Return phase durations of the wrapped timings recorder."""
+        if self.timings is None:
+            return OrderedDict()
+
+        return self.timings.as_dict(total)
+
+
+def _add(totals, key, values):
+    previous = totals.get(key)
+
+    if previous is None:
+        totals[key] = list(values)
+    else:
+        for index, value in enumerate(values):
+            previous[index] += value
+
+
+class AllocationTracker(_SampledMiddleware):
+    """Middleware that tracks memory allocations of sampled requests.
+
+    Sampled requests are processed with ``tracemalloc`` enabled and memory
+    allocated by every request is attributed to graceful processing phases
+    (see :class:`graceful.timing.ServerTiming`) and to the code that made
+    the allocations (graceful, falcon or user code). Results are
+    aggregated per resource class and HTTP method.
+
+    .. code-block:: python
+
+        import falcon
+        from graceful import profiling
+
+        tracker = profiling.AllocationTracker(sample_rate=0.01)
+        api = application = falcon.API(middleware=[tracker])
+        api.add_route(
+            '/_debug/allocations', profiling.AllocationsResource(tracker)
+        )
+
+    This is a diagnostic mode with large overhead. ``tracemalloc`` traces
+    allocations of the whole process so only one request is tracked at
+    a time. Requests sampled while other request is tracked are processed
+    normally. If ``tracemalloc`` is not already tracing then it is started
+    only for the time of tracked request. If it is already tracing (e.g.
+    started by the application or other tool) then its traces are left
+    intact: allocations are measured as a difference from the snapshot
+    taken at the start of request and the peak of request memory is not
+    measured.
+
+    Requests can be also tracked on demand with the debug header but only
+    if ``authorize`` function is provided and accepts the request. The
+    tracker decides about sampling in the ``process_resource()`` step so
+    it should be installed after authentication middlewares.
+
+    Args:
+        sample_rate (float): fraction of randomly tracked requests
+            (``0-1``).
+        header (str): name of the debug header that requests tracking.
+        authorize (callable): function that accepts request object and
+            returns ``True`` if its user is allowed to request tracking
+            with the debug header. If not set then debug header is ignored.
+        frames (int): number of frames stored in allocation tracebacks.
+            Allocations are attributed to user code only if its frame is
+            stored.
+        random (callable): function returning random float in ``[0, 1)``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, sample_rate=0.01, header='X-Profile-Allocations',
+        authorize=None, frames=25, random=random.random,
+    ):
+        """Initialize allocation tracker middleware."""
+        super().__init__(sample_rate, header, authorize, random)
+        self.frames = frames
+
+        self._routes = {}
+        self._tracking = threading.Lock()
+        self._lock = threading.Lock()
+
+    def process_resource(self, req, resp, resource, uri_kwargs=None):
+        """Start tracking allocations of sampled request.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+            resource (object): resource object matched by falcon router
+            uri_kwargs (dict): additional keyword argument from uri template.
+        """
+        if resource is None or not self.should_profile(req):
+            return
+
+        if not self._tracking.acquire(blocking=False):
+            return
+
+        started = not tracemalloc.is_tracing()
+
+        if started:
+            tracemalloc.start(self.frames)
+            baseline = None
+        else:
+            # note: traces of other tracemalloc users must not be cleared
+            baseline = _snapshot()
+
+        recorder = AllocationRecorder(timing.current())
+        req.context['allocations'] = (recorder, started, baseline)
+        timing._current.set(recorder)
+
+    def process_response(self, req, resp, resource=None, req_succeeded=True):
+        """Stop tracking and aggregate allocations of the request.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+            resource (object): resource object matched by falcon router
+            req_succeeded (bool): ``True`` if no exceptions were raised.
+        """
+        tracked = req.context.pop('allocations', None)
+
+        if tracked is None:
+            return
+
+        recorder, started, baseline = tracked
+        timing._current.set(recorder.timings)
+
+        try:
+            snapshot = _snapshot()
+            peak = tracemalloc.get_traced_memory()[1] if started else None
+        finally:
+            if started:
+                tracemalloc.stop()
+            self._tracking.release()
+
+        if baseline is None:
+            total = (
+                sum(trace.size for trace in snapshot.traces),
+                len(snapshot.traces),
+            )
+        else:
+            total = [0, 0]
+
+            for diff in snapshot.compare_to(baseline, 'traceback'):
+                total[0] += diff.size_diff
+                total[1] += diff.count_diff
+        key = '{} {}'.format(resource.__class__.__name__, req.method)
+
+        with self._lock:
+            route = self._routes.get(key)
+
+            if route is None:
+                route = self._routes[key] = {
+                    'requests': 0,
+                    'peaks': 0,
+                    'peak_bytes': 0,
+                    'total': [0, 0],
+                    'phases': OrderedDict(),
+                    'origins': OrderedDict(),
+                }
+
+            route['requests'] += 1
+
+            if peak is not None:
+                route['peaks'] += 1
+                route['peak_bytes'] += peak
+            _add(route, 'total', total)
+
+            for name, values in recorder.phases.items():
+                _add(route['phases'], name, values)
+            for name, values in recorder.origins.items():
+                _add(route['origins'], name, values)
+
+    def report(self):
+        """Return average allocations of tracked requests.
+
+        Returns:
+            dict: summaries keyed by resource class name and HTTP method
+            (e.g. ``CatList GET``). Every summary contains number of
+            tracked ``requests``, average ``peak_bytes`` allocated during
+            the request (``None`` if peak was never measured because
+            ``tracemalloc`` was started by other code) and average
+            ``bytes`` and ``count`` of memory blocks still allocated at
+            the end of request. Average
+            ``bytes`` and ``count`` of net allocations are also reported
+            per processing phase under the ``phases`` key and per
+            allocation origin under the ``origins`` key.
+        """
+        def average(values, requests):
+            return {
+                'bytes': values[0] / requests,
+                'count': values[1] / requests,
+            }
+
+        with self._lock:
+            return {
+                key: {
+                    'requests': route['requests'],
+                    'peak_bytes': (
+                        route['peak_bytes'] / route['peaks']
+                        if route['peaks'] else None
+                    ),
+                    'bytes': route['total'][0] / route['requests'],
+                    'count': route['total'][1] / route['requests'],
+                    'phases': OrderedDict(
+                        (name, average(values, route['requests']))
+                        for name, values in route['phases'].items()
+                    ),
+                    'origins': OrderedDict(
+                        (name, average(values, route['requests']))
+                        for name, values in route['origins'].items()
+                    ),
+                }
+                for key, route in self._routes.items()
+            }
+
+    def clear(self):
+        """Remove all aggregated allocations."""
+        with self._lock:
+            self._routes.clear()
+
+
+@authentication_required
+class ProfilesResource(Resource, with_context=True):
+    """Top functions of requests profiled by the profiler middleware.
+
+    This resource requires authentication. Use additional authorization
+    (e.g. :class:`graceful.authorization.PermissionPolicy`) to limit access
+    to administrators.
+
+    Args:
+        profiler (Profiler): profiler middleware instance.
+
+    .. versionadded:: 0.7.0
+    """
+
+    limit = IntParam(
+        "Maximal number of functions per profile",
+        default='20', validators=[min_validator(1)],
+    )
+    sort = StringParam(
+        "Sort order of functions (cumulative, tottime or calls)",
+        default='cumulative',
+        validators=[choices_validator(['cumulative', 'tottime', 'calls'])],
+    )
+
+    def __init__(self, profiler):
+        """Initialize profiles resource."""
+        self.profiler = profiler
+
+    def retrieve(self, params, meta, context, **kwargs):
+        """Return top functions of aggregated profiles."""
+        return self.profiler.top(params['limit'], params['sort'])
+
+
+@authentication_required
+class AllocationsResource(Resource, with_context=True):
+    """Allocations of requests tracked by the allocation tracker middleware.
+
+    This resource requires authentication. Use additional authorization
+    (e.g. :class:`graceful.authorization.PermissionPolicy`) to limit access
+    to administrators.
+
+    Args:
+        tracker (AllocationTracker): allocation tracker middleware instance.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, tracker):
+        """Initialize allocations resource."""
+        self.tracker = tracker
+
+    def retrieve(self, params, meta, context, **kwargs):
+        """Return average allocations of tracked requests."""
+        return self.tracker.report()
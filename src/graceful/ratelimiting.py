@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from falcon import HTTPTooManyRequests
+
+from graceful.authentication import user_identity
+
+
+class _Stripe:
+    """Group of in-memory buckets guarded by single lock."""
+
+    __slots__ = ('lock', 'buckets')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+
+class RateLimit:
+    """Token bucket rate limiting middleware keyed on authenticated users.
+
+    Every client gets its own bucket of ``burst`` tokens that is refilled
+    with ``rate`` tokens per second. Every request takes one token from
+    the bucket of its client. Requests of clients with empty buckets are
+    rejected with ``429 Too Many Requests`` response (including the
+    ``Retry-After`` header) before any resource work is done.
+
+    This middleware must be installed **after** authentication middlewares
+    because clients are identified with the ``req.context['user']`` value.
+    Requests without identified user are not limited by default (they are
+    usually rejected later by the authorization layer anyway).
+
+    .. code-block:: python
+
+        import falcon
+        from graceful import authentication, ratelimiting
+
+        api = application = falcon.API(middleware=[
+            authentication.Token(user_storage),
+            ratelimiting.RateLimit(rate=10, burst=20),
+        ])
+
+    By default buckets are kept in memory of the process in a bounded LRU
+    cache so every worker process limits clients separately. The cache is
+    split into ``lock_stripes`` parts with their own locks so concurrent
+    requests of different clients rarely wait for each other. Limits can be
+    shared between workers with the ``kv_store`` argument that accepts
+    the same key-value store clients as :any:`KeyValueUserStorage`. Note
+    that updates of shared buckets are not atomic so under high
+    concurrency clients may be allowed slightly more requests than limit.
+
+    Args:
+        rate (float): number of tokens added to every bucket per second
+            (sustained request rate of a single client).
+        burst (int): capacity of every bucket (maximum number of requests
+            that single client can make at once). Defaults to ``rate``
+            (but not less than ``1``).
+        kv_store: optional key-value store client instance (e.g. Redis client
+            object) providing ``get(key)`` and ``set(key, value)`` methods
+            used to share buckets between worker processes.
+        key_prefix (str): prefix of bucket keys in the ``kv_store``.
+        max_buckets (int): maximum number of buckets kept in memory. Least
+            recently used buckets of every stripe are evicted first.
+        lock_stripes (int): number of independently locked parts of the
+            in-memory bucket cache.
+        timer (callable): function returning current time in seconds.
+            Defaults to ``time.monotonic`` for in-memory buckets and
+            ``time.time`` for buckets stored in ``kv_store``.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, rate, burst=None, kv_store=None, key_prefix='ratelimit',
+        max_buckets=10000, lock_stripes=16, timer=None,
+    ):
+        """Initialize rate limiting middleware."""
+        if rate <= 0:
+            raise ValueError("rate must be positive number.")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.kv_store = kv_store
+        self.key_prefix = key_prefix
+        self.max_buckets = max_buckets
+
+        if timer is None:
+            timer = time.monotonic if kv_store is None else time.time
+        self.timer = timer
+
+        self._stripes = [
+            _Stripe() for _ in range(max(min(lock_stripes, max_buckets), 1))
+        ]
+        self._stripe_size = max(max_buckets // len(self._stripes), 1)
+        self._identities = {}
+
+    def get_key(self, req):
+        """Get key of the bucket for the client that made the request.
+
+        Users are keyed on their identity (see :any:`user_identity`).
+        Identities of user objects shared between requests (e.g. by
+        :any:`CachedUserStorage`) are computed only once. Override this
+        method to use different key (e.g. user id) or to limit
+        unauthenticated requests too.
+
+        Args:
+            req (falcon.Request): request object.
+
+        Returns:
+            str: bucket key or ``None`` if request should not be limited.
+        """
+        user = req.context.get('user')
+
+        if user is None:
+            return None
+
+        # note: entry keeps reference to the user object so its id cannot
+        #       be reused by other object while the entry exists
+        entry = self._identities.get(id(user))
+
+        if entry is not None and entry[0] is user:
+            return entry[1]
+
+        identity = user_identity(user)
+
+        if len(self._identities) >= self.max_buckets:
+            self._identities.clear()
+
+        self._identities[id(user)] = user, identity
+        return identity
+
+    def _take(self, tokens, updated, now):
+        """Take single token from the bucket with given state.
+
+        Returns:
+            tuple: (tokens, retry_after) two-tuple with new number of tokens
+            in the bucket and time (in seconds) after which request can be
+            retried (``0`` if token was taken).
+        """
+        tokens = min(
+            self.burst, tokens + max(now - updated, 0) * self.rate
+        )
+
+        if tokens >= 1:
+            return tokens - 1, 0
+
+        return tokens, (1 - tokens) / self.rate
+
+    def acquire(self, key):
+        """Take single token from the bucket with given key.
+
+        Args:
+            key (str): bucket key.
+
+        Returns:
+            float: time (in seconds) after which request can be retried or
+            ``0`` if request is allowed.
+        """
+        if self.kv_store is not None:
+            return self._acquire_shared(key)
+
+        stripe = self._stripes[hash(key) % len(self._stripes)]
+
+        with stripe.lock:
+            now = self.timer()
+            tokens, updated = stripe.buckets.pop(key, (self.burst, now))
+            tokens, retry_after = self._take(tokens, updated, now)
+            stripe.buckets[key] = (tokens, now)
+
+            if len(stripe.buckets) > self._stripe_size:
+                stripe.buckets.popitem(last=False)
+
+        return retry_after
+
+    def _acquire_shared(self, key):
+        """Take single token from the bucket stored in ``kv_store``."""
+        key = ':'.join((self.key_prefix, key))
+        now = self.timer()
+        stored = self.kv_store.get(key)
+
+        if stored is not None:
+            tokens, updated = map(float, stored.decode().split(' '))
+        else:
+            tokens, updated = self.burst, now
+
+        tokens, retry_after = self._take(tokens, updated, now)
+        self.kv_store.set(key, '{!r} {!r}'.format(tokens, now).encode())
+
+        return retry_after
+
+    def process_resource(self, req, resp, resource, uri_kwargs=None):
+        """Reject request with 429 if its client exceeded the rate limit.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+            resource (object): resource object matched by falcon router
+            uri_kwargs (dict): additional keyword argument from uri template.
+        """
+        key = self.get_key(req)
+
+        if key is None:
+            return
+
+        retry_after = self.acquire(key)
+
+        if retry_after > 0:
+            raise HTTPTooManyRequests(
+                'Too Many Requests',
+                'Rate limit exceeded, retry in {} seconds'.format(
+                    int(math.ceil(retry_after))
+                ),
+                retry_after=int(math.ceil(retry_after)),
+            )
@@ -9,6 +9,7 @@ from mimeparse import parse_mime_type
 from graceful.parameters import BaseParam, IntParam
 from graceful.errors import DeserializationError, ValidationError
 from graceful.media.json import JSONHandler
+from graceful.timing import current, phase
 
 
 class MetaResource(type):
@@ -83,6 +84,10 @@ class MetaResource(type):
         except KeyError:
             pass
 
+        # note: resolved once per class so responders do not need to look
+        #       for (possibly missing) _with_context on every request
+        cls._handler_context = getattr(cls, '_with_context', False)
+
 
 class BaseResource(metaclass=MetaResource):
     """Base resource class with core param and response functionality.
@@ -130,6 +135,12 @@ class BaseResource(metaclass=MetaResource):
     #: objects and to deserialize request objects.
     media_handler = JSONHandler()
 
+    #: Maximum length (in bytes) of request body accepted by this resource.
+    #: Requests exceeding this limit are rejected with
+    #: ``413 Request Entity Too Large``. Limits of media handler are applied
+    #: on top of this value. Set to ``None`` to disable the limit.
+    max_content_length = None
+
     def __new__(cls, *args, **kwargs):
         """Do some sanity checks before resource instance initialization."""
         instance = super().__new__(cls)
@@ -171,16 +182,23 @@ class BaseResource(metaclass=MetaResource):
                 representation) to be included in 'content' section of response
 
         Returns:
-            None
+            Serialized (``str`` or ``bytes``) response body.
 
+        .. versionchanged:: 0.7.0
+            Returns serialized response body.
         """
+        timings = current()
+        if timings is not None and timings.meta:
+            meta['timings'] = timings.as_dict()
+
         response = {
             'meta': meta,
             'content': content
         }
 
-        self.media_handler.handle_response(
-            resp, media=response, indent=params.get('indent', 0))
+        with phase('render'):
+            return self.media_handler.handle_response(
+                resp, media=response, indent=params.get('indent', 0))
 
     def allowed_methods(self):
         """Return list of allowed HTTP methods on this resource.
@@ -231,6 +249,10 @@ class BaseResource(metaclass=MetaResource):
         .. versionchanged:: 0.2.0
            The `req` and `resp` parameters became optional to ease the
            implementation of application-level documentation generators.
+
+        .. versionchanged:: 0.7.0
+           Resources that accept request body describe its length limits
+           for every supported media type under ``max_content_length`` key.
         """
         description = {
             'params': OrderedDict([
@@ -245,6 +267,14 @@ class BaseResource(metaclass=MetaResource):
             'name': self.__class__.__name__,
             'methods': self.allowed_methods()
         }
+        # note: body length limits are useful only for resources that
+        #       accept representations in request body
+        if {'POST', 'PUT', 'PATCH'} & set(description['methods']):
+            description['max_content_length'] = (
+                self.media_handler.max_content_lengths(
+                    self.max_content_length
+                )
+            )
         # note: add path to resource description only if request object was
         #       provided in order to make auto-documentation engines simpler
         if req:
@@ -332,6 +362,7 @@ class BaseResource(metaclass=MetaResource):
                 except ValidationError as err:
                     # ValidationError allows to easily translate itself to
                     # to falcon's HTTPInvalidParam (Bad Request HTTP response)
+                    req.context['validation_error'] = err
                     raise err.as_invalid_param(name)
 
                 except ValueError as err:
@@ -359,11 +390,12 @@ class BaseResource(metaclass=MetaResource):
         meta = {
             'params': params
         }
-        content = content_handler(params, meta, **kwargs)
+        with phase('handler'):
+            content = content_handler(params, meta, **kwargs)
         meta['params'] = params
         return meta, content
 
-    def require_representation(self, req):
+    def require_representation(self, req, many=False):
         """Require raw representation dictionary from falcon request object.
 
         This does not perform any field parsing or validation but only uses
@@ -374,10 +406,16 @@ class BaseResource(metaclass=MetaResource):
 
         Args:
             req (falcon.Request): request object
+            many (bool): set to True if request body represents multiple
+                resources. In such case an iterable of representations is
+                returned and media handler may decode them incrementally.
 
         Returns:
             dict: raw dictionary of representation supplied in request body
 
+        .. versionchanged:: 0.7.0
+            Added the ``many`` keyword argument. Request body length is
+            limited with ``max_content_length``.
         """
         try:
             type_, subtype, _ = parse_mime_type(req.content_type)
@@ -388,8 +426,11 @@ class BaseResource(metaclass=MetaResource):
                     req.content_type
                 )
             )
-        return self.media_handler.handle_request(
-            req, content_type=content_type)
+        with phase('representation'):
+            return self.media_handler.handle_request(
+                req, content_type=content_type, many=many,
+                max_content_length=self.max_content_length,
+            )
 
     def require_validated(self, req, partial=False, bulk=False):
         """Require fully validated internal object dictionary.
@@ -410,34 +451,38 @@ class BaseResource(metaclass=MetaResource):
             dict: dictionary of fields and values representing internal object.
                 Each value is a result of ``field.from_representation`` call.
 
+        .. versionchanged:: 0.7.0
+            Deserialization and validation errors are stored in request
+            context under ``validation_error`` key.
         """
+        # note: in bulk mode media handler may yield representations
+        #       one by one so they can be validated while request body
+        #       is still being read and decoded.
         representations = [
             self.require_representation(req)
-        ] if not bulk else self.require_representation(req)
-
-        if bulk and not isinstance(representations, list):
-            raise ValidationError(
-                "Request payload should represent a list of resources."
-            ).as_bad_request()
+        ] if not bulk else self.require_representation(req, many=True)
 
         object_dicts = []
 
-        try:
-            for representation in representations:
-                object_dict = self.serializer.from_representation(
-                    representation
-                )
-                self.serializer.validate(object_dict, partial)
-                object_dicts.append(object_dict)
-
-        except DeserializationError as err:
-            # when working on Resource we know that we can finally raise
-            # bad request exceptions
-            raise err.as_bad_request()
-
-        except ValidationError as err:
-            # ValidationError is a suggested way to validate whole resource
-            # so we also are prepared to catch it
-            raise err.as_bad_request()
+        with phase('validation'):
+            try:
+                for representation in representations:
+                    object_dict = self.serializer.from_representation(
+                        representation
+                    )
+                    self.serializer.validate(object_dict, partial)
+                    object_dicts.append(object_dict)
+
+            except DeserializationError as err:
+                # when working on Resource we know that we can finally raise
+                # bad request exceptions
+                req.context['validation_error'] = err
+                raise err.as_bad_request()
+
+            except ValidationError as err:
+                # ValidationError is a suggested way to validate whole resource
+                # so we also are prepared to catch it
+                req.context['validation_error'] = err
+                raise err.as_bad_request()
 
         return object_dicts if bulk else object_dicts[0]
@@ -1,5 +1,7 @@
-from functools import partial
+import threading
 
+from graceful.coalescing import Batcher
+from graceful.media.json import RawJSON
 from graceful.resources.base import BaseResource
 from graceful.resources.mixins import (
     RetrieveMixin,
@@ -10,6 +12,29 @@ from graceful.resources.mixins import (
     PaginatedMixin,
     CreateBulkMixin
 )
+from graceful.timing import phase
+
+
+def _to_representation(serializer, obj):
+    """Represent object with serializer unless it is pre-encoded JSON."""
+    if isinstance(obj, RawJSON):
+        return obj
+
+    with phase('serialization'):
+        return serializer.to_representation(obj)
+
+
+def _to_representations(serializer, objects):
+    """Represent objects with serializer unless they are pre-encoded JSON."""
+    if isinstance(objects, RawJSON):
+        return objects
+
+    with phase('serialization'):
+        return [
+            obj if isinstance(obj, RawJSON)
+            else serializer.to_representation(obj)
+            for obj in objects
+        ]
 
 
 class Resource(RetrieveMixin, BaseResource):
@@ -83,8 +108,8 @@ class RetrieveAPI(RetrieveMixin, BaseResource):
         )
 
     def _retrieve(self, params, meta, **kwargs):
-        return self.serializer.to_representation(
-            self.retrieve(params, meta, **kwargs)
+        return _to_representation(
+            self.serializer, self.retrieve(params, meta, **kwargs)
         )
 
     def on_get(self, req, resp, **kwargs):
@@ -110,8 +135,8 @@ class RetrieveUpdateAPI(UpdateMixin, RetrieveAPI):
     """
 
     def _update(self, params, meta, **kwargs):
-        return self.serializer.to_representation(
-            self.update(params, meta, **kwargs)
+        return _to_representation(
+            self.serializer, self.update(params, meta, **kwargs)
         )
 
     def on_put(self, req, resp, **kwargs):
@@ -119,7 +144,7 @@ class RetrieveUpdateAPI(UpdateMixin, RetrieveAPI):
         validated = self.require_validated(req)
         return super().on_put(
             req, resp,
-            handler=partial(self._update, validated=validated),
+            handler=self._update, validated=validated,
             **kwargs
         )
 
@@ -155,10 +180,9 @@ class ListAPI(ListMixin, BaseResource):
     """
 
     def _list(self, params, meta, **kwargs):
-        return [
-            self.serializer.to_representation(obj)
-            for obj in self.list(params, meta, **kwargs)
-        ]
+        return _to_representations(
+            self.serializer, self.list(params, meta, **kwargs)
+        )
 
     def describe(self, req=None, resp=None, **kwargs):
         """Extend default endpoint description with serializer description."""
@@ -189,18 +213,99 @@ class ListCreateAPI(CreateMixin, CreateBulkMixin, ListAPI):
     * PATCH: create multiple resources from list of representations provided
       in request body (handled with ``.create_bulk()`` method handler.
 
+    Concurrent POST requests can be coalesced into single call of the
+    ``.create_coalesced()`` method handler (e.g. to create all resources in
+    single backend transaction) by setting the ``create_coalescing_window``
+    attribute. Every request still receives its own result serialized
+    individually.
+
+    .. versionchanged:: 0.7.0
+        Added optional coalescing of concurrent POST requests.
     """
 
+    #: Maximal time (in seconds) that ``create()`` call waits for other
+    #: concurrent POST requests to be coalesced with them into single
+    #: ``create_coalesced()`` call. Set to ``None`` to disable coalescing.
+    create_coalescing_window = None
+
+    #: Maximal number of POST requests coalesced into single call.
+    create_coalescing_size = 100
+
+    _batcher_lock = threading.Lock()
+
     def _create(self, params, meta, **kwargs):
-        return self.serializer.to_representation(
-            self.create(params, meta, **kwargs)
-        )
+        if self.create_coalescing_window is None:
+            obj = self.create(params, meta, **kwargs)
+        else:
+            obj = self._get_create_batcher().call((params, meta, kwargs))
+
+        return _to_representation(self.serializer, obj)
+
+    def _get_create_batcher(self):
+        batcher = self.__dict__.get('_create_batcher')
+
+        if batcher is None:
+            with ListCreateAPI._batcher_lock:
+                batcher = self.__dict__.get('_create_batcher')
+
+                if batcher is None:
+                    batcher = self._create_batcher = Batcher(
+                        self.create_coalesced,
+                        self.create_coalescing_window,
+                        self.create_coalescing_size,
+                    )
+
+        return batcher
+
+    def create_coalesced(self, calls):
+        """Create resources of multiple concurrent POST requests.
+
+        This method handler is used instead of ``.create()`` only if
+        ``create_coalescing_window`` is set. Override it to create all
+        resources with single backend call:
+
+        .. code-block:: python
+
+            class CatListResource(ListCreateAPI, with_context=True):
+                serializer = CatSerializer()
+                create_coalescing_window = 0.005
+
+                def create_coalesced(self, calls):
+                    return db.insert_cats([
+                        kwargs['validated'] for params, meta, kwargs in calls
+                    ])
+
+        Default implementation calls ``.create()`` separately for every
+        request. Note that requests are coalesced regardless of their
+        parameters, context and URI template values.
+
+        Args:
+            calls (list): list of ``(params, meta, kwargs)`` three-tuples
+                with arguments of the ``.create()`` call of every request.
+                The ``kwargs`` dictionary contains ``validated``
+                representation (and ``context`` for context-aware resources).
+
+        Returns:
+            list: created resource instances in the same order as calls.
+            Exception instance in place of resource instance is raised
+            in the corresponding request only.
+
+        .. versionadded:: 0.7.0
+        """
+        created = []
+
+        for params, meta, kwargs in calls:
+            try:
+                created.append(self.create(params, meta, **kwargs))
+            except Exception as err:
+                created.append(err)
+
+        return created
 
     def _create_bulk(self, params, meta, **kwargs):
-        return [
-            self.serializer.to_representation(obj)
-            for obj in self.create_bulk(params, meta, **kwargs)
-        ]
+        return _to_representations(
+            self.serializer, self.create_bulk(params, meta, **kwargs)
+        )
 
     def create_bulk(self, params, meta, **kwargs):
         """Create items in bulk by reusing existing ``.create()`` handler.
@@ -222,7 +327,7 @@ class ListCreateAPI(CreateMixin, CreateBulkMixin, ListAPI):
 
         return super().on_post(
             req, resp,
-            handler=partial(self._create, validated=validated),
+            handler=self._create, validated=validated,
             **kwargs
         )
 
@@ -232,7 +337,7 @@ class ListCreateAPI(CreateMixin, CreateBulkMixin, ListAPI):
 
         return super().on_patch(
             req, resp,
-            handler=partial(self._create_bulk, validated=validated),
+            handler=self._create_bulk, validated=validated,
             **kwargs
         )
 
@@ -1,13 +1,60 @@
-from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import json
+import threading
+import time
+import weakref
 
 import falcon
+from graceful.authentication import user_identity
+from graceful.coalescing import freeze
+from graceful.errors import JobQueueFull
 from graceful.parameters import IntParam
 from graceful.resources.base import BaseResource
+from graceful.timing import phase
 
 
 class BaseMixin:
     """Base mixin class."""
 
+    _handler_context = False
+
+    #: Job queue (:class:`graceful.jobs.JobQueue`) used by update (PUT)
+    #: and delete (DELETE) flows to perform their handlers in background.
+    #: If set to ``None`` then handlers are called before responding.
+    job_queue = None
+
+    #: URI template of the job status resource formatted with the
+    #: ``job_id`` value (e.g. ``/v1/jobs/{job_id}``). If set then
+    #: responses of background jobs include the ``Location`` header.
+    job_location = None
+
+    #: Single-flight group (:class:`graceful.coalescing.SingleFlight`) used
+    #: by retrieve and list (GET) flows to share single handler execution
+    #: and serialization between identical concurrent requests. If set to
+    #: ``None`` then every request is handled separately.
+    singleflight = None
+
+    #: Set to ``True`` to share handler executions only between requests
+    #: of the same user (``req.context['user']``). If set to ``None`` then
+    #: executions are shared per user only if handlers receive the request
+    #: context (``with_context=True``). Set to ``False`` to share them
+    #: between all users.
+    singleflight_per_user = None
+
+    #: Response cache (:class:`graceful.caching.ResponseCache`) used by
+    #: retrieve and list (GET) flows to serve serialized response bodies
+    #: without calling the handler. If set to ``None`` then responses are
+    #: not cached.
+    response_cache = None
+
+    #: Set to ``True`` to cache responses separately for every user
+    #: (``req.context['user']``). If set to ``None`` then responses are
+    #: cached per user only if handlers receive the request context
+    #: (``with_context=True``). Set to ``False`` to share cached responses
+    #: between all users.
+    cache_per_user = None
+
     def handle(self, handler, req, resp, **kwargs):
         """Handle given resource manipulation flow in consistent manner.
 
@@ -32,11 +79,12 @@ class BaseMixin:
         Returns:
              Content dictionary (preferably resource representation).
         """
-        params = self.require_params(req)
+        with phase('params'):
+            params = self.require_params(req)
 
         # future: remove in 1.x
-        if getattr(self, '_with_context', False):
-            handler = partial(handler, context=req.context)
+        if self._handler_context:
+            kwargs['context'] = req.context
 
         meta, content = self.require_meta_and_content(
             handler, params, **kwargs
@@ -44,6 +92,239 @@ class BaseMixin:
         self.make_body(resp, params, meta, content)
         return content
 
+    def handle_job(self, handler, req, resp, **kwargs):
+        """Handle given resource manipulation flow in background job.
+
+        Request parameters are decoded and validated immediately like in
+        ``handle()`` but the ``self.require_meta_and_content()`` call is
+        enqueued in ``self.job_queue``. Response body contains job
+        representation instead of handler result. Content returned by the
+        handler becomes the job result. The ``Location`` header
+        points to the job status resource if ``self.job_location`` is set.
+
+        Args:
+             handler (method): resource manipulation method handler.
+             req (falcon.Request): request object instance.
+             resp (falcon.Response): response object instance to be modified.
+             **kwargs: additional keyword arguments retrieved from url
+                 template.
+
+        Returns:
+             Job representation dictionary.
+
+        Raises:
+            falcon.HTTPServiceUnavailable: If job queue is full.
+
+        .. versionadded:: 0.7.0
+        """
+        with phase('params'):
+            params = self.require_params(req)
+
+        # future: remove in 1.x
+        if self._handler_context:
+            kwargs['context'] = req.context
+
+        try:
+            job = self.job_queue.submit(
+                _job_content, self, handler, params, kwargs
+            )
+        except JobQueueFull as err:
+            raise err.as_service_unavailable()
+
+        if self.job_location is not None:
+            resp.location = self.job_location.format(job_id=job.id)
+
+        content = job.as_dict()
+        self.make_body(resp, params, {'params': params}, content)
+        return content
+
+    def get_singleflight_key(self, req, params, **kwargs):
+        """Return key of requests that can share single handler execution.
+
+        Default key consists of resource instance, HTTP method, parameters,
+        URI template values and user object stored in request context
+        (if ``singleflight_per_user`` is set or it is ``None`` and the
+        resource handlers receive context).
+
+        Args:
+             req (falcon.Request): request object instance.
+             params (dict): dictionary of parsed parameters.
+             **kwargs: additional keyword arguments retrieved from url
+                 template.
+
+        Returns:
+             hashable key.
+
+        .. versionadded:: 0.7.0
+        """
+        per_user = self.singleflight_per_user
+
+        if per_user is None:
+            per_user = self._handler_context
+
+        return (
+            id(self), req.method, freeze(params), freeze(kwargs),
+            freeze(req.context.get('user')) if per_user else None,
+        )
+
+    def handle_singleflight(self, handler, req, resp, **kwargs):
+        """Handle given resource manipulation flow shared between requests.
+
+        This works like ``handle()`` but identical concurrent requests (with
+        the same ``self.get_singleflight_key()`` value) share single call of
+        handler and the same serialized response body. Handler receives
+        context of the request that started the shared execution.
+
+        Args:
+             handler (method): resource manipulation method handler.
+             req (falcon.Request): request object instance.
+             resp (falcon.Response): response object instance to be modified.
+             **kwargs: additional keyword arguments retrieved from url
+                 template.
+
+        Returns:
+             Content dictionary (preferably resource representation).
+
+        .. versionadded:: 0.7.0
+        """
+        with phase('params'):
+            params = self.require_params(req)
+
+        key = self.get_singleflight_key(req, params, **kwargs)
+
+        # future: remove in 1.x
+        if self._handler_context:
+            kwargs['context'] = req.context
+
+        (content_type, data, content), shared = self.singleflight.do(
+            key, self._render, handler, resp, params, kwargs
+        )
+
+        if shared:
+            resp.content_type = content_type
+            resp.data = data
+
+        return content
+
+    def get_cache_key(self, req, params, **kwargs):
+        """Return key of response cache entry of given request.
+
+        Default key consists of resource class path, HTTP method,
+        parameters, URI template values and identity of user stored in
+        request context (if ``cache_per_user`` is set or it is ``None`` and
+        the resource handlers receive context).
+
+        Args:
+             req (falcon.Request): request object instance.
+             params (dict): dictionary of parsed parameters.
+             **kwargs: additional keyword arguments retrieved from url
+                 template.
+
+        Returns:
+             str: cache key.
+
+        .. versionadded:: 0.7.0
+        """
+        per_user = self.cache_per_user
+
+        if per_user is None:
+            per_user = self._handler_context
+
+        key = '{}.{} {} {}'.format(
+            self.__class__.__module__, self.__class__.__qualname__,
+            req.method,
+            json.dumps([params, kwargs], sort_keys=True, default=_key_value),
+        )
+
+        if per_user:
+            key += ' ' + user_identity(req.context.get('user'))
+
+        return key
+
+    def handle_cached(self, handler, req, resp, **kwargs):
+        """Handle given resource manipulation flow using response cache.
+
+        This works like ``handle()`` but serialized response bodies are
+        stored in ``self.response_cache`` under the
+        ``self.get_cache_key()`` key and served from there. Stale entries
+        are refreshed in background with the handler receiving context of
+        the request that found the entry stale.
+
+        Args:
+             handler (method): resource manipulation method handler.
+             req (falcon.Request): request object instance.
+             resp (falcon.Response): response object instance to be modified.
+             **kwargs: additional keyword arguments retrieved from url
+                 template.
+
+        Returns:
+             str: cache event (``hit``, ``stale`` or ``miss``).
+
+        .. versionadded:: 0.7.0
+        """
+        with phase('params'):
+            params = self.require_params(req)
+
+        key = self.get_cache_key(req, params, **kwargs)
+
+        # future: remove in 1.x
+        if self._handler_context:
+            kwargs['context'] = req.context
+
+        buffer = _ResponseBuffer(
+            resp.content_type, getattr(resp, 'options', None)
+        )
+
+        def compute():
+            content_type, data, _ = self._render(
+                handler, buffer.copy(), params, kwargs
+            )
+            return content_type, data
+
+        resp.content_type, resp.data, event = self.response_cache.get(
+            key, compute
+        )
+        return event
+
+    def _render(self, handler, resp, params, kwargs):
+        meta, content = self.require_meta_and_content(
+            handler, params, **kwargs
+        )
+        data = self.make_body(resp, params, meta, content)
+
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        return resp.content_type, data, content
+
+
+class _ResponseBuffer:
+    """Response stand-in that collects serialized body outside of request."""
+
+    __slots__ = ('content_type', 'options', 'data', 'body')
+
+    def __init__(self, content_type, options):
+        self.content_type = content_type
+        self.options = options
+        self.data = None
+        self.body = None
+
+    def copy(self):
+        return _ResponseBuffer(self.content_type, self.options)
+
+
+def _key_value(value):
+    """Return JSON serializable equivalent of cache key value."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+
+    return str(value)
+
+
+def _job_content(resource, handler, params, kwargs):
+    """Call handler of background job and return its content."""
+    return resource.require_meta_and_content(handler, params, **kwargs)[1]
+
 
 class RetrieveMixin(BaseMixin):
     """Add default "retrieve flow on GET" to any resource class."""
@@ -88,10 +369,20 @@ class RetrieveMixin(BaseMixin):
             handler (method): list method handler to be called. Defaults
                 to ``self.list``.
             **kwargs: additional keyword arguments retrieved from url template.
+
+        .. versionchanged:: 0.7.0
+            Identical concurrent requests share single handler execution if
+            ``self.singleflight`` is set. Responses are served from
+            ``self.response_cache`` if it is set.
         """
-        self.handle(
-            handler or self.retrieve, req, resp, **kwargs
-        )
+        if self.response_cache is not None:
+            self.handle_cached(handler or self.retrieve, req, resp, **kwargs)
+        elif self.singleflight is not None:
+            self.handle_singleflight(
+                handler or self.retrieve, req, resp, **kwargs
+            )
+        else:
+            self.handle(handler or self.retrieve, req, resp, **kwargs)
 
 
 class ListMixin(BaseMixin):
@@ -136,10 +427,20 @@ class ListMixin(BaseMixin):
             handler (method): list method handler to be called. Defaults
                 to ``self.list``.
             **kwargs: additional keyword arguments retrieved from url template.
+
+        .. versionchanged:: 0.7.0
+            Identical concurrent requests share single handler execution if
+            ``self.singleflight`` is set. Responses are served from
+            ``self.response_cache`` if it is set.
         """
-        self.handle(
-            handler or self.list, req, resp, **kwargs
-        )
+        if self.response_cache is not None:
+            self.handle_cached(handler or self.list, req, resp, **kwargs)
+        elif self.singleflight is not None:
+            self.handle_singleflight(
+                handler or self.list, req, resp, **kwargs
+            )
+        else:
+            self.handle(handler or self.list, req, resp, **kwargs)
 
 
 class DeleteMixin(BaseMixin):
@@ -174,16 +475,25 @@ class DeleteMixin(BaseMixin):
         * Delete existing resource instance.
         * Set response status code to ``202 Accepted``.
 
+        If ``self.job_queue`` is set then deletion is performed in background
+        job and response contains job representation (see
+        ``handle_job()``).
+
         Args:
             req (falcon.Request): request object instance.
             resp (falcon.Response): response object instance to be modified
             handler (method): deletion method handler to be called. Defaults
                 to ``self.delete``.
             **kwargs: additional keyword arguments retrieved from url template.
+
+        .. versionchanged:: 0.7.0
+            Handler is performed in background job if ``self.job_queue``
+            is set.
         """
-        self.handle(
-            handler or self.delete, req, resp, **kwargs
-        )
+        if self.job_queue is not None:
+            self.handle_job(handler or self.delete, req, resp, **kwargs)
+        else:
+            self.handle(handler or self.delete, req, resp, **kwargs)
 
         resp.status = falcon.HTTP_ACCEPTED
 
@@ -224,16 +534,25 @@ class UpdateMixin(BaseMixin):
           calling its update method handler.
         * Set response status code to ``202 Accepted``.
 
+        If ``self.job_queue`` is set then update is performed in background
+        job and response contains job representation (see ``handle_job()``).
+
         Args:
             req (falcon.Request): request object instance.
             resp (falcon.Response): response object instance to be modified
             handler (method): update method handler to be called. Defaults
                 to ``self.update``.
             **kwargs: additional keyword arguments retrieved from url template.
+
+        .. versionchanged:: 0.7.0
+            Handler is performed in background job if ``self.job_queue``
+            is set.
         """
-        self.handle(
-            handler or self.update, req, resp, **kwargs
-        )
+        if self.job_queue is not None:
+            self.handle_job(handler or self.update, req, resp, **kwargs)
+        else:
+            self.handle(handler or self.update, req, resp, **kwargs)
+
         resp.status = falcon.HTTP_ACCEPTED
 
 
@@ -416,3 +735,159 @@ class PaginatedMixin(BaseResource):
         meta['next'] = "page={0}&page_size={1}".format(
             params['page'] + 1, params['page_size']
         ) if meta.get('has_more', True) else None
+
+
+class FanOutMixin(BaseResource):
+    """Add concurrent execution of independent subqueries to resource.
+
+    Handlers that aggregate data from several independent blocking backends
+    can use the ``fan_out()`` method to run such subqueries concurrently on
+    a bounded thread pool instead of calling them one after another. Total
+    handler latency is then close to the latency of the slowest subquery
+    instead of the sum of all latencies.
+
+    Example usage:
+
+    .. code-block:: python
+
+        from graceful.resources.mixins import FanOutMixin
+        from graceful.resources.generic import Resource
+
+        class DashboardResource(FanOutMixin, Resource):
+            subquery_timeout = 0.5
+
+            def retrieve(self, params, meta, **kwargs):
+                return self.fan_out(
+                    {
+                        'users': users_backend.count,
+                        'orders': orders_backend.recent,
+                    },
+                    params, meta, **kwargs
+                )
+
+    Every subquery is called with the same arguments as the resource
+    manipulation method handler (``params, meta, **kwargs``). Each subquery
+    gets its own ``meta`` dictionary that is merged into the handler's
+    ``meta`` once the subquery completes so subqueries never modify shared
+    state concurrently.
+
+    Every resource class gets its own thread pool so slow backends of one
+    resource cannot starve subqueries of other resources. Note that
+    subqueries that did not complete in time cannot be interrupted. They
+    keep running and occupy threads of the pool until they return.
+
+    .. versionadded:: 0.7.0
+    """
+
+    #: Executor used to run subqueries. If set to ``None`` then the thread
+    #: pool of the resource class is used.
+    fan_out_executor = None
+
+    #: Maximum number of threads of the thread pool of the resource class.
+    fan_out_max_workers = 16
+
+    #: Maximum time (in seconds) to wait for any of subqueries. Set to
+    #: ``None`` to wait until all subqueries complete.
+    subquery_timeout = None
+
+    _fan_out_pools = weakref.WeakKeyDictionary()
+    _fan_out_pools_lock = threading.Lock()
+
+    def get_fan_out_executor(self):
+        """Return executor used to run subqueries.
+
+        Returns:
+            concurrent.futures.Executor: ``fan_out_executor`` if set or the
+            thread pool of the resource class with ``fan_out_max_workers``
+            threads.
+        """
+        if self.fan_out_executor is not None:
+            return self.fan_out_executor
+
+        cls = self.__class__
+        pool = FanOutMixin._fan_out_pools.get(cls)
+
+        if pool is None:
+            with FanOutMixin._fan_out_pools_lock:
+                pool = FanOutMixin._fan_out_pools.get(cls)
+
+                if pool is None:
+                    pool = FanOutMixin._fan_out_pools[cls] = (
+                        ThreadPoolExecutor(self.fan_out_max_workers)
+                    )
+
+        return pool
+
+    def fan_out(self, subqueries, params, meta, timeout=None, **kwargs):
+        """Run independent subqueries concurrently and merge their results.
+
+        Latency of every subquery (in milliseconds) is recorded in
+        the ``meta['subqueries']`` dictionary.
+
+        Args:
+            subqueries (dict): mapping of content keys to subquery callables
+                accepting ``params, meta, **kwargs`` arguments.
+            params (dict): dictionary of parsed resource parameters.
+            meta (dict): dictionary of meta values of the response.
+            timeout (float): maximum time (in seconds) to wait for every
+                subquery. Defaults to ``subquery_timeout``.
+            **kwargs: additional keyword arguments passed to subqueries.
+
+        Returns:
+            dict: mapping of content keys to values returned by subqueries.
+
+        Raises:
+            falcon.HTTPGatewayTimeout: If any subquery did not complete
+                in time. Subqueries that are already running are not
+                interrupted and complete in background.
+        """
+        if timeout is None:
+            timeout = self.subquery_timeout
+
+        executor = self.get_fan_out_executor()
+        futures = {
+            key: executor.submit(
+                _timed_subquery, subquery, params, **kwargs
+            )
+            for key, subquery in subqueries.items()
+        }
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        content = {}
+        latencies = meta.setdefault('subqueries', {})
+
+        try:
+            for key, future in futures.items():
+                result, subquery_meta, latency = future.result(
+                    None if deadline is None
+                    else max(deadline - time.perf_counter(), 0)
+                )
+                meta.update(subquery_meta)
+                content[key] = result
+                latencies[key] = {'latency_ms': latency}
+
+        except FutureTimeoutError:
+            raise falcon.HTTPGatewayTimeout(
+                'Subquery timeout',
+                "Subquery '{}' did not complete within {} seconds".format(
+                    key, timeout
+                )
+            )
+
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+        return content
+
+
+def _timed_subquery(subquery, params, **kwargs):
+    """Call subquery with its own meta and measure its latency in ms."""
+    meta = {'params': params}
+
+    start = time.perf_counter()
+    result = subquery(params, meta, **kwargs)
+    latency = round((time.perf_counter() - start) * 1000, 3)
+
+    del meta['params']
+    return result, meta, latency
@@ -1,6 +1,8 @@
 from collections import OrderedDict
 from collections.abc import Mapping, MutableMapping
+from types import CodeType
 
+from graceful.context import context_var
 from graceful.errors import DeserializationError
 from graceful.fields import BaseField
 
@@ -17,6 +19,55 @@ def _source(name, field):
         return field.source or name
 
 
+_FIELD_REPRESENTERS = {}
+
+# note: flag of the request profiled with field attribution (managed by
+#       graceful.profiling.Profiler) so other concurrent requests are not
+#       slowed down while any request is profiled
+_field_attribution = context_var('graceful_field_attribution', False)
+
+
+def _renamed(code, name):
+    """Return copy of function code object with different name."""
+    try:
+        return code.replace(co_name=name)
+    except AttributeError:  # pragma: nocover
+        # compat: code.replace() is available since Python 3.8
+        return CodeType(
+            code.co_argcount, code.co_kwonlyargcount, code.co_nlocals,
+            code.co_stacksize, code.co_flags, code.co_code, code.co_consts,
+            code.co_names, code.co_varnames, code.co_filename, name,
+            code.co_firstlineno, code.co_lnotab, code.co_freevars,
+            code.co_cellvars,
+        )
+
+
+def _field_representer(serializer_class, name, field):
+    """Return function named after serializer field that represents values.
+
+    Every field gets its own copy of function code named after the
+    serializer and the field (e.g. ``CatSerializer.name``) so profilers
+    (e.g. ``cProfile``) report time of every field separately.
+    """
+    key = serializer_class, name
+
+    try:
+        return _FIELD_REPRESENTERS[key]
+    except KeyError:
+        pass
+
+    def represent(value):
+        if field.many:
+            return [field.to_representation(item) for item in value]
+        return field.to_representation(value)
+
+    represent.__code__ = _renamed(
+        represent.__code__, '{}.{}'.format(serializer_class.__name__, name)
+    )
+    _FIELD_REPRESENTERS[key] = represent
+    return represent
+
+
 class MetaSerializer(type):
     """Metaclass for handling serialization with field objects."""
 
@@ -114,7 +165,14 @@ class BaseSerializer(metaclass=MetaSerializer):
         Returns:
             dict: representation dictionary
 
+        .. versionchanged:: 0.7.0
+            Fields are represented with functions named after fields in
+            requests profiled with field attribution (see
+            :class:`graceful.profiling.Profiler`).
         """
+        if _field_attribution.get():
+            return self._to_representation_by_field(obj)
+
         representation = {}
 
         for name, field in self.fields.items():
@@ -137,6 +195,25 @@ class BaseSerializer(metaclass=MetaSerializer):
 
         return representation
 
+    def _to_representation_by_field(self, obj):
+        """Convert object to representation attributing time to fields."""
+        representation = {}
+
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+
+            attribute = self.get_attribute(obj, field.source or name)
+
+            if attribute is None:
+                representation[name] = [] if field.many else None
+            else:
+                representation[name] = _field_representer(
+                    self.__class__, name, field
+                )(attribute)
+
+        return representation
+
     def from_representation(self, representation):
         """Convert given representation dict into internal object.
 
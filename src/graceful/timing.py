@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""Per-phase request timing instrumentation.
+
+Graceful resources and authentication middlewares measure their processing
+phases with :func:`phase` context managers. Measurements are recorded only
+for requests handled while the :class:`ServerTiming` middleware is
+installed. Otherwise :func:`phase` returns a shared no-op context manager
+so the instrumentation overhead is negligible.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+from graceful.context import context_var
+
+
+_current = context_var('graceful_timings')
+
+
+class _NoTiming:
+    """Shared no-op context manager used when timing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_TIMING = _NoTiming()
+
+
+class _Phase:
+    """Context manager that measures single phase of given timings."""
+
+    __slots__ = ('timings', 'name')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.timings.start(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.stop()
+        return False
+
+
+class Timings:
+    """Recorder of processing phase durations of a single request.
+
+    Phases may be nested. Time of nested phase is not included in the
+    duration of the outer phase so durations of all phases never add up
+    to more than the total request processing time. Phases with the same
+    name are accumulated.
+
+    Args:
+        timer (callable): function returning current time in seconds.
+        meta (bool): if set to ``True`` then durations are included in
+            the ``meta`` section of response under ``timings`` key.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, timer=time.perf_counter, meta=False):
+        """Initialize timings recorder and start measuring total time."""
+        self.timer = timer
+        self.meta = meta
+        self.durations = OrderedDict()
+        self.started = timer()
+        self._stack = []
+
+    def start(self, name):
+        """Start measuring phase with given name.
+
+        Args:
+            name (str): phase name.
+        """
+        self._stack.append([name, self.timer(), 0])
+
+    def stop(self):
+        """Stop measuring most recently started phase."""
+        name, started, nested = self._stack.pop()
+        elapsed = self.timer() - started
+
+        self.durations[name] = (
+            self.durations.get(name, 0) + elapsed - nested
+        )
+
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def phase(self, name):
+        """Return context manager that measures phase with given name.
+
+        Args:
+            name (str): phase name.
+        """
+        return _Phase(self, name)
+
+    def as_dict(self, total=False):
+        """Return phase durations in milliseconds.
+
+        Args:
+            total (bool): if set to ``True`` then time elapsed since the
+                recorder was created is included under ``total`` key.
+
+        Returns:
+            OrderedDict: phase durations in milliseconds keyed by phase name.
+        """
+        durations = OrderedDict(
+            (name, round(seconds * 1000, 3))
+            for name, seconds in self.durations.items()
+        )
+
+        if total:
+            durations['total'] = round(
+                (self.timer() - self.started) * 1000, 3
+            )
+
+        return durations
+
+
+def current():
+    """Return timings recorder of currently processed request.
+
+    Returns:
+        Timings: timings recorder or ``None`` if timing is disabled.
+
+    .. versionadded:: 0.7.0
+    """
+    return _current.get(None)
+
+
+def phase(name):
+    """Return context manager that measures phase of current request.
+
+    .. code-block:: python
+
+        from graceful import timing
+
+        class CatResource(RetrieveAPI):
+            def retrieve(self, params, meta, **kwargs):
+                with timing.phase('db'):
+                    return db.get_cat(params['cat_id'])
+
+    Args:
+        name (str): phase name.
+
+    .. versionadded:: 0.7.0
+    """
+    timings = _current.get(None)
+
+    if timings is None:
+        return _NO_TIMING
+
+    return _Phase(timings, name)
+
+
+class BaseTimingSink:
+    """Base timing sink class that receives timings of every request.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def record(self, timings, req, resp):
+        """Record phase timings of single request.
+
+        Args:
+            timings (OrderedDict): phase durations in milliseconds including
+                the ``total`` request processing time.
+            req (falcon.Request): request object.
+            resp (falcon.Response): response object.
+        """
+        raise NotImplementedError  # pragma: nocover
+
+
+class HistogramSink(BaseTimingSink):
+    """In-memory histogram of phase durations.
+
+    Args:
+        buckets (iterable): sorted upper bounds (in milliseconds) of
+            histogram buckets. Durations greater than the last bound are
+            counted in an additional overflow bucket.
+
+    .. versionadded:: 0.7.0
+    """
+
+    #: Default bucket bounds in milliseconds
+    default_buckets = (
+        0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500,
+        5000, 10000,
+    )
+
+    def __init__(self, buckets=None):
+        """Initialize empty histogram."""
+        self.buckets = tuple(buckets or self.default_buckets)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings, req, resp):
+        """Add phase durations of single request to histograms."""
+        with self._lock:
+            for name, duration in timings.items():
+                try:
+                    histogram = self._histograms[name]
+                except KeyError:
+                    histogram = self._histograms[name] = {
+                        'count': 0,
+                        'sum': 0,
+                        'counts': [0] * (len(self.buckets) + 1),
+                    }
+
+                histogram['count'] += 1
+                histogram['sum'] += duration
+                histogram['counts'][bisect_left(self.buckets, duration)] += 1
+
+    def snapshot(self):
+        """Return copy of recorded histograms.
+
+        Returns:
+            dict: histograms keyed by phase name. Every histogram is a
+            dictionary with ``count``, ``sum`` (in milliseconds) and
+            ``buckets`` keys. Buckets are list of ``(bound, count)``
+            two-tuples where the last bound is ``float('inf')``.
+        """
+        bounds = self.buckets + (float('inf'),)
+
+        with self._lock:
+            return {
+                name: {
+                    'count': histogram['count'],
+                    'sum': histogram['sum'],
+                    'buckets': list(zip(bounds, histogram['counts'])),
+                }
+                for name, histogram in self._histograms.items()
+            }
+
+    def percentile(self, name, percent):
+        """Estimate percentile of phase duration.
+
+        Args:
+            name (str): phase name.
+            percent (float): percentile (``0-100``).
+
+        Returns:
+            float: upper bound (in milliseconds) of the bucket that contains
+            requested percentile or ``None`` if phase was never recorded.
+        """
+        histogram = self.snapshot().get(name)
+
+        if not histogram:
+            return None
+
+        threshold = histogram['count'] * percent / 100
+        seen = 0
+
+        for bound, count in histogram['buckets']:
+            seen += count
+            if seen >= threshold:
+                return bound
+
+    def clear(self):
+        """Remove all recorded histograms."""
+        with self._lock:
+            self._histograms.clear()
+
+
+class LoggingSink(BaseTimingSink):
+    """Timing sink that logs phase durations of every request.
+
+    Args:
+        logger (logging.Logger): logger instance. Defaults to the
+            ``graceful.timing`` logger.
+        level (int): logging level.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        """Initialize logging sink."""
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def record(self, timings, req, resp):
+        """Log phase durations of single request."""
+        if not self.logger.isEnabledFor(self.level):
+            return
+
+        self.logger.log(
+            self.level, "%s %s %s", req.method, req.path, ' '.join(
+                '{}={}ms'.format(name, duration)
+                for name, duration in timings.items()
+            )
+        )
+
+
+class ServerTiming:
+    """Middleware that measures processing phases of every request.
+
+    Following phases of graceful resources are measured:
+
+    * ``authentication``: processing of authentication middlewares,
+    * ``params``: ``require_params()`` call,
+    * ``representation``: decoding of request body in
+      ``require_representation()``,
+    * ``validation``: deserialization and validation of representations in
+      ``require_validated()``,
+    * ``handler``: resource manipulation method handler (e.g. ``retrieve()``)
+      excluding serialization of its result,
+    * ``serialization``: ``serializer.to_representation()`` calls of generic
+      API resources,
+    * ``render``: encoding of response body with media handler.
+
+    Bulk representations may be decoded incrementally while they are
+    validated. In such case their decoding time is a part of the
+    ``validation`` phase.
+
+    Additional phases can be measured with the :func:`phase` context manager.
+
+    .. code-block:: python
+
+        import falcon
+        from graceful import timing
+
+        histogram = timing.HistogramSink()
+
+        api = application = falcon.API(middleware=[
+            timing.ServerTiming(sink=histogram),
+            authentication.Token(user_storage),
+        ])
+
+    Durations of phases (and total processing time) are included in the
+    ``Server-Timing`` response header and passed to the optional sink.
+    They can also be included in the ``meta`` section of response body.
+    Note that ``render`` phase cannot be included in ``meta`` because body
+    is encoded after ``meta`` is complete.
+
+    Timings are stored in context variables (or thread-local storage
+    on Python versions older than 3.7) so phases executed in other threads
+    (e.g. in executors) are not measured.
+
+    Args:
+        header (bool): include timings in the ``Server-Timing`` header.
+        meta (bool): include timings in the ``meta`` section of response
+            under ``timings`` key.
+        sink (BaseTimingSink): optional sink object that receives timings
+            of every request.
+        timer (callable): function returning current time in seconds.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(
+        self, header=True, meta=False, sink=None, timer=time.perf_counter
+    ):
+        """Initialize timing middleware."""
+        self.header = header
+        self.meta = meta
+        self.sink = sink
+        self.timer = timer
+
+    def process_request(self, req, resp):
+        """Start measuring request processing.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+        """
+        timings = Timings(self.timer, self.meta)
+        req.context['timings'] = timings
+        _current.set(timings)
+
+    def process_response(self, req, resp, resource=None, req_succeeded=True):
+        """Finish measuring and publish timings of the request.
+
+        Args:
+            req (falcon.Request): request object
+            resp (falcon.Response): response object
+            resource (object): resource object matched by falcon router
+            req_succeeded (bool): ``True`` if no exceptions were raised.
+        """
+        _current.set(None)
+        timings = req.context.get('timings')
+
+        if timings is None:
+            return
+
+        durations = timings.as_dict(total=True)
+
+        if self.header:
+            resp.set_header('Server-Timing', ', '.join(
+                '{};dur={}'.format(name, duration)
+                for name, duration in durations.items()
+            ))
+
+        if self.sink is not None:
+            self.sink.record(durations, req, resp)
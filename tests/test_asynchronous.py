@@ -0,0 +1,306 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+
+import pytest
+
+import falcon
+from falcon.testing import create_environ
+
+from graceful.serializers import BaseSerializer
+from graceful.fields import RawField, IntField
+from graceful.asynchronous import authentication
+from graceful.asynchronous.mixins import resolve
+from graceful.media.encoding import HTTPRequestEntityTooLarge
+from graceful.asynchronous.generic import (
+    AsyncRetrieveAPI,
+    AsyncRetrieveUpdateDeleteAPI,
+    AsyncListCreateAPI,
+    AsyncPaginatedListAPI,
+)
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def body_request(body, method='POST', **kwargs):
+    return falcon.Request(create_environ(
+        method=method, body=json.dumps(body),
+        headers={'Content-Type': 'application/json'}, **kwargs
+    ))
+
+
+class ExampleSerializer(BaseSerializer):
+    name = RawField("name of the object")
+    number = IntField("number of the object")
+
+
+class ExampleRetrieveAPI(AsyncRetrieveUpdateDeleteAPI):
+    serializer = ExampleSerializer()
+
+    async def retrieve(self, params, meta, **kwargs):
+        await asyncio.sleep(0)
+        return {'name': 'foo', 'number': 1}
+
+    def update(self, params, meta, validated, **kwargs):
+        return validated
+
+    async def delete(self, params, meta, **kwargs):
+        meta['deleted'] = True
+
+
+class ExampleListCreateAPI(AsyncListCreateAPI):
+    serializer = ExampleSerializer()
+
+    def __init__(self):
+        self.storage = []
+
+    async def list(self, params, meta, **kwargs):
+        await asyncio.sleep(0)
+        return self.storage
+
+    async def create(self, params, meta, validated, **kwargs):
+        self.storage.append(validated)
+        return validated
+
+
+@pytest.mark.parametrize('value', [1, asyncio.sleep(0, result=1)])
+def test_resolve(value):
+    assert run(resolve(value)) == 1
+
+
+def test_async_retrieve(req, resp):
+    run(ExampleRetrieveAPI().on_get(req, resp))
+
+    assert json.loads(resp.body)['content'] == {'name': 'foo', 'number': 1}
+
+
+def test_async_with_context(req, resp):
+    class ContextRetrieveAPI(AsyncRetrieveAPI, with_context=True):
+        serializer = ExampleSerializer()
+
+        def retrieve(self, params, meta, context, **kwargs):
+            return {'name': context['name']}
+
+    req.context['name'] = 'bar'
+    run(ContextRetrieveAPI().on_get(req, resp))
+
+    assert json.loads(resp.body)['content']['name'] == 'bar'
+
+
+def test_async_update(resp):
+    req = body_request({'name': 'bar', 'number': 2}, method='PUT')
+    run(ExampleRetrieveAPI().on_put(req, resp))
+
+    assert resp.status == falcon.HTTP_ACCEPTED
+    assert json.loads(resp.body)['content'] == {'name': 'bar', 'number': 2}
+
+
+def test_async_delete(req, resp):
+    run(ExampleRetrieveAPI().on_delete(req, resp))
+
+    assert resp.status == falcon.HTTP_ACCEPTED
+    assert json.loads(resp.body)['meta']['deleted'] is True
+
+
+def test_async_create_and_list(req, resp):
+    resource = ExampleListCreateAPI()
+
+    run(resource.on_post(body_request({'name': 'foo', 'number': 1}), resp))
+    assert resp.status == falcon.HTTP_CREATED
+
+    run(resource.on_patch(
+        body_request([{'name': 'bar', 'number': 2}], method='PATCH'), resp
+    ))
+    assert resp.status == falcon.HTTP_CREATED
+    assert json.loads(resp.body)['content'] == [{'name': 'bar', 'number': 2}]
+
+    run(resource.on_get(req, resp))
+    assert json.loads(resp.body)['content'] == [
+        {'name': 'foo', 'number': 1},
+        {'name': 'bar', 'number': 2},
+    ]
+
+
+def test_async_create_bulk_requires_list(resp):
+    req = body_request({'name': 'bar', 'number': 2}, method='PATCH')
+
+    with pytest.raises(falcon.HTTPBadRequest):
+        run(ExampleListCreateAPI().on_patch(req, resp))
+
+
+def test_async_require_body_limit(resp):
+    resource = ExampleListCreateAPI()
+    resource.max_content_length = 10
+
+    with pytest.raises(HTTPRequestEntityTooLarge):
+        run(resource.on_post(
+            body_request({'name': 'foo' * 10, 'number': 1}), resp
+        ))
+
+    assert resource.storage == []
+
+
+def test_async_paginated_list(resp):
+    class ExamplePaginatedListAPI(AsyncPaginatedListAPI):
+        serializer = ExampleSerializer()
+
+        async def list(self, params, meta, **kwargs):
+            return [{'name': 'foo', 'number': 1}]
+
+    req = falcon.Request(create_environ(query_string='page=1&page_size=1'))
+    run(ExamplePaginatedListAPI().on_get(req, resp))
+
+    body = json.loads(resp.body)
+    assert body['meta']['page'] == 1
+    assert body['meta']['page_size'] == 1
+    assert len(body['content']) == 1
+
+
+def test_async_serialization_offload(req, resp, mocker):
+    resource = ExampleListCreateAPI()
+    resource.storage = [{'name': 'foo', 'number': i} for i in range(10)]
+    resource.serialization_executor = ThreadPoolExecutor(1)
+    resource.serialization_offload_threshold = 5
+
+    loop = asyncio.get_event_loop()
+    mocker.spy(loop, 'run_in_executor')
+
+    run(resource.on_get(req, resp))
+
+    assert len(json.loads(resp.body)['content']) == 10
+    # note: both representation and body serialization are offloaded
+    assert loop.run_in_executor.call_count == 2
+
+
+def test_async_options(req, resp):
+    run(ExampleListCreateAPI().on_options(req, resp))
+
+    assert 'POST' in json.loads(resp.body)['methods']
+
+
+class SyncKVStore(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+class AsyncKVStore(dict):
+    async def get(self, key):
+        return super().get(key)
+
+    async def set(self, key, value):
+        self[key] = value
+
+
+@pytest.mark.parametrize('kv_store_class', [SyncKVStore, AsyncKVStore])
+def test_async_auth_with_storage(kv_store_class, resp):
+    storage = authentication.AsyncKeyValueUserStorage(kv_store_class())
+    run(storage.register(
+        authentication.XAPIKey(user_storage=storage), 'secret', {'id': 1}
+    ))
+
+    middleware = authentication.XAPIKey(user_storage=storage)
+
+    req = falcon.Request(create_environ(headers={'X-Api-Key': 'secret'}))
+    run(middleware.process_resource_async(req, resp, None))
+    assert req.context['user'] == {'id': 1}
+
+    req = falcon.Request(create_environ(headers={'X-Api-Key': 'invalid'}))
+    run(middleware.process_resource_async(req, resp, None))
+    assert 'user' not in req.context
+    assert req.context['challenges'] == ['X-Api-Key']
+
+
+def test_async_auth_skips_identified_user(req, resp):
+    req.context['user'] = {'id': 1}
+    run(authentication.Anonymous({'id': 2}).process_resource_async(
+        req, resp, None
+    ))
+
+    assert req.context['user'] == {'id': 1}
+
+
+@pytest.mark.parametrize('remote_address_fallback', [True, False])
+def test_async_x_forwarded_for_fallback(remote_address_fallback, req, resp):
+    middleware = authentication.XForwardedFor(
+        remote_address_fallback=remote_address_fallback
+    )
+    run(middleware.process_resource_async(req, resp, None))
+
+    if remote_address_fallback:
+        assert req.context['user']['identifier'] == req.remote_addr
+    else:
+        assert 'user' not in req.context
+
+    req = falcon.Request(create_environ(
+        headers={'X-Forwarded-For': '10.0.0.1, 127.0.0.1'}
+    ))
+    run(middleware.process_resource_async(req, resp, None))
+    assert req.context['user']['identifier'] == '10.0.0.1'
+
+
+def test_async_composite_authentication(resp):
+    storage = authentication.AsyncKeyValueUserStorage(AsyncKVStore())
+    middlewares = [
+        authentication.Token(user_storage=storage),
+        authentication.XAPIKey(user_storage=storage),
+    ]
+    run(storage.register(middlewares[1], 'secret', {'id': 1}))
+    composite = authentication.CompositeAuthentication(middlewares)
+
+    req = falcon.Request(create_environ(headers={'X-Api-Key': 'secret'}))
+    run(composite.process_resource_async(req, resp, None))
+    assert req.context['user'] == {'id': 1}
+    assert req.context['challenges'] == ['Token']
+
+    req = falcon.Request(create_environ(headers={'X-Api-Key': 'invalid'}))
+    run(composite.process_resource_async(req, resp, None))
+    assert 'user' not in req.context
+    assert req.context['challenges'] == ['Token', 'X-Api-Key']
+
+
+def test_async_permission_policy(req, resp):
+    from graceful.asynchronous.authorization import PermissionPolicy
+
+    class CatsResource:
+        required_permissions = {'GET': 'cats:read'}
+
+    policy = PermissionPolicy(lambda user: set())
+    req.context['user'] = {'id': 1}
+
+    with pytest.raises(falcon.HTTPForbidden):
+        run(policy.check(req, resp, CatsResource(), {}))
+
+
+def test_async_server_timing(req, resp):
+    from graceful import timing as sync_timing
+    from graceful.asynchronous.timing import ServerTiming
+
+    middleware = ServerTiming()
+
+    async def process():
+        # note: every run() call is a separate task with its own context
+        #       so whole request must be processed within a single call
+        await middleware.process_request_async(req, resp)
+        await ExampleRetrieveAPI().on_get(req, resp)
+        await middleware.process_response_async(req, resp, None, True)
+
+    run(process())
+
+    assert 'handler;dur=' in resp._headers['server-timing']
+    assert sync_timing.current() is None
+
+
+def test_async_server_timing_asgi_app():
+    asgi = pytest.importorskip('falcon.asgi')
+    from falcon import testing
+    from graceful.asynchronous.timing import ServerTiming
+
+    app = asgi.App(middleware=[ServerTiming()])
+    app.add_route('/', ExampleRetrieveAPI())
+    result = testing.TestClient(app).simulate_get('/')
+
+    assert result.json['content'] == {'name': 'foo', 'number': 1}
+    assert 'handler;dur=' in result.headers['server-timing']
+    assert 'serialization;dur=' in result.headers['server-timing']
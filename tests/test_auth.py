@@ -2,9 +2,15 @@
 import base64
 import pytest
 import hashlib
-
-from falcon.testing import TestBase
-from falcon import API
+import ipaddress
+from random import Random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from falcon import testing
+from falcon.testing import TestBase, create_environ
+from falcon import API, Request, HTTPBadRequest
 from falcon import status_codes
 
 from graceful.resources.base import BaseResource
@@ -306,3 +312,664 @@ class MultipleAuthTestCase(AuthTestsMixin, TestBase):
 
     def get_authorized_headers(self):
         return {"Authorization": "Token " + self.user['password']}
+
+
+class CachedTokenAuthTestCase(TokenAuthTestCase):
+    class CachedUserStorage(authentication.CachedUserStorage):
+        def clear(self):
+            super().clear()
+            self.user_storage.clear()
+
+    auth_storage = CachedUserStorage(ExampleKVUserStorage())
+    auth_middleware = [authentication.Token(auth_storage)]
+
+
+class CountingUserStorage(authentication.BaseUserStorage):
+    def __init__(self, users):
+        self.users = users
+        self.calls = 0
+
+    def get_user(
+        self, identified_with, identifier, req, resp, resource, uri_kwargs
+    ):
+        self.calls += 1
+        return self.users.get(str(identifier))
+
+    def register(self, identified_with, identifier, user):
+        self.users[identifier] = user
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cached_user_storage_ttl():
+    timer = FakeTimer()
+    backend = CountingUserStorage({'token': {'id': 1}})
+    storage = authentication.CachedUserStorage(
+        backend, ttl=10, negative_ttl=1, timer=timer
+    )
+    middleware = authentication.Token(storage)
+
+    def get_user(identifier):
+        return storage.get_user(middleware, identifier, None, None, None, {})
+
+    assert get_user('token') == {'id': 1}
+    assert get_user('token') == {'id': 1}
+    assert backend.calls == 1
+
+    assert get_user('invalid') is None
+    assert get_user('invalid') is None
+    assert backend.calls == 2
+
+    # note: misses expire sooner than hits
+    timer.now = 5
+    assert get_user('invalid') is None
+    assert get_user('token') == {'id': 1}
+    assert backend.calls == 3
+
+    timer.now = 11
+    assert get_user('token') == {'id': 1}
+    assert backend.calls == 4
+
+
+def test_cached_user_storage_lru_eviction():
+    backend = CountingUserStorage({'a': 'A', 'b': 'B', 'c': 'C'})
+    storage = authentication.CachedUserStorage(backend, max_size=2)
+    middleware = authentication.Token(storage)
+
+    def get_user(identifier):
+        return storage.get_user(middleware, identifier, None, None, None, {})
+
+    get_user('a')
+    get_user('b')
+    # note: refresh 'a' so 'b' becomes least recently used
+    get_user('a')
+    get_user('c')
+    assert backend.calls == 3
+
+    get_user('a')
+    assert backend.calls == 3
+    get_user('b')
+    assert backend.calls == 4
+
+
+def test_cached_user_storage_register_invalidates():
+    backend = CountingUserStorage({})
+    storage = authentication.CachedUserStorage(backend)
+    middleware = authentication.Token(storage)
+
+    assert storage.get_user(middleware, 'new', None, None, None, {}) is None
+
+    storage.register(middleware, 'new', {'id': 2})
+    assert storage.get_user(middleware, 'new', None, None, None, {}) == {
+        'id': 2
+    }
+
+
+def test_cached_user_storage_unhashable_identifier():
+    backend = CountingUserStorage({})
+    storage = authentication.CachedUserStorage(backend)
+    middleware = authentication.Token(storage)
+
+    storage.get_user(middleware, ['unhashable'], None, None, None, {})
+    storage.get_user(middleware, ['unhashable'], None, None, None, {})
+    assert backend.calls == 2
+    storage.invalidate(middleware, ['unhashable'])
+
+
+class CountingKVStore(dict):
+    """In-memory key-value store that counts round-trips."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.round_trips = []
+
+    def set(self, key, value):
+        self[key] = value
+
+    def mget(self, keys):
+        self.round_trips.append(list(keys))
+        return [super(CountingKVStore, self).get(key) for key in keys]
+
+
+def concurrent_lookups(storage, identifiers):
+    middleware = authentication.Token(storage)
+    barrier = threading.Barrier(len(identifiers))
+
+    def lookup(identifier):
+        barrier.wait()
+        return storage.get_user(middleware, identifier, None, None, None, {})
+
+    with ThreadPoolExecutor(len(identifiers)) as executor:
+        return list(executor.map(lookup, identifiers))
+
+
+@pytest.fixture
+def coalescing_storage():
+    storage = authentication.CoalescingKeyValueUserStorage(
+        CountingKVStore(), batch_window=0.1
+    )
+    middleware = authentication.Token(storage)
+
+    for identifier in range(10):
+        storage.register(middleware, str(identifier), {'id': identifier})
+
+    return storage
+
+
+def test_coalescing_storage_identical_lookups(coalescing_storage):
+    users = concurrent_lookups(coalescing_storage, ['1'] * 20)
+
+    assert users == [{'id': 1}] * 20
+    assert coalescing_storage.kv_store.round_trips == [['users:Token:1']]
+    # note: every request gets its own deserialized user object
+    assert len({id(user) for user in users}) == 20
+
+
+def test_coalescing_storage_batches_lookups(coalescing_storage):
+    identifiers = [str(identifier) for identifier in range(10)] + ['missing']
+    users = concurrent_lookups(coalescing_storage, identifiers)
+
+    assert users == [{'id': identifier} for identifier in range(10)] + [None]
+    assert len(coalescing_storage.kv_store.round_trips) == 1
+    assert len(coalescing_storage.kv_store.round_trips[0]) == 11
+
+
+def test_coalescing_storage_max_batch_size(coalescing_storage):
+    coalescing_storage.batch_window = 5
+    coalescing_storage.max_batch_size = 5
+
+    start = time.perf_counter()
+    concurrent_lookups(
+        coalescing_storage, [str(identifier) for identifier in range(10)]
+    )
+
+    assert time.perf_counter() - start < 5
+    assert [
+        len(keys) for keys in coalescing_storage.kv_store.round_trips
+    ] == [5, 5]
+
+
+def test_coalescing_storage_without_mget():
+    storage = authentication.CoalescingKeyValueUserStorage(
+        ExampleKVUserStorage.SimpleKVStore(), batch_window=0
+    )
+    middleware = authentication.Token(storage)
+    storage.register(middleware, 'token', {'id': 1})
+
+    assert storage.get_user(
+        middleware, 'token', None, None, None, {}
+    ) == {'id': 1}
+    assert storage.get_user(
+        middleware, 'invalid', None, None, None, {}
+    ) is None
+
+
+def test_coalescing_storage_propagates_errors(coalescing_storage):
+    def mget(keys):
+        raise ConnectionError("store unavailable")
+
+    coalescing_storage.kv_store.mget = mget
+
+    with pytest.raises(ConnectionError):
+        concurrent_lookups(coalescing_storage, ['1', '2'])
+
+    assert len(coalescing_storage._singleflight) == 0
+
+
+@pytest.mark.parametrize('mget', [
+    # note: short reply
+    lambda keys: [None],
+    # note: reply that fails partway through
+    lambda keys: (1 / index for index in range(len(keys), -1, -1)),
+])
+def test_coalescing_storage_releases_lookups_on_bad_reply(
+    coalescing_storage, mget
+):
+    coalescing_storage.kv_store.mget = mget
+    middleware = authentication.Token(coalescing_storage)
+    errors = []
+
+    def lookup(identifier):
+        try:
+            coalescing_storage.get_user(
+                middleware, identifier, None, None, None, {}
+            )
+        except Exception as err:
+            errors.append(err)
+
+    threads = [
+        threading.Thread(target=lookup, args=(identifier,), daemon=True)
+        for identifier in ['1', '2', '3']
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # note: lookups that are never released would block forever
+        thread.join(5)
+        assert not thread.is_alive()
+
+    assert len(errors) == 3
+    assert len(coalescing_storage._singleflight) == 0
+
+
+def test_verified_credentials_cache():
+    timer = FakeTimer()
+    backend = CountingUserStorage({"('foo', 'secret')": {'id': 1}})
+    storage = authentication.VerifiedCredentialsCache(
+        backend, ttl=10, timer=timer
+    )
+    middleware = authentication.Basic(storage)
+
+    def get_user(identifier):
+        return storage.get_user(middleware, identifier, None, None, None, {})
+
+    assert get_user(('foo', 'secret')) == {'id': 1}
+    assert get_user(('foo', 'secret')) == {'id': 1}
+    assert backend.calls == 1
+
+    # note: failed verifications are never cached by default
+    assert get_user(('foo', 'invalid')) is None
+    assert get_user(('foo', 'invalid')) is None
+    assert backend.calls == 3
+
+    timer.now = 11
+    assert get_user(('foo', 'secret')) == {'id': 1}
+    assert backend.calls == 4
+
+
+def test_verified_credentials_cache_does_not_store_plaintext():
+    backend = CountingUserStorage({"('foo', 'secret')": {'id': 1}})
+    storage = authentication.VerifiedCredentialsCache(backend)
+    middleware = authentication.Basic(storage)
+
+    storage.get_user(middleware, ('foo', 'secret'), None, None, None, {})
+
+    for name, digest in storage._cache:
+        assert name == 'Basic'
+        assert b'secret' not in digest and b'foo' not in digest
+
+    other = authentication.VerifiedCredentialsCache(backend)
+    assert (
+        other._get_cache_key(middleware, ('foo', 'secret')) !=
+        storage._get_cache_key(middleware, ('foo', 'secret'))
+    )
+
+
+def signed_token_request(token):
+    return Request(create_environ(
+        headers={'Authorization': 'Bearer ' + token} if token else {}
+    ))
+
+
+def test_signed_token_requires_keys():
+    with pytest.raises(ValueError):
+        authentication.SignedToken(keys={})
+
+    with pytest.raises(ValueError):
+        authentication.SignedToken(keys={'a': b'a', 'b': b'b'}).sign({}, 10)
+
+
+def test_signed_token_authentication(resp):
+    timer = FakeTimer()
+    middleware = authentication.SignedToken(
+        keys={'k1': b'secret'}, timer=timer
+    )
+    token = middleware.sign({'username': 'foo'}, expires_in=60)
+
+    req = signed_token_request(token)
+    middleware.process_resource(req, resp, None)
+    assert req.context['user'] == {'username': 'foo', 'exp': 60}
+
+    timer.now = 61
+    req = signed_token_request(token)
+    middleware.process_resource(req, resp, None)
+    assert 'user' not in req.context
+    assert req.context['challenges'] == ['Bearer']
+
+
+@pytest.mark.parametrize('tamper', [
+    # note: modified claims
+    lambda token: token.replace(
+        token.split('.')[1],
+        base64.urlsafe_b64encode(
+            b'{"username":"admin","exp":1e20}'
+        ).decode().rstrip('='),
+    ),
+    # note: unknown key
+    lambda token: 'unknown' + token,
+    # note: malformed tokens
+    lambda token: token + '.',
+    lambda token: token[:-2] + '!!',
+    lambda token: 'invalid',
+])
+def test_signed_token_rejects_invalid_tokens(tamper, resp):
+    middleware = authentication.SignedToken(keys={'k1': b'secret'})
+    token = tamper(middleware.sign({'username': 'foo'}, expires_in=60))
+
+    assert middleware.verify(token) is None
+
+
+def test_signed_token_invalid_header(resp):
+    middleware = authentication.SignedToken(keys={'k1': b'secret'})
+    req = Request(create_environ(
+        headers={'Authorization': 'Bearer too many parts'}
+    ))
+
+    with pytest.raises(HTTPBadRequest):
+        middleware.process_resource(req, resp, None)
+
+
+def test_signed_token_key_rotation():
+    old = authentication.SignedToken(keys={'old': b'old secret'})
+    rotated = authentication.SignedToken(keys={
+        'new': b'new secret', 'old': b'old secret',
+    })
+
+    assert rotated.verify(old.sign({'id': 1}, 60))['id'] == 1
+    assert rotated.verify(rotated.sign({'id': 2}, 60, key_id='new'))['id'] == 2
+
+
+def test_signed_token_cache(mocker):
+    middleware = authentication.SignedToken(
+        keys={'k1': b'secret'}, cache_size=1
+    )
+    mocker.spy(middleware, '_verify_signature')
+    first = middleware.sign({'id': 1}, 60)
+    second = middleware.sign({'id': 2}, 60)
+
+    middleware.verify(first)
+    claims = middleware.verify(first)
+    assert middleware._verify_signature.call_count == 1
+
+    # note: cached claims are never shared between requests
+    claims['id'] = 3
+    assert middleware.verify(first)['id'] == 1
+
+    middleware.verify(second)
+    middleware.verify(first)
+    assert middleware._verify_signature.call_count == 3
+
+
+def test_signed_token_cache_nested_claims_are_copied():
+    middleware = authentication.SignedToken(keys={'k1': b'secret'})
+    token = middleware.sign({'roles': ['reader']}, 60)
+
+    middleware.verify(token)['roles'].append('admin')
+    assert middleware.verify(token)['roles'] == ['reader']
+
+
+def test_signed_token_cache_respects_removed_keys():
+    middleware = authentication.SignedToken(keys={
+        'new': b'new secret', 'old': b'old secret',
+    })
+    token = middleware.sign({'id': 1}, 60, key_id='old')
+    assert middleware.verify(token)['id'] == 1
+
+    del middleware.keys['old']
+    assert middleware.verify(token) is None
+
+    # note: replaced secret under the same key identifier
+    middleware.keys['old'] = b'compromised secret replaced'
+    assert middleware.verify(token) is None
+
+
+def test_cidr_index_lookups():
+    index = authentication.CIDRIndex({
+        '10.0.0.0/8': 'a',
+        '10.1.0.0/16': 'b',
+        '10.1.2.0/24': 'c',
+        '10.2.0.0/16': 'd',
+        '192.168.1.1': 'e',
+        '2001:db8::/32': 'f',
+        '2001:db8:1::/48': 'g',
+    })
+
+    assert len(index) == 7
+    assert index.get('10.0.0.1') == 'a'
+    assert index.get('10.1.0.1') == 'b'
+    assert index.get('10.1.2.255') == 'c'
+    assert index.get('10.1.3.0') == 'b'
+    assert index.get('10.2.255.255') == 'd'
+    assert index.get('10.3.0.0') == 'a'
+    assert index.get('10.255.255.255') == 'a'
+    assert index.get('192.168.1.1') == 'e'
+    assert index.get('2001:db8::1') == 'f'
+    assert index.get('2001:db8:1::1') == 'g'
+
+    assert index.get('11.0.0.0') is None
+    assert index.get('192.168.1.2', 'default') == 'default'
+    assert index.get('not an address') is None
+    assert '10.0.0.1' in index
+    assert '::1' not in index
+
+    index.add('11.0.0.0/8', 'h')
+    assert index.get('11.0.0.0') == 'h'
+
+    with pytest.raises(ValueError):
+        index.add('10.0.0.0/33')
+
+
+def test_cidr_index_matches_linear_scan():
+    random = Random(0)
+    networks = {}
+
+    for _ in range(200):
+        prefix = random.randint(8, 32)
+        address = random.getrandbits(32) & (0xFFFFFFFF << (32 - prefix))
+        network = ipaddress.ip_network((address, prefix))
+        networks[network] = str(network)
+
+    index = authentication.CIDRIndex(
+        {str(network): value for network, value in networks.items()}
+    )
+
+    def linear_scan(address):
+        address = ipaddress.ip_address(address)
+        matching = [network for network in networks if address in network]
+        if matching:
+            return networks[max(matching, key=lambda n: n.prefixlen)]
+
+    addresses = [
+        str(ipaddress.ip_address(random.getrandbits(32)))
+        for _ in range(500)
+    ] + [
+        str(network.network_address) for network in networks
+    ] + [
+        str(network.broadcast_address) for network in networks
+    ]
+
+    for address in addresses:
+        assert index.get(address) == linear_scan(address)
+
+
+def test_ip_range_whitelist_with_cidr_index():
+    storage = authentication.IPRangeWhitelistStorage(
+        authentication.CIDRIndex({
+            '10.0.0.0/8': {'username': 'internal'},
+            '192.168.0.0/16': None,
+        }),
+        user={'username': 'default'}
+    )
+
+    def get_user(address):
+        return storage.get_user(None, address, None, None, None, {})
+
+    assert get_user('10.0.0.1') == {'username': 'internal'}
+    assert get_user('192.168.0.1') == {'username': 'default'}
+    assert get_user('127.0.0.1') is None
+
+
+def composite_test_middlewares():
+    storage = ExampleKVUserStorage()
+    signed = authentication.SignedToken(keys={'k': b'secret'})
+    middlewares = [
+        authentication.Basic(storage),
+        authentication.XAPIKey(storage),
+        authentication.Token(storage),
+        signed,
+        authentication.XForwardedFor(
+            authentication.IPRangeWhitelistStorage(
+                authentication.CIDRIndex(['10.0.0.0/8']), {'id': 'ip'}
+            )
+        ),
+    ]
+    storage.register(middlewares[0], ['foo', 'bar'], {'id': 'basic'})
+    storage.register(middlewares[1], 'key', {'id': 'key'})
+    storage.register(middlewares[2], 'token', {'id': 'token'})
+
+    return middlewares, signed.sign({'id': 'signed'}, 60)
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    {'Authorization': 'Basic ' + base64.b64encode(b'foo:bar').decode()},
+    {'Authorization': 'Basic ' + base64.b64encode(b'foo:baz').decode()},
+    {'Authorization': 'Basic invalid!'},
+    {'Authorization': 'Token token'},
+    {'Authorization': 'token token'},
+    {'Authorization': 'Token invalid'},
+    {'Authorization': 'Token too many'},
+    {'Authorization': 'Bearer {signed}'},
+    {'Authorization': 'Bearer invalid'},
+    {'Authorization': 'Unknown scheme'},
+    {'X-Api-Key': 'key'},
+    {'X-Api-Key': 'key', 'Authorization': 'Token invalid'},
+    {'X-Forwarded-For': '10.1.1.1'},
+    {'X-Forwarded-For': '11.1.1.1', 'Authorization': 'Token token'},
+])
+def test_composite_authentication_equals_chained(headers, resp):
+    middlewares, signed_token = composite_test_middlewares()
+    headers = {
+        name: value.format(signed=signed_token)
+        for name, value in headers.items()
+    }
+    composite = authentication.CompositeAuthentication(middlewares)
+
+    def authenticate(chain):
+        req = Request(create_environ(headers=headers))
+        try:
+            for middleware in chain:
+                middleware.process_resource(req, resp, None, {})
+        except HTTPBadRequest:
+            return 'bad request'
+        return req.context
+
+    assert authenticate([composite]) == authenticate(middlewares)
+
+
+def test_composite_authentication_skips_identified_user(req, resp):
+    middlewares, _ = composite_test_middlewares()
+    composite = authentication.CompositeAuthentication(middlewares)
+
+    req.context['user'] = {'id': 'other'}
+    composite.process_resource(req, resp, None, {})
+    assert req.context == {'user': {'id': 'other'}}
+
+
+def test_composite_authentication_in_api():
+    middlewares, _ = composite_test_middlewares()
+    client = testing.TestClient(API(
+        middleware=[authentication.CompositeAuthentication(middlewares)]
+    ))
+    client.app.add_route('/', ExampleResource())
+
+    assert client.simulate_get('/').status == status_codes.HTTP_UNAUTHORIZED
+    assert client.simulate_get(
+        '/', headers={'Authorization': 'Token token'}
+    ).status == status_codes.HTTP_OK
+
+
+def test_permission_policy():
+    timer = FakeTimer()
+    granted = {'admin': {'cats:read', 'cats:write'}, 'guest': {'cats:read'}}
+    queries = []
+
+    def get_permissions(user):
+        queries.append(user['name'])
+        return granted[user['name']]
+
+    policy = authorization.PermissionPolicy(
+        get_permissions, ttl=10, timer=timer
+    )
+
+    @policy.protect
+    class CatsResource(BaseResource, with_context=True):
+        required_permissions = {
+            'get': 'cats:read',
+            'POST': ('cats:read', 'cats:write'),
+            '*': ['cats:admin'],
+        }
+
+        def on_get(self, req, resp, **kwargs):
+            pass
+
+        def on_post(self, req, resp, **kwargs):
+            pass
+
+        def on_put(self, req, resp, **kwargs):
+            pass
+
+    class PublicResource(BaseResource, with_context=True):
+        pass
+
+    admin, guest = {'name': 'admin'}, {'name': 'guest'}
+
+    assert policy.required(CatsResource, 'GET') == {'cats:read'}
+    assert policy.required(CatsResource, 'PUT') == {'cats:admin'}
+    assert policy.required(PublicResource, 'GET') == set()
+
+    assert policy.authorize(admin, CatsResource, 'POST')
+    assert policy.authorize(guest, CatsResource, 'GET')
+    assert not policy.authorize(guest, CatsResource, 'POST')
+    assert not policy.authorize(admin, CatsResource, 'PUT')
+    assert policy.authorize(guest, PublicResource, 'DELETE')
+    assert queries == ['admin', 'guest', 'guest', 'admin']
+
+    # note: decisions are cached
+    assert not policy.authorize(guest, CatsResource, 'POST')
+    assert len(queries) == 4
+
+    granted['guest'] = {'cats:read', 'cats:write'}
+    policy.invalidate(guest)
+    assert policy.authorize(guest, CatsResource, 'POST')
+    assert policy.authorize(admin, CatsResource, 'POST')
+    assert len(queries) == 5
+
+    timer.now = 11
+    assert policy.authorize(admin, CatsResource, 'POST')
+    assert len(queries) == 6
+
+    policy.invalidate()
+    assert policy.authorize(admin, CatsResource, 'POST')
+    assert len(queries) == 7
+
+
+@pytest.mark.parametrize('user,method,status', [
+    (None, 'GET', status_codes.HTTP_UNAUTHORIZED),
+    ({'name': 'guest'}, 'GET', status_codes.HTTP_OK),
+    ({'name': 'guest'}, 'POST', status_codes.HTTP_FORBIDDEN),
+])
+def test_permission_policy_in_api(user, method, status):
+    policy = authorization.PermissionPolicy(lambda user: {'cats:read'})
+
+    @policy.protect
+    class CatsResource(BaseResource, with_context=True):
+        required_permissions = {'GET': 'cats:read', 'POST': 'cats:write'}
+
+        def on_get(self, req, resp, **kwargs):
+            pass
+
+        def on_post(self, req, resp, **kwargs):
+            pass
+
+    api = API(middleware=[authentication.Anonymous(user)] if user else [])
+    api.add_route('/', CatsResource())
+
+    result = testing.TestClient(api).simulate_request(method, '/')
+    assert result.status == status
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from falcon import API
+
+from graceful import bench
+from graceful.fields import IntField, StringField
+from graceful.resources.generic import ListCreateAPI
+from graceful.serializers import BaseSerializer
+
+
+class CatSerializer(BaseSerializer):
+    name = StringField("cat name")
+    age = IntField("cat age")
+
+
+class CatListResource(ListCreateAPI, with_context=True):
+    serializer = CatSerializer()
+
+    def list(self, params, meta, context, **kwargs):
+        return [{'name': 'kitty', 'age': 3}]
+
+    def create(self, params, meta, validated, context, **kwargs):
+        return validated
+
+
+api = API()
+api.add_route('/cats', CatListResource())
+
+SPEC = {
+    'requests': [
+        {'name': 'list', 'path': '/cats', 'weight': 3},
+        {
+            'name': 'create', 'method': 'POST', 'path': '/cats',
+            'body': {'name': 'kitty', 'age': 3},
+        },
+        {'name': 'missing', 'path': '/dogs'},
+    ]
+}
+
+
+def test_percentile():
+    values = list(range(1, 101))
+
+    assert bench.percentile(values, 50) == 50
+    assert bench.percentile(values, 99) == 99
+    assert bench.percentile(values, 100) == 100
+    assert bench.percentile([], 50) is None
+
+
+def test_request_template_environ():
+    template = bench.RequestTemplate(
+        '/cats', method='post', body={'name': 'kitty'}, query_string='a=1',
+    )
+
+    first, second = template.environ(), template.environ()
+
+    assert template.name == 'POST /cats'
+    assert first['CONTENT_TYPE'] == 'application/json'
+    assert first['QUERY_STRING'] == 'a=1'
+    assert first['wsgi.input'].read() == b'{"name": "kitty"}'
+    assert second['wsgi.input'].read() == b'{"name": "kitty"}'
+
+
+def test_spec_requires_requests():
+    with pytest.raises(ValueError):
+        bench.RequestTemplate.from_spec({'requests': []})
+
+
+def test_load_app():
+    assert bench.load_app('tests.test_bench:api') is api
+
+
+def test_run_threads():
+    templates = bench.RequestTemplate.from_spec(SPEC)
+    stats, elapsed = bench.run_threads(api, templates, 100, threads=3)
+
+    assert elapsed > 0
+    assert sum(len(route.latencies) for route in stats.values()) == 100
+    assert set(stats['list'].statuses) == {'200'}
+    assert set(stats['create'].statuses) == {'201'}
+    assert set(stats['missing'].statuses) == {'404'}
+    # note: list is three times more frequent than other requests
+    assert len(stats['list'].latencies) > len(stats['create'].latencies)
+
+
+def test_measure_allocations():
+    templates = bench.RequestTemplate.from_spec(SPEC)
+    stats = bench.measure_allocations(api, templates, samples=3)
+
+    assert len(stats['list'].peak_bytes) == 3
+    assert all(peak > 0 for peak in stats['list'].peak_bytes)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_run(processes):
+    report = bench.run(
+        'tests.test_bench:api', SPEC, 50, threads=2, processes=processes,
+        allocations=2,
+    )
+
+    assert report['total']['requests'] == 50
+    assert list(report['routes']) == ['list', 'create', 'missing']
+    assert 'peak_bytes' in report['routes']['list']
+    assert report['routes']['list']['p50_ms'] > 0
+    assert 'TOTAL' in bench.format_report(report)
+
+
+def test_main(tmpdir, capsys):
+    spec = tmpdir.join('spec.json')
+    spec.write(json.dumps(SPEC))
+    output = tmpdir.join('report.json')
+
+    bench.main([
+        'tests.test_bench:api', str(spec), '--requests', '20',
+        '--allocations', '0', '--json', str(output),
+    ])
+
+    assert 'route' in capsys.readouterr()[0]
+    assert json.loads(output.read())['total']['requests'] == 20
@@ -0,0 +1,438 @@
+import json
+import multiprocessing
+from concurrent.futures import Future
+
+import pytest
+from falcon import API, testing
+
+from graceful.caching import (
+    MemoryBackend, ResponseCache, SharedMemoryBackend,
+)
+from graceful.fields import IntField, StringField
+from graceful.metrics import MetricsRegistry
+from graceful.parameters import StringParam
+from graceful.resources.generic import ListAPI, RetrieveAPI
+from graceful.serializers import BaseSerializer
+
+
+class CatSerializer(BaseSerializer):
+    id = IntField("cat identification number", read_only=True)
+    name = StringField("cat name")
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class DeferredExecutor:
+    """Executor that runs submitted calls only when asked to."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, func, *args, **kwargs):
+        self.calls.append((func, args, kwargs))
+        return Future()
+
+    def run(self):
+        calls, self.calls = self.calls, []
+
+        for func, args, kwargs in calls:
+            func(*args, **kwargs)
+
+
+def make_cache(**kwargs):
+    kwargs.setdefault('soft_ttl', 10)
+    kwargs.setdefault('hard_ttl', 100)
+    kwargs.setdefault('timer', Clock())
+    kwargs.setdefault('executor', DeferredExecutor())
+    # note: random value of 0 never triggers early expiration
+    kwargs.setdefault('random', lambda: 0.0)
+    return ResponseCache(**kwargs)
+
+
+def counting(values):
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return 'application/json', values[len(calls) - 1]
+
+    return compute, calls
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+
+    backend.set('a', 1)
+    backend.set('b', 2)
+    assert backend.get('a') == 1
+
+    backend.set('c', 3)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1
+    assert backend.get('c') == 3
+
+    backend.delete('a')
+    assert backend.get('a') is None
+
+    backend.clear()
+    assert backend.get('c') is None
+
+
+def test_shared_memory_backend(tmpdir):
+    backend = SharedMemoryBackend(
+        str(tmpdir.join('cache')), slots=16, slot_size=256,
+    )
+    entry = ('application/json', b'{"content": 1}', 1000.0, 0.5)
+
+    assert backend.get('a') is None
+
+    backend.set('a', entry)
+    backend.set('b', entry[:1] + (b'2',) + entry[2:])
+    assert backend.get('a') == entry
+    assert backend.get('b')[1] == b'2'
+    assert len(backend) == 2
+
+    backend.set('a', entry[:1] + (b'3',) + entry[2:])
+    assert backend.get('a')[1] == b'3'
+    assert len(backend) == 2
+
+    backend.delete('a')
+    assert backend.get('a') is None
+    assert len(backend) == 1
+
+    backend.clear()
+    assert backend.get('b') is None
+    assert len(backend) == 0
+    backend.close()
+
+
+def test_shared_memory_backend_evicts_least_recently_used(tmpdir):
+    clock = Clock()
+    backend = SharedMemoryBackend(
+        str(tmpdir.join('cache')), slots=2, slot_size=256, timer=clock,
+    )
+    entry = ('application/json', b'', 1000.0, 0.5)
+
+    for key in ('a', 'b'):
+        clock.now += 1
+        backend.set(key, entry)
+
+    clock.now += 1
+    assert backend.get('a') == entry
+
+    clock.now += 1
+    backend.set('c', entry)
+
+    assert backend.get('b') is None
+    assert backend.get('a') == entry
+    assert backend.get('c') == entry
+
+
+def test_shared_memory_backend_skips_large_entries(tmpdir):
+    backend = SharedMemoryBackend(
+        str(tmpdir.join('cache')), slots=4, slot_size=128,
+    )
+
+    backend.set('a', ('application/json', b'1', 1000.0, 0.5))
+    backend.set('a', ('application/json', b'1' * 128, 1000.0, 0.5))
+
+    assert backend.get('a') is None
+
+
+def test_shared_memory_backend_ignores_slots_being_written(tmpdir):
+    backend = SharedMemoryBackend(
+        str(tmpdir.join('cache')), slots=1, slot_size=128,
+    )
+    backend.set('a', ('application/json', b'1', 1000.0, 0.5))
+
+    offset = backend._header.size
+    sequence = backend._sequence.unpack_from(backend._map, offset)[0]
+    backend._sequence.pack_into(backend._map, offset, sequence + 1)
+    assert backend.get('a') is None
+
+    backend._sequence.pack_into(backend._map, offset, sequence)
+    assert backend.get('a')[1] == b'1'
+
+
+def test_shared_memory_backend_layout(tmpdir):
+    path = str(tmpdir.join('cache'))
+    SharedMemoryBackend(path, slots=4, slot_size=128)
+
+    with pytest.raises(ValueError):
+        SharedMemoryBackend(path, slots=8, slot_size=128)
+
+
+def _set_in_child(backend):
+    backend.set('a', ('application/json', b'child', 1000.0, 0.5))
+
+
+def test_shared_memory_backend_is_shared_by_processes(tmpdir):
+    backend = SharedMemoryBackend(
+        str(tmpdir.join('cache')), slots=16, slot_size=256,
+    )
+    # note: backend opened before fork must open its file again in child
+    assert backend.get('a') is None
+
+    process = multiprocessing.get_context('fork').Process(
+        target=_set_in_child, args=(backend,)
+    )
+    process.start()
+    process.join()
+
+    assert process.exitcode == 0
+    assert backend.get('a')[1] == b'child'
+
+
+def test_response_cache_hit_and_miss():
+    cache = make_cache()
+    compute, calls = counting([b'1', b'2'])
+
+    assert cache.get('key', compute) == ('application/json', b'1', 'miss')
+    assert cache.get('key', compute) == ('application/json', b'1', 'hit')
+    assert len(calls) == 1
+    assert cache.stats()['hit'] == 1
+    assert cache.stats()['miss'] == 1
+
+
+def test_response_cache_serves_stale_and_refreshes_once():
+    cache = make_cache()
+    compute, calls = counting([b'1', b'2'])
+
+    cache.get('key', compute)
+    cache.timer.now += 20
+
+    # note: refresh is scheduled only once for all stale hits
+    assert cache.get('key', compute)[1:] == (b'1', 'stale')
+    assert cache.get('key', compute)[1:] == (b'1', 'stale')
+    assert len(cache.executor.calls) == 1
+
+    cache.executor.run()
+    assert cache.get('key', compute)[1:] == (b'2', 'hit')
+    assert len(calls) == 2
+    assert cache.stats() == {
+        'hit': 1, 'stale': 2, 'miss': 1, 'refresh': 1, 'refresh_error': 0,
+    }
+
+
+def test_response_cache_hard_ttl():
+    cache = make_cache()
+    compute, calls = counting([b'1', b'2'])
+
+    cache.get('key', compute)
+    cache.timer.now += 100
+
+    assert cache.get('key', compute)[1:] == (b'2', 'miss')
+    assert not cache.executor.calls
+
+
+def test_response_cache_refresh_errors_keep_stale_entry():
+    cache = make_cache()
+    compute, _ = counting([b'1'])
+
+    cache.get('key', compute)
+    cache.timer.now += 20
+
+    def fail():
+        raise ValueError
+
+    assert cache.get('key', fail)[1:] == (b'1', 'stale')
+    cache.executor.run()
+
+    assert cache.get('key', fail)[1:] == (b'1', 'stale')
+    assert cache.stats()['refresh_error'] == 1
+
+
+def test_response_cache_early_expiration():
+    clock = Clock()
+    values = iter([0.999, 0.0])
+    cache = make_cache(timer=clock, random=lambda: next(values))
+
+    def compute():
+        # note: entry takes one second to compute
+        clock.now += 1
+        return 'application/json', b'1'
+
+    cache.get('key', compute)
+    clock.now += 5
+
+    # note: -log(0.001) is almost 7 so entry expires early despite being
+    #       younger than soft TTL
+    assert cache.get('key', compute)[2] == 'stale'
+    assert cache.get('key', compute)[2] == 'hit'
+
+
+def test_response_cache_early_expiration_disabled():
+    cache = make_cache(beta=0, random=lambda: 0.999999)
+    compute, _ = counting([b'1'])
+
+    cache.get('key', compute)
+    cache.timer.now += 9
+
+    assert cache.get('key', compute)[2] == 'hit'
+
+
+def test_response_cache_metrics():
+    registry = MetricsRegistry()
+    first = make_cache(registry=registry, name='first')
+    second = make_cache(registry=registry, name='second')
+    compute, _ = counting([b'1', b'2'])
+
+    first.get('key', compute)
+    first.get('key', compute)
+    second.get('key', compute)
+
+    exposed = registry.expose()
+    assert (
+        'graceful_cache_events_total{cache="first",event="hit"} 1'
+        in exposed
+    )
+    assert (
+        'graceful_cache_events_total{cache="second",event="miss"} 1'
+        in exposed
+    )
+
+
+def test_cached_resources():
+    calls = []
+    cache = make_cache()
+
+    class CatResource(RetrieveAPI, with_context=True):
+        serializer = CatSerializer()
+        response_cache = cache
+
+        def retrieve(self, params, meta, context, cat_id, **kwargs):
+            calls.append(cat_id)
+            return {'id': int(cat_id), 'name': 'kitty'}
+
+    class CatListResource(ListAPI):
+        serializer = CatSerializer()
+        response_cache = cache
+        breed = StringParam("breed filter", default='any')
+
+        def list(self, params, meta, **kwargs):
+            calls.append(params['breed'])
+            return [{'id': 1, 'name': 'kitty'}]
+
+    api = API()
+    api.add_route('/cats/', CatListResource())
+    api.add_route('/cats/{cat_id}', CatResource())
+    client = testing.TestClient(api)
+
+    first = client.simulate_get('/cats/1')
+    second = client.simulate_get('/cats/1')
+    assert first.content == second.content
+    assert second.headers['content-type'] == first.headers['content-type']
+    assert json.loads(second.text)['content'] == {'id': 1, 'name': 'kitty'}
+
+    client.simulate_get('/cats/2')
+    client.simulate_get('/cats/', query_string='breed=sphynx')
+    client.simulate_get('/cats/', query_string='breed=sphynx')
+    client.simulate_get('/cats/')
+    assert calls == ['1', '2', 'sphynx', 'any']
+
+    # note: stale entries are refreshed by calling the handler again
+    cache.timer.now += 20
+    assert json.loads(client.simulate_get('/cats/1').text)['content']['id']
+    assert calls == ['1', '2', 'sphynx', 'any']
+
+    cache.executor.run()
+    assert calls == ['1', '2', 'sphynx', 'any', '1']
+    assert client.simulate_get('/cats/1').content == first.content
+
+
+def test_cached_resources_share_memory(tmpdir):
+    calls = []
+    path = str(tmpdir.join('cache'))
+
+    class CatResource(RetrieveAPI):
+        serializer = CatSerializer()
+
+        def retrieve(self, params, meta, cat_id, **kwargs):
+            calls.append(cat_id)
+            return {'id': int(cat_id), 'name': 'kitty'}
+
+    # note: every worker process has its own resources and caches
+    workers = []
+
+    for _ in range(2):
+        resource = CatResource()
+        resource.response_cache = make_cache(
+            backend=SharedMemoryBackend(path, slots=16, slot_size=1024)
+        )
+        api = API()
+        api.add_route('/cats/{cat_id}', resource)
+        workers.append(testing.TestClient(api))
+
+    first = workers[0].simulate_get('/cats/1')
+    second = workers[1].simulate_get('/cats/1')
+
+    assert calls == ['1']
+    assert first.content == second.content
+    assert second.headers['content-type'] == first.headers['content-type']
+
+
+def test_cached_resources_errors_are_not_cached():
+    calls = []
+
+    class CatResource(RetrieveAPI):
+        serializer = CatSerializer()
+        response_cache = make_cache()
+
+        def retrieve(self, params, meta, cat_id, **kwargs):
+            calls.append(cat_id)
+            raise ValueError
+
+    api = API()
+    api.add_route('/cats/{cat_id}', CatResource())
+    client = testing.TestClient(api)
+
+    for _ in range(2):
+        try:
+            client.simulate_get('/cats/1')
+        except ValueError:
+            pass
+
+    assert calls == ['1', '1']
+
+
+class UserMiddleware:
+    def process_request(self, req, resp):
+        req.context['user'] = {'name': req.get_header('X-User')}
+
+
+@pytest.mark.parametrize('with_context,per_user,shared', [
+    (True, None, False),
+    (True, False, True),
+    (False, None, True),
+    (False, True, False),
+])
+def test_cached_resources_per_user(with_context, per_user, shared):
+    owner = []
+
+    class CatResource(RetrieveAPI, with_context=with_context):
+        serializer = CatSerializer()
+        response_cache = make_cache()
+        cache_per_user = per_user
+
+        def retrieve(self, params, meta, cat_id, **kwargs):
+            # note: owner is taken from the last request that called handler
+            return {'id': int(cat_id), 'name': owner[-1]}
+
+    api = API(middleware=[UserMiddleware()])
+    api.add_route('/cats/{cat_id}', CatResource())
+    client = testing.TestClient(api)
+
+    names = []
+
+    for user in ('alice', 'bob'):
+        owner.append(user)
+        result = client.simulate_get('/cats/1', headers={'X-User': user})
+        names.append(json.loads(result.text)['content']['name'])
+
+    assert names == (['alice', 'alice'] if shared else ['alice', 'bob'])
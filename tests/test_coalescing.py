@@ -0,0 +1,348 @@
+import json
+import threading
+import time
+
+import falcon
+import pytest
+
+from falcon import API, testing
+
+from graceful.coalescing import Batcher, SingleFlight, freeze
+from graceful.fields import IntField, StringField
+from graceful.resources.generic import ListCreateAPI, RetrieveAPI
+from graceful.serializers import BaseSerializer
+
+
+def call_concurrently(func, arguments):
+    results = [None] * len(arguments)
+    errors = [None] * len(arguments)
+
+    def worker(index):
+        try:
+            results[index] = func(arguments[index])
+        except Exception as err:
+            errors[index] = err
+
+    threads = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(len(arguments))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results, errors
+
+
+def test_batcher_coalesces_concurrent_calls():
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = Batcher(double, window=0.5, max_size=5)
+    results, errors = call_concurrently(batcher.call, list(range(10)))
+
+    assert results == [item * 2 for item in range(10)]
+    assert errors == [None] * 10
+    # note: batches are closed as soon as they are full
+    assert sorted(len(batch) for batch in batches) == [5, 5]
+
+
+def test_batcher_window():
+    batches = []
+    batcher = Batcher(lambda items: batches.append(items) or items, window=0)
+
+    assert batcher.call(1) == 1
+    assert batcher.call(2) == 2
+    assert batches == [[1], [2]]
+
+
+def test_batcher_errors():
+    def func(items):
+        return [
+            ValueError(item) if item % 2 else item
+            for item in items
+        ]
+
+    results, errors = call_concurrently(
+        Batcher(func, window=0.1).call, [1, 2]
+    )
+
+    assert results == [None, 2]
+    assert isinstance(errors[0], ValueError)
+
+    with pytest.raises(ValueError):
+        Batcher(lambda items: [], window=0).call(1)
+
+    with pytest.raises(ZeroDivisionError):
+        Batcher(lambda items: 1 / 0, window=0).call(1)
+
+
+def test_batcher_errors_are_copied_for_callers():
+    def fail(items):
+        raise falcon.HTTPBadGateway()
+
+    # note: long window so the batch is processed only when it is full
+    results, errors = call_concurrently(
+        Batcher(fail, window=10, max_size=3).call, [1, 2, 3]
+    )
+
+    assert all(isinstance(error, falcon.HTTPBadGateway) for error in errors)
+    assert len({id(error) for error in errors}) == 3
+
+    originals = [error for error in errors if error.__cause__ is None]
+    assert len(originals) == 1
+    assert all(
+        error.__cause__ is originals[0]
+        for error in errors if error is not originals[0]
+    )
+
+
+class CatSerializer(BaseSerializer):
+    id = IntField("cat id", read_only=True)
+    name = StringField("cat name")
+
+
+def make_client(resource):
+    api = API()
+    api.add_route('/cats', resource)
+    return testing.TestClient(api)
+
+
+def post(client, name):
+    return client.simulate_post(
+        '/cats', body=json.dumps({'name': name}),
+        headers={'Content-Type': 'application/json'},
+    )
+
+
+def test_coalesced_creates():
+    batches = []
+
+    class CatListResource(ListCreateAPI, with_context=True):
+        serializer = CatSerializer()
+        create_coalescing_window = 0.5
+        create_coalescing_size = 4
+
+        def create_coalesced(self, calls):
+            batches.append(len(calls))
+            return [
+                falcon.HTTPConflict() if kwargs['validated']['name'] == 'tom'
+                else dict(kwargs['validated'], id=index)
+                for index, (params, meta, kwargs) in enumerate(calls)
+            ]
+
+    client = make_client(CatListResource())
+    results, errors = call_concurrently(
+        lambda name: post(client, name), ['kitty', 'tom', 'garfield', 'felix']
+    )
+
+    assert errors == [None] * 4
+    assert batches == [4]
+    assert [result.status for result in results] == [
+        falcon.HTTP_CREATED, falcon.HTTP_CONFLICT,
+        falcon.HTTP_CREATED, falcon.HTTP_CREATED,
+    ]
+    assert sorted(
+        json.loads(result.text)['content']['name']
+        for result in results if result.status == falcon.HTTP_CREATED
+    ) == ['felix', 'garfield', 'kitty']
+
+
+def test_default_create_coalesced():
+    class CatListResource(ListCreateAPI, with_context=True):
+        serializer = CatSerializer()
+        create_coalescing_window = 0
+
+        def create(self, params, meta, validated, context, **kwargs):
+            if validated['name'] == 'tom':
+                raise falcon.HTTPConflict()
+
+            return dict(validated, id=1)
+
+    client = make_client(CatListResource())
+
+    assert json.loads(post(client, 'kitty').text)['content'] == {
+        'id': 1, 'name': 'kitty',
+    }
+    assert post(client, 'tom').status == falcon.HTTP_CONFLICT
+
+
+def test_singleflight_shares_execution():
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+    group = SingleFlight()
+
+    def fetch(value):
+        calls.append(value)
+        started.set()
+        release.wait()
+        return value * 2
+
+    def worker(value):
+        if value:
+            # note: make sure that the first call is in progress
+            started.wait()
+        return group.do('key', fetch, value)
+
+    threads = []
+    results = [None] * 4
+
+    def run(index):
+        results[index] = worker(index)
+
+    for index in range(4):
+        threads.append(threading.Thread(target=run, args=(index,)))
+        threads[-1].start()
+
+    started.wait()
+    # note: give other threads time to join the running execution
+    time.sleep(0.05)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [0]
+    assert results[0] == (0, False)
+    assert results[1:] == [(0, True)] * 3
+    assert len(group) == 0
+
+    # note: results are not cached
+    assert group.do('key', lambda: 'again') == ('again', False)
+
+
+def test_singleflight_errors():
+    group = SingleFlight()
+
+    with pytest.raises(ZeroDivisionError):
+        group.do('key', lambda: 1 / 0)
+
+    assert len(group) == 0
+
+
+def test_singleflight_errors_are_copied_for_followers():
+    release = threading.Event()
+    group = SingleFlight()
+    errors = [None] * 3
+
+    def fail():
+        release.wait()
+        raise falcon.HTTPNotFound()
+
+    def worker(index):
+        try:
+            group.do('key', fail)
+        except falcon.HTTPNotFound as err:
+            errors[index] = err
+
+    threads = [
+        threading.Thread(target=worker, args=(index,)) for index in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # note: give other threads time to join the running execution
+    while not len(group):
+        pass  # pragma: nocover
+    time.sleep(0.05)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(error, falcon.HTTPNotFound) for error in errors)
+    assert len({id(error) for error in errors}) == 3
+
+    originals = [error for error in errors if error.__cause__ is None]
+    assert len(originals) == 1
+    assert all(
+        error.__cause__ is originals[0]
+        for error in errors if error is not originals[0]
+    )
+
+
+def test_freeze():
+    assert freeze({'a': [1, {2}], 'b': {'c': 1}}) == freeze(
+        {'b': {'c': 1}, 'a': (1, frozenset([2]))}
+    )
+    hash(freeze({'a': [1, {2}], 'b': {'c': 1}}))
+
+
+def test_singleflight_resource():
+    release = threading.Event()
+    calls = []
+
+    class CatResource(RetrieveAPI, with_context=True):
+        serializer = CatSerializer()
+        singleflight = SingleFlight()
+
+        def retrieve(self, params, meta, context, cat_id, **kwargs):
+            calls.append(cat_id)
+            release.wait()
+            return {'id': int(cat_id), 'name': 'kitty'}
+
+    resource = CatResource()
+    api = API()
+    api.add_route('/cats/{cat_id}', resource)
+    client = testing.TestClient(api)
+
+    results = [None] * 3
+
+    def get(index, cat_id):
+        results[index] = client.simulate_get('/cats/' + cat_id)
+
+    threads = [
+        threading.Thread(target=get, args=(index, cat_id))
+        for index, cat_id in enumerate(['1', '1', '2'])
+    ]
+    for thread in threads:
+        thread.start()
+
+    # note: wait until both distinct executions are in progress and
+    #       identical request joined one of them
+    while len(calls) < 2 or len(resource.singleflight) < 2:
+        pass  # pragma: nocover
+    time.sleep(0.05)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == ['1', '2']
+    assert results[0].text == results[1].text
+    assert json.loads(results[1].text)['content'] == {
+        'id': 1, 'name': 'kitty',
+    }
+    assert results[1].headers['Content-Type'] == 'application/json'
+    assert json.loads(results[2].text)['content']['id'] == 2
+
+
+class FakeRequest:
+    method = 'GET'
+
+    def __init__(self, user):
+        self.context = {'user': user}
+
+
+@pytest.mark.parametrize('with_context,per_user,shared', [
+    (True, None, False),
+    (True, False, True),
+    (False, None, True),
+    (False, True, False),
+])
+def test_singleflight_key_per_user(with_context, per_user, shared):
+    class CatResource(RetrieveAPI, with_context=with_context):
+        singleflight_per_user = per_user
+
+    resource = CatResource()
+    keys = [
+        resource.get_singleflight_key(FakeRequest(user), {}, cat_id='1')
+        for user in ({'id': 1}, {'id': 2})
+    ]
+
+    assert (keys[0] == keys[1]) is shared
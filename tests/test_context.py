@@ -0,0 +1,22 @@
+import threading
+
+from graceful.context import ThreadLocalVar, context_var
+
+
+def test_thread_local_var():
+    var = ThreadLocalVar('flag', default=False)
+    values = []
+
+    var.set(True)
+    thread = threading.Thread(target=lambda: values.append(var.get()))
+    thread.start()
+    thread.join()
+
+    assert var.get() is True
+    # note: other threads see the default value
+    assert values == [False]
+
+
+def test_context_var_default():
+    assert context_var('flag', False).get() is False
+    assert context_var('timings').get(None) is None
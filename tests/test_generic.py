@@ -1,4 +1,5 @@
 from functools import wraps
+import gzip
 import json
 
 import pytest
@@ -10,6 +11,7 @@ from falcon.testing import TestBase
 from graceful.serializers import BaseSerializer
 from graceful.fields import RawField, IntField
 from graceful.validators import min_validator
+from graceful.media.json import RawJSON
 from graceful.resources.generic import (
     RetrieveAPI,
     RetrieveUpdateAPI,
@@ -171,6 +173,32 @@ def test_implementation_hook_create_bulk():
         PaginatedListCreateAPI().create_bulk(None, None, validated=[{}])
 
 
+def test_raw_json_skips_serialization(req, resp):
+    class RawRetrieveAPI(RetrieveAPI):
+        serializer = ExampleSerializer()
+
+        def retrieve(self, params, meta, **kwargs):
+            return RawJSON(b'{"cached": true}')
+
+    class RawListAPI(ListAPI):
+        serializer = ExampleSerializer()
+
+        def list(self, params, meta, **kwargs):
+            return [RawJSON(b'{"cached": true}'), {'unsigned': 1}]
+
+    RawRetrieveAPI().on_get(req, resp)
+    assert json.loads(resp.data.decode())['content'] == {'cached': True}
+
+    RawListAPI().on_get(req, resp)
+    assert json.loads(resp.data.decode())['content'] == [
+        {'cached': True},
+        {
+            'writable': None, 'readonly': None,
+            'nullable': None, 'unsigned': 1,
+        },
+    ]
+
+
 class GenericsTestBase(TestBase):
     def setUp(self):
         super(GenericsTestBase, self).setUp()
@@ -413,6 +441,21 @@ class CreateTestsMixin:
         )
         assert self.srmock.status == falcon.HTTP_CREATED
 
+    def test_create_bulk_gzip_encoded(self):
+        self.simulate_request(
+            self.uri_template,
+            decode='utf-8',
+            method='PATCH',
+            headers={
+                'Content-Type': 'application/json',
+                'Content-Encoding': 'gzip',
+            },
+            body=gzip.compress(json.dumps(
+                [{'writable': 'changed', 'unsigned': 12, 'nullable': None}]
+            ).encode()),
+        )
+        assert self.srmock.status == falcon.HTTP_CREATED
+
     def test_create_bulk_without_list_results_in_bad_request(self):
         self.do_create_bulk(
             {'writable': 'changed', 'unsigned': 12}
@@ -0,0 +1,253 @@
+import json
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import falcon
+import pytest
+
+from falcon import API, testing
+
+from graceful.errors import JobQueueFull
+from graceful.fields import IntField, StringField
+from graceful.jobs import JobQueue, JobResource
+from graceful.resources.generic import RetrieveUpdateDeleteAPI
+from graceful.serializers import BaseSerializer
+
+
+class CatSerializer(BaseSerializer):
+    name = StringField("cat name")
+    age = IntField("cat age")
+
+
+def make_client(queue, release=None):
+    cats = {'1': {'name': 'kitty', 'age': 3}}
+
+    class CatResource(RetrieveUpdateDeleteAPI, with_context=True):
+        serializer = CatSerializer()
+        job_queue = queue
+        job_location = '/jobs/{job_id}'
+
+        def retrieve(self, params, meta, context, cat_id, **kwargs):
+            return cats[cat_id]
+
+        def update(self, params, meta, validated, context, cat_id, **kwargs):
+            if release is not None:
+                release.wait()
+
+            if cat_id not in cats:
+                raise falcon.HTTPNotFound()
+
+            cats[cat_id] = validated
+            return validated
+
+        def delete(self, params, meta, context, cat_id, **kwargs):
+            del cats[cat_id]
+
+    api = API()
+    api.add_route('/cats/{cat_id}', CatResource())
+    api.add_route('/jobs/{job_id}', JobResource(queue))
+    return testing.TestClient(api), cats
+
+
+def put(client, cat_id, body):
+    return client.simulate_put(
+        '/cats/{}'.format(cat_id), body=json.dumps(body),
+        headers={'Content-Type': 'application/json'},
+    )
+
+
+def test_job_queue_submit():
+    queue = JobQueue(max_workers=1)
+    job = queue.submit(sum, [1, 2])
+    job.future.result()
+
+    assert queue.get(job.id) is job
+    assert job.as_dict() == {'id': job.id, 'status': 'succeeded', 'result': 3}
+    assert queue.pending == 0
+
+
+def test_job_queue_failure():
+    queue = JobQueue(max_workers=1)
+    job = queue.submit(int, 'invalid')
+
+    with pytest.raises(ValueError):
+        job.future.result()
+
+    representation = job.as_dict()
+    assert representation['status'] == 'failed'
+    assert representation['error']['title'] == 'ValueError'
+
+
+def test_job_queue_full():
+    release = threading.Event()
+    queue = JobQueue(max_workers=1, max_pending=2, retry_after=3)
+
+    jobs = [queue.submit(release.wait) for _ in range(2)]
+
+    with pytest.raises(JobQueueFull) as excinfo:
+        queue.submit(release.wait)
+
+    assert excinfo.value.retry_after == 3
+    assert jobs[1].status == 'pending'
+
+    release.set()
+    for job in jobs:
+        job.future.result()
+
+    assert queue.pending == 0
+    assert queue.submit(release.wait).future.result() is True
+
+
+def test_job_queue_keeps_recently_finished():
+    queue = JobQueue(max_workers=1, max_finished=2)
+    jobs = [queue.submit(sum, [index]) for index in range(3)]
+
+    for job in jobs:
+        job.future.result()
+
+    assert queue.get(jobs[0].id) is None
+    assert queue.get(jobs[2].id) is jobs[2]
+
+
+def test_update_in_background():
+    release = threading.Event()
+    queue = JobQueue(max_workers=1)
+    client, cats = make_client(queue, release)
+
+    result = put(client, '1', {'name': 'tom', 'age': 5})
+
+    assert result.status == falcon.HTTP_ACCEPTED
+    content = json.loads(result.text)['content']
+    assert content['status'] in ('pending', 'running')
+    assert result.headers['Location'].endswith('/jobs/' + content['id'])
+    assert cats['1'] == {'name': 'kitty', 'age': 3}
+
+    release.set()
+    queue.get(content['id']).future.result()
+
+    result = client.simulate_get('/jobs/' + content['id'])
+    assert json.loads(result.text)['content'] == {
+        'id': content['id'],
+        'status': 'succeeded',
+        'result': {'name': 'tom', 'age': 5},
+    }
+    assert cats['1'] == {'name': 'tom', 'age': 5}
+
+
+def test_update_validated_before_enqueue():
+    queue = JobQueue(max_workers=1)
+    client, _ = make_client(queue)
+
+    result = put(client, '1', {'name': 'tom', 'age': 'invalid'})
+
+    assert result.status == falcon.HTTP_BAD_REQUEST
+    assert queue.pending == 0
+
+
+def test_failed_job_status():
+    queue = JobQueue(max_workers=1)
+    client, _ = make_client(queue)
+
+    job_id = json.loads(
+        put(client, '2', {'name': 'tom', 'age': 5}).text
+    )['content']['id']
+    queue.get(job_id).future.exception()
+
+    content = json.loads(client.simulate_get('/jobs/' + job_id).text)[
+        'content'
+    ]
+    assert content['status'] == 'failed'
+    assert content['error']['title'] == '404 Not Found'
+
+
+def test_delete_in_background():
+    queue = JobQueue(max_workers=1)
+    client, cats = make_client(queue)
+
+    result = client.simulate_delete('/cats/1')
+    assert result.status == falcon.HTTP_ACCEPTED
+
+    queue.get(json.loads(result.text)['content']['id']).future.result()
+    assert cats == {}
+
+
+def test_queue_full_responds_with_service_unavailable():
+    release = threading.Event()
+    queue = JobQueue(max_workers=1, max_pending=1, retry_after=2)
+    client, _ = make_client(queue, release)
+
+    put(client, '1', {'name': 'tom', 'age': 5})
+    result = put(client, '1', {'name': 'tom', 'age': 6})
+
+    assert result.status == falcon.HTTP_SERVICE_UNAVAILABLE
+    assert result.headers['Retry-After'] == '2'
+    release.set()
+
+
+def test_missing_job():
+    client, _ = make_client(JobQueue(max_workers=1))
+
+    assert client.simulate_get('/jobs/missing').status == falcon.HTTP_NOT_FOUND
+
+
+def test_job_queue_rejects_process_pools():
+    executor = ProcessPoolExecutor(1)
+
+    try:
+        with pytest.raises(ValueError):
+            JobQueue(executor=executor)
+    finally:
+        executor.shutdown()
+
+
+def test_job_queue_records_failed_submissions():
+    class BrokenExecutor:
+        def submit(self, func, *args, **kwargs):
+            raise TypeError("can't pickle _thread.lock objects")
+
+    queue = JobQueue(executor=BrokenExecutor(), max_pending=1)
+    job = queue.submit(sum, [1, 2])
+
+    assert queue.pending == 0
+    assert queue.get(job.id) is job
+    assert job.as_dict()['status'] == 'failed'
+    assert job.as_dict()['error']['title'] == 'TypeError'
+
+    # note: failed submissions do not take slots of the queue
+    assert queue.submit(sum, [1, 2]).status == 'failed'
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_job_queue_logs_failures():
+    logger = logging.getLogger('graceful.jobs')
+    handler = RecordingHandler()
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    records = handler.records
+
+    def not_found():
+        raise falcon.HTTPNotFound()
+
+    try:
+        queue = JobQueue(max_workers=1)
+        queue.submit(int, 'invalid')
+        queue.submit(not_found)
+        queue.shutdown()
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+
+    assert [record.levelno for record in records] == [
+        logging.ERROR, logging.INFO,
+    ]
+    assert records[0].exc_info[0] is ValueError
@@ -1,7 +1,10 @@
 import copy
+import decimal
+import gzip
 import io
 import json
 import sys
+import zlib
 
 import pytest
 
@@ -9,7 +12,8 @@ import falcon
 from falcon.testing import create_environ
 
 from graceful.media.base import BaseMediaHandler
-from graceful.media.json import JSONHandler
+from graceful.media.encoding import DecompressingStream, LimitedStream
+from graceful.media.json import JSONHandler, RawJSON
 from graceful.media.handlers import MediaHandlers
 
 
@@ -344,3 +348,298 @@ def test_custom_extra_media_handlers():
         media_handler = media_handlers.lookup_handler(extra_media_type)
         assert media_handler is media_handlers.handlers[extra_media_type]
         assert media_handler is not json_handler
+
+
+@pytest.mark.parametrize('encoding,compress', [
+    ('gzip', gzip.compress),
+    ('x-gzip', gzip.compress),
+    ('deflate', zlib.compress),
+])
+def test_handle_request_compressed(
+    media_handler, media, media_json, encoding, compress
+):
+    env = create_environ(
+        body=compress(json.dumps(media).encode()),
+        headers={'Content-Type': media_json, 'Content-Encoding': encoding},
+    )
+    req = falcon.Request(env)
+    assert media_handler.handle_request(req, content_type=media_json) == media
+
+
+def test_handle_request_unsupported_encoding(media_handler, media_json):
+    env = create_environ(
+        body=b'foo', headers={'Content-Encoding': 'br'}
+    )
+    with pytest.raises(falcon.HTTPUnsupportedMediaType):
+        media_handler.handle_request(
+            falcon.Request(env), content_type=media_json
+        )
+
+
+def test_handle_request_compressed_too_large(media_json):
+    handler = JSONHandler()
+    handler.max_decompressed_length = 1024
+    env = create_environ(
+        body=gzip.compress(json.dumps(['x' * 2048]).encode()),
+        headers={'Content-Encoding': 'gzip'},
+    )
+    with pytest.raises(falcon.HTTPRequestEntityTooLarge):
+        handler.handle_request(falcon.Request(env), content_type=media_json)
+
+
+@pytest.mark.parametrize('ratio,too_large', [(100, True), (None, False)])
+def test_handle_request_compressed_ratio(media_json, ratio, too_large):
+    handler = JSONHandler()
+    handler.max_decompression_ratio = ratio
+    body = gzip.compress(json.dumps(['x' * 200 * 1024]).encode())
+    env = create_environ(body=body, headers={'Content-Encoding': 'gzip'})
+    # note: compressed body fits the limit but decompressed body is larger
+    #       than ratio times the limit
+    max_content_length = 1024
+    assert len(body) < max_content_length
+
+    if too_large:
+        with pytest.raises(falcon.HTTPRequestEntityTooLarge):
+            handler.handle_request(
+                falcon.Request(env), content_type=media_json,
+                max_content_length=max_content_length,
+            )
+    else:
+        assert handler.handle_request(
+            falcon.Request(env), content_type=media_json,
+            max_content_length=max_content_length,
+        ) == ['x' * 200 * 1024]
+
+
+def test_decompressing_stream_reads_in_chunks():
+    data = b'0123456789' * 1000
+    stream = DecompressingStream(
+        io.BytesIO(gzip.compress(data)), 'gzip', chunk_size=16
+    )
+    assert stream.read(10) == data[:10]
+    assert stream.read() == data[10:]
+    assert stream.read() == b''
+
+
+def test_decompressing_stream_zip_bomb():
+    compressed = gzip.compress(b'\0' * 10 * 1024 * 1024)
+    stream = DecompressingStream(
+        io.BytesIO(compressed), 'gzip', len(compressed), max_length=1024
+    )
+    with pytest.raises(falcon.HTTPRequestEntityTooLarge):
+        stream.read()
+    # note: decompression stops at first chunk that exceeds the limit
+    assert stream._decoded_length <= 1024 + stream.chunk_size
+
+
+@pytest.mark.parametrize('body', [
+    b'not compressed at all',
+    gzip.compress(b'{"truncated": true}')[:-10],
+])
+def test_decompressing_stream_invalid_data(body):
+    stream = DecompressingStream(io.BytesIO(body), 'gzip', len(body))
+    with pytest.raises(falcon.HTTPBadRequest):
+        stream.read()
+
+
+@pytest.mark.parametrize('items', [
+    [],
+    [{'id': 1}, {'id': 2}],
+    [12345, "split string", [1, 2, {"nested": None}], 1.5e10, True],
+])
+@pytest.mark.parametrize('chunk_size', [1, 3, 64 * 1024])
+def test_json_deserialize_many(json_handler, mocker, items, chunk_size):
+    mocker.patch('graceful.media.json._ChunkedTextReader.chunk_size',
+                 chunk_size)
+    body = json.dumps(items, indent=2).encode()
+
+    assert list(json_handler.deserialize_many(
+        io.BytesIO(body), 'application/json', len(body)
+    )) == items
+
+
+@pytest.mark.parametrize('body', [
+    b'{"not": "a list"}',
+    b'[1, 2',
+    b'[1 2]',
+    b'[1, 2] 3',
+    b'[1, }',
+    b'',
+])
+def test_json_deserialize_many_invalid(json_handler, body):
+    with pytest.raises(falcon.HTTPBadRequest):
+        list(json_handler.deserialize_many(
+            io.BytesIO(body), 'application/json', len(body)
+        ))
+
+
+def test_json_deserialize_many_custom_loads():
+    class DecimalJSONHandler(JSONHandler):
+        @classmethod
+        def loads(cls, s, *args, **kwargs):
+            return super().loads(s, *args, parse_float=decimal.Decimal)
+
+    body = b'[{"price": 1.1}, {"price": 2.5}]'
+    items = list(DecimalJSONHandler().deserialize_many(
+        io.BytesIO(body), 'application/json', len(body)
+    ))
+
+    assert items == [
+        {'price': decimal.Decimal('1.1')}, {'price': decimal.Decimal('2.5')}
+    ]
+    assert isinstance(items[0]['price'], decimal.Decimal)
+
+    with pytest.raises(falcon.HTTPBadRequest):
+        DecimalJSONHandler().deserialize_many(
+            io.BytesIO(b'{}'), 'application/json', 2
+        )
+
+
+def test_handle_request_many(media_handler, media_json):
+    items = [{'id': 1}, {'id': 2}]
+    env = create_environ(
+        body=gzip.compress(json.dumps(items).encode()),
+        headers={'Content-Encoding': 'gzip'},
+    )
+    assert list(media_handler.handle_request(
+        falcon.Request(env), content_type=media_json, many=True
+    )) == items
+
+
+@pytest.mark.parametrize('indent', [0, 4])
+def test_json_handler_serialize_raw_json(json_handler, media_json, indent):
+    media = {
+        'meta': {'cached': RawJSON('{"hit":  true}')},
+        'content': [RawJSON(b'{"id": 1}'), {'id': 2}, RawJSON(b'[3]')],
+    }
+    data = json_handler.serialize(media, media_json, indent=indent)
+
+    assert isinstance(data, bytes)
+    # note: fragments are spliced verbatim
+    assert b'{"hit":  true}' in data
+    assert json.loads(data.decode()) == {
+        'meta': {'cached': {'hit': True}},
+        'content': [{'id': 1}, {'id': 2}, [3]],
+    }
+
+
+def test_json_handler_serialize_raw_json_in_media_handlers(
+    media_handlers, resp
+):
+    media_handlers.handle_response(
+        resp, media={'meta': {}, 'content': RawJSON(b'{"id": 1}')}
+    )
+    assert resp.data == b'{"meta": {}, "content": {"id": 1}}'
+
+
+def test_json_handler_serialize_not_serializable(json_handler, media_json):
+    with pytest.raises(TypeError):
+        json_handler.serialize({'content': object()}, media_json)
+
+
+class UnreadableStream:
+    def read(self, size=-1):
+        raise AssertionError("stream should not be read")
+
+
+@pytest.mark.parametrize('max_content_length', [None, 10])
+def test_handle_request_too_large_rejected_before_read(
+    media_handler, media_json, mocker, max_content_length
+):
+    mocker.patch.object(
+        media_handler, 'max_content_length', max_content_length
+    )
+    env = create_environ(body=json.dumps(['x' * 100]))
+    req = falcon.Request(env)
+    req.stream = UnreadableStream()
+
+    with pytest.raises(falcon.HTTPRequestEntityTooLarge):
+        media_handler.handle_request(
+            req, content_type=media_json, max_content_length=20
+        )
+
+
+def test_handle_request_limit_per_media_type(media_json):
+    media_handlers = MediaHandlers(
+        handlers={'application/json': JSONHandler()}
+    )
+    media_handlers.handlers['application/json'].max_content_length = 10
+    env = create_environ(body=json.dumps(['x' * 100]))
+
+    with pytest.raises(falcon.HTTPRequestEntityTooLarge):
+        media_handlers.handle_request(
+            falcon.Request(env), content_type=media_json
+        )
+
+    assert media_handlers.max_content_lengths(5)['application/json'] == 5
+    assert media_handlers.max_content_lengths(20)['application/json'] == 10
+    assert media_handlers.max_content_lengths()['application/json'] == 10
+
+
+def test_handle_request_unknown_length(media_handler, media, media_json):
+    env = create_environ(body=json.dumps(media))
+    del env['CONTENT_LENGTH']
+
+    with pytest.raises(falcon.HTTPLengthRequired):
+        media_handler.handle_request(
+            falcon.Request(env), content_type=media_json,
+            max_content_length=1024,
+        )
+
+    # note: servers that support chunked transfer encoding terminate input
+    env['wsgi.input_terminated'] = True
+    env['wsgi.input'].seek(0)
+    assert media_handler.handle_request(
+        falcon.Request(env), content_type=media_json,
+        max_content_length=1024,
+    ) == media
+
+
+@pytest.mark.parametrize('compress', [lambda data: data, gzip.compress])
+def test_decode_stream_unknown_length_without_limit(json_handler, compress):
+    body = json.dumps(['x' * 2048]).encode()
+    env = create_environ(
+        body=compress(body),
+        headers={'Content-Encoding': 'gzip'} if compress is gzip.compress
+        else None,
+    )
+    del env['CONTENT_LENGTH']
+    req = falcon.Request(env)
+
+    # note: bodies of unknown length are not rejected if they are not limited
+    stream, content_length = json_handler.decode_stream(req)
+
+    if compress is gzip.compress:
+        assert stream.read() == body
+    else:
+        assert stream is req.stream
+        assert content_length is None
+
+
+@pytest.mark.parametrize('compress', [lambda data: data, gzip.compress])
+def test_handle_request_unknown_length_too_large(
+    media_handler, media_json, mocker, compress
+):
+    env = create_environ(
+        body=compress(json.dumps(['x' * 2048]).encode()),
+        headers={'Content-Encoding': 'gzip'} if compress is gzip.compress
+        else None,
+    )
+    del env['CONTENT_LENGTH']
+    env['wsgi.input_terminated'] = True
+    mocker.patch.object(media_handler, 'max_decompressed_length', 1024)
+
+    with pytest.raises(falcon.HTTPRequestEntityTooLarge):
+        media_handler.handle_request(
+            falcon.Request(env), content_type=media_json,
+            max_content_length=1024,
+        )
+
+
+def test_limited_stream():
+    stream = LimitedStream(io.BytesIO(b'x' * 100), max_length=50)
+    assert stream.read(10) == b'x' * 10
+    with pytest.raises(falcon.HTTPRequestEntityTooLarge):
+        stream.read()
+    # note: never reads more than one byte over the limit
+    assert stream._read_length == 51
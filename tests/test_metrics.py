@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+
+import pytest
+
+from falcon import API, testing
+
+from graceful import authentication, metrics
+from graceful.fields import IntField
+from graceful.resources.generic import ListCreateAPI
+from graceful.serializers import BaseSerializer
+
+
+class CatSerializer(BaseSerializer):
+    age = IntField("cat age")
+
+
+class CatListResource(ListCreateAPI, with_context=True):
+    serializer = CatSerializer()
+
+    def list(self, params, meta, context, **kwargs):
+        return [{'age': 3}]
+
+    def create(self, params, meta, validated, context, **kwargs):
+        return validated
+
+
+def test_log_buckets():
+    assert metrics.log_buckets(1, 10, 3) == (1, 10, 100)
+
+
+def test_counter_merges_threads():
+    counter = metrics.Counter('hits_total', 'Hits', labels=['kind'])
+
+    def work():
+        for _ in range(1000):
+            counter.inc(('foo',))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counter.inc(('bar',), 2)
+    assert counter.collect() == {('foo',): [4000], ('bar',): [2]}
+
+
+def test_histogram_exposition():
+    registry = metrics.MetricsRegistry()
+    histogram = registry.histogram(
+        'size_bytes', 'Size', labels=['kind'], buckets=[1, 10]
+    )
+
+    for value in (1, 5, 50):
+        histogram.observe(('a"b',), value)
+
+    assert registry.expose().splitlines() == [
+        '# HELP size_bytes Size',
+        '# TYPE size_bytes histogram',
+        'size_bytes_bucket{kind="a\\"b",le="1.0"} 1.0',
+        'size_bytes_bucket{kind="a\\"b",le="10.0"} 2.0',
+        'size_bytes_bucket{kind="a\\"b",le="+Inf"} 3.0',
+        'size_bytes_sum{kind="a\\"b"} 56.0',
+        'size_bytes_count{kind="a\\"b"} 3.0',
+    ]
+
+
+def test_registry_rejects_duplicates():
+    registry = metrics.MetricsRegistry()
+    registry.counter('hits_total', 'Hits')
+
+    with pytest.raises(ValueError):
+        registry.counter('hits_total', 'Hits')
+
+
+def test_multiprocess_aggregation(tmpdir):
+    def registry():
+        registry = metrics.MetricsRegistry(multiprocess_dir=str(tmpdir))
+        registry.counter('hits_total', 'Hits', labels=['kind'])
+        registry.histogram('size_bytes', 'Size', buckets=[1])
+        return registry
+
+    first, second = registry(), registry()
+    # note: simulate second process writing to its own file
+    second._pid = os.getpid()
+    second._values_file = metrics._MmapValues(str(tmpdir.join(
+        'metrics-other.db'
+    )))
+
+    first.metrics[0].inc(('foo',))
+    second.metrics[0].inc(('foo',), 2)
+    second.metrics[0].inc(('bar',))
+    second.metrics[1].observe((), 5)
+    with second._flush_lock:
+        second._flush()
+
+    collected = dict(
+        (metric.name, values) for metric, values in first.collect()
+    )
+    assert collected['hits_total'] == {('foo',): [3], ('bar',): [1]}
+    assert collected['size_bytes'] == {(): [0, 1, 5]}
+
+
+def test_mmap_values_grow_and_reopen(tmpdir):
+    path = str(tmpdir.join('values.db'))
+    values = metrics._MmapValues(path, initial_size=64)
+
+    for index in range(100):
+        values.write('key-{}'.format(index), index)
+    values.write('key-0', 42)
+    values.close()
+
+    reopened = metrics._MmapValues(path)
+    reopened.write('key-1', 7)
+    reopened.close()
+
+    stored = dict(metrics._MmapValues.read(path))
+    assert len(stored) == 100
+    assert stored['key-0'] == 42
+    assert stored['key-1'] == 7
+    assert stored['key-99'] == 99
+
+
+@pytest.fixture
+def client():
+    registry = metrics.MetricsRegistry()
+
+    api = API(middleware=[
+        metrics.Metrics(registry),
+        authentication.XAPIKey(
+            user_storage=authentication.DummyUserStorage()
+        ),
+        authentication.Anonymous({'name': 'guest'}),
+    ])
+    api.add_route('/cats', CatListResource())
+    api.add_route('/metrics', metrics.MetricsResource(registry))
+
+    return testing.TestClient(api)
+
+
+def test_metrics_middleware(client):
+    client.simulate_get('/cats')
+    client.simulate_post(
+        '/cats', body=json.dumps({'age': 'invalid'}),
+        headers={'Content-Type': 'application/json'},
+    )
+    client.simulate_get('/cats', query_string='indent=invalid')
+
+    result = client.simulate_get('/metrics')
+    assert result.headers['Content-Type'] == metrics.CONTENT_TYPE
+
+    lines = result.text.splitlines()
+    assert (
+        'graceful_requests_total'
+        '{resource="CatListResource",method="GET",status="200"} 1.0'
+    ) in lines
+    assert (
+        'graceful_requests_total'
+        '{resource="CatListResource",method="POST",status="400"} 1.0'
+    ) in lines
+    assert (
+        'graceful_validation_failures_total'
+        '{resource="CatListResource",method="POST",'
+        'error="DeserializationError"} 1.0'
+    ) in lines
+    assert (
+        'graceful_request_duration_seconds_count'
+        '{resource="CatListResource",method="GET"} 2.0'
+    ) in lines
+    assert (
+        'graceful_response_size_bytes_count'
+        '{resource="CatListResource",method="GET"} 2.0'
+    ) in lines
+    assert (
+        'graceful_authentication_total{middleware="Anonymous",result="hit"}'
+        ' 3.0'
+    ) in lines
+    assert (
+        'graceful_authentication_total{middleware="XAPIKey",result="miss"}'
+        ' 3.0'
+    ) in lines
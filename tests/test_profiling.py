@@ -0,0 +1,303 @@
+import json
+import threading
+import tracemalloc
+
+import pytest
+
+from falcon import API, status_codes, testing
+
+from graceful import authentication, profiling, serializers, timing
+from graceful.fields import IntField, StringField
+from graceful.resources.generic import ListAPI
+from graceful.serializers import BaseSerializer
+
+
+class CatSerializer(BaseSerializer):
+    name = StringField("cat name")
+    age = IntField("cat age")
+    nicknames = StringField("cat nicknames", many=True)
+
+
+class CatListResource(ListAPI, with_context=True):
+    serializer = CatSerializer()
+
+    def list(self, params, meta, context, **kwargs):
+        return [
+            {'name': 'kitty', 'age': 3, 'nicknames': ['kit']}
+            for _ in range(10)
+        ]
+
+
+def make_client(profiler, user={'name': 'admin'}):
+    api = API(middleware=[authentication.Anonymous(user), profiler])
+    api.add_route('/cats', CatListResource())
+    api.add_route('/profiles', profiling.ProfilesResource(profiler))
+    return testing.TestClient(api)
+
+
+def functions(summary):
+    return [function['function'] for function in summary['functions']]
+
+
+def test_profiler_samples_requests():
+    profiler = profiling.Profiler(sample_rate=0.5, random=iter(
+        [0.1, 0.9, 0.1, 0.9]
+    ).__next__)
+    client = make_client(profiler)
+
+    for _ in range(4):
+        result = client.simulate_get('/cats')
+        assert result.status == status_codes.HTTP_OK
+        assert json.loads(result.text)['content'][0] == {
+            'name': 'kitty', 'age': 3, 'nicknames': ['kit']
+        }
+
+    top = profiler.top(limit=100)
+    assert list(top) == ['CatListResource GET']
+    assert top['CatListResource GET']['requests'] == 2
+    # note: field level time attribution
+    names = [
+        function.rsplit('(', 1)[-1]
+        for function in functions(top['CatListResource GET'])
+    ]
+    assert 'CatSerializer.name)' in names
+    assert 'CatSerializer.nicknames)' in names
+    assert not serializers._field_attribution.get()
+
+    profiler.clear()
+    assert profiler.top() == {}
+
+
+def test_profiler_field_attribution_is_per_request(monkeypatch):
+    profiled = threading.Event()
+    release = threading.Event()
+    attributed = []
+    by_field = BaseSerializer._to_representation_by_field
+
+    def spy(serializer, obj):
+        attributed.append(threading.current_thread())
+        return by_field(serializer, obj)
+
+    monkeypatch.setattr(BaseSerializer, '_to_representation_by_field', spy)
+
+    class SlowCatListResource(CatListResource):
+        def list(self, params, meta, context, **kwargs):
+            profiled.set()
+            release.wait(5)
+            return super().list(params, meta, context, **kwargs)
+
+    profiler = profiling.Profiler(sample_rate=0, authorize=lambda req: True)
+    client = make_client(profiler)
+    client.app.add_route('/slow', SlowCatListResource())
+
+    thread = threading.Thread(
+        target=client.simulate_get, args=('/slow',),
+        kwargs={'headers': {'X-Profile': '1'}},
+    )
+    thread.start()
+
+    try:
+        profiled.wait(5)
+        # note: requests processed while other request is profiled use the
+        #       regular representation
+        CatSerializer().to_representation(
+            {'name': 'kitty', 'age': 3, 'nicknames': []}
+        )
+    finally:
+        release.set()
+        thread.join()
+
+    assert attributed and set(attributed) == {thread}
+    assert profiler.top()['SlowCatListResource GET']['requests'] == 1
+
+
+@pytest.mark.parametrize('authorized, profiled', [(True, 1), (False, 0)])
+def test_profiler_debug_header(authorized, profiled):
+    profiler = profiling.Profiler(
+        sample_rate=0, authorize=lambda req: authorized
+    )
+    client = make_client(profiler)
+
+    client.simulate_get('/cats', headers={'X-Profile': '1'})
+    client.simulate_get('/cats')
+
+    top = profiler.top()
+    assert top.get('CatListResource GET', {}).get('requests', 0) == profiled
+
+
+def test_profiler_ignores_header_without_authorize():
+    profiler = profiling.Profiler(sample_rate=0)
+    make_client(profiler).simulate_get('/cats', headers={'X-Profile': '1'})
+
+    assert profiler.top() == {}
+
+
+def test_profiler_dumps_profiles(tmpdir):
+    profiler = profiling.Profiler(sample_rate=1, dump_dir=str(tmpdir))
+    make_client(profiler).simulate_get('/cats')
+
+    assert len(tmpdir.listdir()) == 1
+
+
+def test_profiles_resource():
+    profiler = profiling.Profiler(sample_rate=1)
+    client = make_client(profiler)
+    client.simulate_get('/cats')
+
+    result = client.simulate_get(
+        '/profiles', query_string='limit=3&sort=tottime'
+    )
+    content = json.loads(result.text)['content']
+
+    assert len(content['CatListResource GET']['functions']) == 3
+
+    result = client.simulate_get('/profiles', query_string='sort=invalid')
+    assert result.status == status_codes.HTTP_BAD_REQUEST
+
+
+def test_profiles_resource_requires_authentication():
+    profiler = profiling.Profiler(sample_rate=0)
+    client = make_client(profiler, user=None)
+
+    result = client.simulate_get('/profiles')
+    assert result.status == status_codes.HTTP_UNAUTHORIZED
+
+
+class CatResource(ListAPI, with_context=True):
+    serializer = CatSerializer()
+
+    def list(self, params, meta, context, **kwargs):
+        # note: allocations of user code retained until the response. Names
+        #       are new strings because dicts and lists can be reused from
+        #       interpreter free lists without any allocation.
+        context['cats'] = [
+            {'name': 'kitty {}'.format(age), 'age': age, 'nicknames': []}
+            for age in range(100)
+        ]
+        return context['cats']
+
+
+def make_tracker_client(tracker, *middleware):
+    api = API(middleware=list(middleware) + [tracker])
+    api.add_route('/cats', CatResource())
+    return testing.TestClient(api)
+
+
+def test_allocation_tracker_report():
+    tracker = profiling.AllocationTracker(sample_rate=1)
+    client = make_tracker_client(tracker)
+
+    for _ in range(2):
+        result = client.simulate_get('/cats')
+        assert len(json.loads(result.text)['content']) == 100
+
+    report = tracker.report()
+    assert list(report) == ['CatResource GET']
+
+    summary = report['CatResource GET']
+    assert summary['requests'] == 2
+    assert summary['peak_bytes'] >= summary['bytes'] > 0
+    assert {'params', 'handler', 'serialization', 'render'} <= set(
+        summary['phases']
+    )
+    # note: handler creates 100 names and the list retained in context
+    assert summary['phases']['handler']['count'] >= 101
+    assert summary['origins']['user']['count'] >= 101
+    assert summary['origins']['graceful']['count'] > 0
+    assert not tracemalloc.is_tracing()
+
+    tracker.clear()
+    assert tracker.report() == {}
+
+
+def test_allocation_tracker_keeps_server_timing():
+    tracker = profiling.AllocationTracker(sample_rate=1)
+    client = make_tracker_client(tracker, timing.ServerTiming())
+
+    result = client.simulate_get('/cats')
+
+    assert 'handler;dur=' in result.headers['Server-Timing']
+    assert 'handler' in tracker.report()['CatResource GET']['phases']
+    assert timing.current() is None
+
+
+def test_allocation_tracker_keeps_foreign_traces():
+    tracker = profiling.AllocationTracker(sample_rate=1)
+    client = make_tracker_client(tracker)
+
+    tracemalloc.start(25)
+    try:
+        retained = [{'retained': index} for index in range(100)]
+        traced = len(tracemalloc.take_snapshot().traces)
+
+        client.simulate_get('/cats')
+
+        # note: traces of the application are neither cleared nor stopped
+        assert tracemalloc.is_tracing()
+        assert len(tracemalloc.take_snapshot().traces) >= traced
+    finally:
+        tracemalloc.stop()
+
+    summary = tracker.report()['CatResource GET']
+    assert len(retained) == 100
+    assert summary['peak_bytes'] is None
+    assert summary['phases']['handler']['count'] >= 101
+
+
+def test_allocations_resource():
+    tracker = profiling.AllocationTracker(sample_rate=1)
+    client = make_tracker_client(
+        tracker, authentication.Anonymous({'name': 'admin'})
+    )
+    client.app.add_route(
+        '/allocations', profiling.AllocationsResource(tracker)
+    )
+
+    client.simulate_get('/cats')
+    result = client.simulate_get('/allocations')
+
+    content = json.loads(result.text)['content']
+    assert content['CatResource GET']['requests'] == 1
+
+
+def test_allocations_resource_requires_authentication():
+    tracker = profiling.AllocationTracker(sample_rate=0)
+    client = make_tracker_client(tracker, authentication.Anonymous(None))
+    client.app.add_route(
+        '/allocations', profiling.AllocationsResource(tracker)
+    )
+
+    result = client.simulate_get('/allocations')
+    assert result.status == status_codes.HTTP_UNAUTHORIZED
+
+
+def test_allocation_tracker_skips_concurrent_requests():
+    tracker = profiling.AllocationTracker(sample_rate=1)
+    client = make_tracker_client(tracker)
+
+    with tracker._tracking:
+        client.simulate_get('/cats')
+
+    assert tracker.report() == {}
+
+
+def test_allocation_origin():
+    tracemalloc.start(25)
+    try:
+        cats = [{'age': age} for age in range(100)]
+        CatSerializer().to_representation({'name': 'kitty'})
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    def origins(filename):
+        return {
+            profiling.allocation_origin(trace.traceback)
+            for trace in snapshot.filter_traces([
+                tracemalloc.Filter(True, filename)
+            ]).traces
+        }
+
+    assert len(cats) == 100
+    assert origins(__file__) == {'user'}
+    assert origins(serializers.__file__) == {'graceful'}
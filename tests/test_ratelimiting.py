@@ -0,0 +1,192 @@
+import threading
+
+import pytest
+
+from falcon import API, HTTPTooManyRequests, Request, status_codes
+from falcon import testing
+from falcon.testing import create_environ
+
+from graceful import authentication
+from graceful.ratelimiting import RateLimit
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class SimpleKVStore(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+def user_request(user):
+    req = Request(create_environ())
+    if user is not None:
+        req.context['user'] = user
+    return req
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        RateLimit(rate=0)
+
+
+@pytest.mark.parametrize('kv_store', [None, SimpleKVStore()])
+def test_token_bucket(kv_store, resp):
+    timer = FakeTimer()
+    limit = RateLimit(rate=2, burst=3, kv_store=kv_store, timer=timer)
+
+    for _ in range(3):
+        limit.process_resource(user_request({'id': 1}), resp, None)
+
+    with pytest.raises(HTTPTooManyRequests) as excinfo:
+        limit.process_resource(user_request({'id': 1}), resp, None)
+
+    assert excinfo.value.headers['Retry-After'] == '1'
+
+    # note: other users have their own buckets
+    limit.process_resource(user_request({'id': 2}), resp, None)
+
+    # note: two tokens per second
+    timer.now += 1
+    for _ in range(2):
+        limit.process_resource(user_request({'id': 1}), resp, None)
+
+    with pytest.raises(HTTPTooManyRequests):
+        limit.process_resource(user_request({'id': 1}), resp, None)
+
+    # note: bucket never holds more than burst tokens
+    timer.now += 100
+    for _ in range(3):
+        limit.process_resource(user_request({'id': 1}), resp, None)
+
+    with pytest.raises(HTTPTooManyRequests):
+        limit.process_resource(user_request({'id': 1}), resp, None)
+
+
+def test_shared_buckets(resp):
+    kv_store = SimpleKVStore()
+    timer = FakeTimer()
+    workers = [
+        RateLimit(rate=1, burst=2, kv_store=kv_store, timer=timer)
+        for _ in range(2)
+    ]
+
+    workers[0].process_resource(user_request({'id': 1}), resp, None)
+    workers[1].process_resource(user_request({'id': 1}), resp, None)
+
+    with pytest.raises(HTTPTooManyRequests):
+        workers[0].process_resource(user_request({'id': 1}), resp, None)
+
+    assert list(kv_store) == ['ratelimit:{"id": 1}']
+
+
+def test_unauthenticated_requests_are_not_limited(resp):
+    limit = RateLimit(rate=1, burst=1)
+
+    for _ in range(3):
+        limit.process_resource(user_request(None), resp, None)
+
+
+def test_bucket_keys(req):
+    limit = RateLimit(rate=1)
+    middleware = authentication.XForwardedFor()
+
+    req.context['user'] = {
+        'identified_with': middleware, 'identifier': '10.0.0.1'
+    }
+    assert limit.get_key(req) == 'XForwardedFor:10.0.0.1'
+
+    req.context['user'] = {'id': 1, 'name': 'foo'}
+    assert limit.get_key(req) == '{"id": 1, "name": "foo"}'
+
+
+def test_buckets_lru_eviction(resp):
+    limit = RateLimit(
+        rate=1, burst=1, max_buckets=2, lock_stripes=1, timer=FakeTimer()
+    )
+
+    limit.process_resource(user_request({'id': 1}), resp, None)
+    limit.process_resource(user_request({'id': 2}), resp, None)
+    limit.process_resource(user_request({'id': 3}), resp, None)
+
+    assert len(limit._stripes[0].buckets) == 2
+    # note: bucket of the first user was evicted so it is full again
+    limit.process_resource(user_request({'id': 1}), resp, None)
+
+
+def test_buckets_are_bounded_in_all_stripes(resp):
+    limit = RateLimit(rate=1, max_buckets=8, lock_stripes=4)
+
+    for user_id in range(100):
+        limit.process_resource(user_request({'id': user_id}), resp, None)
+
+    assert sum(len(stripe.buckets) for stripe in limit._stripes) <= 8
+
+
+def test_bucket_key_identity_is_computed_once(req, mocker):
+    limit = RateLimit(rate=1)
+    identity = mocker.patch(
+        'graceful.ratelimiting.user_identity', return_value='foo'
+    )
+    req.context['user'] = {'id': 1}
+
+    assert limit.get_key(req) == 'foo'
+    assert limit.get_key(req) == 'foo'
+    assert identity.call_count == 1
+
+    # note: equal but different user object is not the same user
+    req.context['user'] = {'id': 1}
+    limit.get_key(req)
+    assert identity.call_count == 2
+
+
+@pytest.mark.parametrize('users', [1, 4])
+def test_limit_holds_under_concurrent_requests(users):
+    limit = RateLimit(rate=1, burst=50, timer=FakeTimer())
+    barrier = threading.Barrier(8)
+    allowed = []
+
+    def worker(user_id):
+        barrier.wait()
+
+        for _ in range(100):
+            try:
+                limit.process_resource(
+                    user_request({'id': user_id}), None, None
+                )
+            except HTTPTooManyRequests:
+                pass
+            else:
+                allowed.append(user_id)
+
+    threads = [
+        threading.Thread(target=worker, args=(index % users,))
+        for index in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # note: time does not pass so every user gets exactly burst requests
+    assert sorted(allowed) == sorted(list(range(users)) * 50)
+
+
+def test_rate_limit_in_api():
+    api = API(middleware=[
+        authentication.Anonymous({'id': 1}),
+        RateLimit(rate=1, burst=1),
+    ])
+    api.add_route('/', testing.SimpleTestResource())
+    client = testing.TestClient(api)
+
+    assert client.simulate_get('/').status == status_codes.HTTP_OK
+
+    result = client.simulate_get('/')
+    assert result.status == status_codes.HTTP_TOO_MANY_REQUESTS
+    assert result.headers['Retry-After'] == '1'
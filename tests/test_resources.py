@@ -1,5 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 import copy
 import json
+import threading
 from collections.abc import Iterable
 
 from falcon.testing import create_environ
@@ -16,6 +18,7 @@ from graceful.resources import mixins
 from graceful.parameters import StringParam, BaseParam, IntParam
 from graceful.serializers import BaseSerializer
 from graceful.fields import StringField
+from graceful.media.json import RawJSON
 from graceful.validators import min_validator, max_validator
 
 
@@ -534,6 +537,25 @@ def test_context_disabled_implicitly(mixin, method, http_handler, req, resp):
     assert 'context' not in kwargs
 
 
+def test_context_inherited_by_subclasses(req, resp):
+    # future: remove in 1.x
+    class ResourceWithContext(
+        mixins.RetrieveMixin, BaseResource, with_context=True
+    ):
+        pass
+
+    class InheritedResource(ResourceWithContext):
+        pass
+
+    resource = InheritedResource()
+    resource.retrieve = Mock(return_value={})
+    resource.on_get(req, resp, uri_kwarg='foo')
+
+    args, kwargs = resource.retrieve.call_args
+
+    assert kwargs == {'context': req.context, 'uri_kwarg': 'foo'}
+
+
 def test_warns_about_context_disabled_implicitly():
     # future: remove in 1.x
     class ResourceWithoutContext(BaseResource):
@@ -541,3 +563,124 @@ def test_warns_about_context_disabled_implicitly():
 
     with pytest.warns(FutureWarning):
         ResourceWithoutContext()
+
+
+def test_raw_json_content_and_fields(req, resp):
+    class RawJSONField(StringField):
+        def to_representation(self, value):
+            return value
+
+    class RawSerializer(BaseSerializer):
+        cached = RawJSONField("pre-encoded document")
+
+    class RawResource(TestResource):
+        def retrieve(self, params, meta, **kwargs):
+            meta['cache'] = RawJSON('{"hit": true}')
+            return RawSerializer().to_representation(
+                {'cached': RawJSON(b'{"id": 1}')}
+            )
+
+    RawResource().on_get(req, resp)
+    assert json.loads(resp.data.decode()) == {
+        'meta': {'params': {'indent': 0}, 'cache': {'hit': True}},
+        'content': {'cached': {'id': 1}},
+    }
+
+
+def test_max_content_length(req, resp):
+    class LimitedResource(mixins.CreateMixin, BaseResource):
+        max_content_length = 16
+
+    resource = LimitedResource()
+
+    description = resource.describe(req, resp)
+    assert description['max_content_length'] == {'application/json': 16}
+    assert 'max_content_length' not in TestResource().describe(req, resp)
+
+    env = create_environ(
+        body=json.dumps({'too': 'large' * 10}),
+        headers={'Content-Type': 'application/json'},
+    )
+    with pytest.raises(falcon.HTTPRequestEntityTooLarge):
+        resource.require_representation(Request(env))
+
+    env = create_environ(
+        body=json.dumps({'ok': 1}),
+        headers={'Content-Type': 'application/json'},
+    )
+    assert resource.require_representation(Request(env)) == {'ok': 1}
+
+
+def test_fan_out_runs_subqueries_concurrently(req, resp):
+    # note: barrier is passed only if all subqueries run at the same time
+    barrier = threading.Barrier(5, timeout=5)
+
+    def slow(key):
+        def subquery(params, meta, **kwargs):
+            barrier.wait()
+            meta[key + '_count'] = 1
+            return kwargs['value'] + key
+        return subquery
+
+    class FanOutResource(mixins.FanOutMixin, TestResource):
+        def retrieve(self, params, meta, **kwargs):
+            return self.fan_out(
+                {key: slow(key) for key in 'abcde'},
+                params, meta, value='x'
+            )
+
+    FanOutResource().on_get(req, resp)
+
+    body = json.loads(resp.body)
+    assert body['content'] == {key: 'x' + key for key in 'abcde'}
+    assert body['meta']['a_count'] == 1
+    assert body['meta']['params'] == {'indent': 0}
+    assert set(body['meta']['subqueries']) == set('abcde')
+    assert body['meta']['subqueries']['a']['latency_ms'] >= 0
+
+
+def test_fan_out_timeout(req, resp):
+    release = threading.Event()
+
+    class FanOutResource(mixins.FanOutMixin, TestResource):
+        fan_out_executor = ThreadPoolExecutor(2)
+        subquery_timeout = 0.01
+
+        def retrieve(self, params, meta, **kwargs):
+            return self.fan_out(
+                {'slow': lambda params, meta: release.wait(5)}, params, meta
+            )
+
+    try:
+        with pytest.raises(falcon.HTTPGatewayTimeout):
+            FanOutResource().on_get(req, resp)
+    finally:
+        release.set()
+
+
+def test_fan_out_pool_per_resource_class():
+    class FirstResource(mixins.FanOutMixin, TestResource):
+        fan_out_max_workers = 1
+
+    class SecondResource(mixins.FanOutMixin, TestResource):
+        fan_out_max_workers = 3
+
+    first = FirstResource().get_fan_out_executor()
+    second = SecondResource().get_fan_out_executor()
+
+    assert first is FirstResource().get_fan_out_executor()
+    assert first is not second
+    assert first._max_workers == 1
+    assert second._max_workers == 3
+
+
+def test_fan_out_propagates_errors(req, resp):
+    def failing(params, meta):
+        raise falcon.HTTPNotFound()
+
+    class FanOutResource(mixins.FanOutMixin, TestResource):
+        def retrieve(self, params, meta, **kwargs):
+            return self.fan_out({'failing': failing}, params, meta)
+
+    with pytest.raises(falcon.HTTPNotFound):
+        FanOutResource().on_get(req, resp)
@@ -0,0 +1,160 @@
+import json
+
+import pytest
+
+from falcon import API, testing
+
+from graceful import authentication, timing
+from graceful.fields import IntField, StringField
+from graceful.resources.generic import ListCreateAPI
+from graceful.serializers import BaseSerializer
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CatSerializer(BaseSerializer):
+    name = StringField("cat name")
+    age = IntField("cat age")
+
+
+class CatListResource(ListCreateAPI, with_context=True):
+    serializer = CatSerializer()
+
+    def list(self, params, meta, context, **kwargs):
+        with timing.phase('db'):
+            return [{'name': 'kitty', 'age': 3}]
+
+    def create(self, params, meta, validated, context, **kwargs):
+        return validated
+
+
+def phase_names(header):
+    return [metric.split(';')[0] for metric in header.split(', ')]
+
+
+def test_phase_is_noop_when_disabled():
+    assert timing.current() is None
+    assert timing.phase('foo') is timing.phase('bar')
+
+    with timing.phase('foo'):
+        pass
+
+
+def test_nested_phases_are_exclusive():
+    timer = FakeTimer()
+    timings = timing.Timings(timer)
+
+    with timings.phase('outer'):
+        timer.now += 1
+        with timings.phase('inner'):
+            timer.now += 2
+        timer.now += 3
+
+    with timings.phase('inner'):
+        timer.now += 4
+
+    assert timings.as_dict(total=True) == {
+        'outer': 4000, 'inner': 6000, 'total': 10000
+    }
+
+
+def test_phase_stops_on_exception():
+    timer = FakeTimer()
+    timings = timing.Timings(timer)
+
+    with pytest.raises(ValueError):
+        with timings.phase('failing'):
+            timer.now += 1
+            raise ValueError
+
+    assert timings.as_dict() == {'failing': 1000}
+
+
+def test_histogram_sink():
+    sink = timing.HistogramSink(buckets=(1, 10, 100))
+
+    for duration in (0.5, 5, 5, 50, 500):
+        sink.record({'handler': duration}, None, None)
+
+    histogram = sink.snapshot()['handler']
+    assert histogram['count'] == 5
+    assert histogram['sum'] == 560.5
+    assert histogram['buckets'] == [
+        (1, 1), (10, 2), (100, 1), (float('inf'), 1)
+    ]
+
+    assert sink.percentile('handler', 50) == 10
+    assert sink.percentile('handler', 100) == float('inf')
+    assert sink.percentile('unknown', 50) is None
+
+    sink.clear()
+    assert sink.snapshot() == {}
+
+
+def test_logging_sink(req, resp, mocker):
+    logger = mocker.Mock()
+    logger.isEnabledFor.return_value = True
+
+    timing.LoggingSink(logger).record(
+        {'handler': 1.5, 'total': 2.0}, req, resp
+    )
+
+    args = logger.log.call_args[0]
+    assert args[1] % args[2:] == 'GET / handler=1.5ms total=2.0ms'
+
+
+@pytest.fixture
+def client():
+    sink = timing.HistogramSink()
+
+    api = API(middleware=[
+        timing.ServerTiming(meta=True, sink=sink),
+        authentication.Anonymous({'name': 'guest'}),
+    ])
+    api.add_route('/', CatListResource())
+
+    client = testing.TestClient(api)
+    client.sink = sink
+    return client
+
+
+def test_server_timing_on_get(client):
+    result = client.simulate_get('/')
+
+    assert phase_names(result.headers['Server-Timing']) == [
+        'authentication', 'params', 'db', 'serialization', 'handler',
+        'render', 'total',
+    ]
+    assert list(json.loads(result.text)['meta']['timings']) == [
+        'authentication', 'params', 'db', 'serialization', 'handler',
+    ]
+    assert client.sink.snapshot()['total']['count'] == 1
+    assert timing.current() is None
+
+
+def test_server_timing_on_post(client):
+    result = client.simulate_post(
+        '/', body=json.dumps({'name': 'kitty', 'age': 3}),
+        headers={'Content-Type': 'application/json'},
+    )
+
+    names = phase_names(result.headers['Server-Timing'])
+    assert {'representation', 'validation', 'handler'} <= set(names)
+
+
+def test_server_timing_disabled_header(req, resp):
+    middleware = timing.ServerTiming(header=False)
+
+    middleware.process_request(req, resp)
+    with timing.phase('foo'):
+        pass
+    middleware.process_response(req, resp, None)
+
+    assert 'Server-Timing' not in resp._headers
+    assert timing.current() is None